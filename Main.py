@@ -1,4 +1,5 @@
 from sys import argv as sysargv, exit as sysexit
+from multiprocessing import freeze_support
 from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QApplication
 
@@ -6,6 +7,7 @@ from core.win import MyWin
 
 
 if __name__ == '__main__':
+    freeze_support()  # 打包后并行计算的子进程需要
     test = False
     QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
@@ -1,8 +1,163 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from itertools import count
 from pathlib import Path
 import numpy as np
 
 
+def _binary_dtype(ncol: int) -> np.dtype:
+    """二进制结果文件每行的数据格式，与OpenSees的`-binary` recorder一致：
+    ncol个float64（本机字节序）后接1个字节的换行符
+    """
+    return np.dtype([('value', 'f8', (ncol,)), ('newline', 'u1')])
+
+
+def _write_binary(file: Path, data: np.ndarray):
+    """按`-binary` recorder的格式写入NPTS行的数组"""
+    data = np.asarray(data, dtype=float).reshape(len(data), -1)
+    rows = np.empty(len(data), dtype=_binary_dtype(data.shape[1]))
+    rows['value'] = data
+    rows['newline'] = ord('\n')
+    rows.tofile(file)
+
+
+def _read_binary(file: Path, nrow: int, mmap: bool=False) -> np.ndarray:
+    """读取`-binary` recorder输出的文件，列数由文件大小与行数nrow确定，
+    mmap为True时返回只读的内存映射视图，否则返回连续数组
+    """
+    ncol = (os.path.getsize(file) // nrow - 1) // 8 if nrow else 0
+    dtype = _binary_dtype(ncol)
+    if mmap and nrow:
+        rows = np.memmap(file, dtype=dtype, mode='r', shape=(nrow,))
+        return rows['value']
+    rows = np.fromfile(file, dtype=dtype, count=nrow)
+    return np.ascontiguousarray(rows['value'])
+
+
+class DerivedCache:
+    """派生响应（绝对响应、层间位移、楼层剪力、包络等）的缓存，
+    所有Results共用同一内存上限，超出时按最近最少使用的顺序清除
+    """
+    def __init__(self, budget: int):
+        """
+        Args:
+            budget (int): 内存上限（字节）
+        """
+        self.budget = budget
+        self.nbytes = 0  # 当前占用的内存
+        self.entries: OrderedDict[tuple[int, tuple], np.ndarray] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple[int, tuple]) -> np.ndarray | None:
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key: tuple[int, tuple], value: np.ndarray):
+        """写入缓存，单个数组超过内存上限时不缓存"""
+        if value.nbytes > self.budget:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.nbytes -= self.entries.pop(key).nbytes
+            self.entries[key] = value
+            self.nbytes += value.nbytes
+            while self.nbytes > self.budget:
+                _, old_value = self.entries.popitem(last=False)
+                self.nbytes -= old_value.nbytes
+
+    def invalidate(self, owner: int):
+        """清除某个Results的全部缓存"""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == owner]:
+                self.nbytes -= self.entries.pop(key).nbytes
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+
+class StoryMatIndex:
+    """楼层与材料响应列的对应关系，由模型的story_mat生成，同一模型的各条地震动结果共用
+
+    mat中第n个单元（按楼层依次编号）的应力位于第2n列，应变位于第2n+1列。
+    """
+    max_matrix_size = 100000  # 使用归属矩阵求和时矩阵的最大元素数
+    def __init__(self, story_mat: list[list]):
+        """
+        Args:
+            story_mat (list[list]): 各层材料（如[[1, 2], [2], [2]]）
+        """
+        self.key = tuple(map(tuple, story_mat))  # 用于缓存的键
+        self.N = len(story_mat)  # 楼层数目
+        n_story_ele = np.array([len(sub_list) for sub_list in story_mat], dtype=int)  # 各层单元数
+        self.n_ele = int(n_story_ele.sum())  # 单元数目
+        self.story_start = np.concatenate(([0], np.cumsum(n_story_ele)[:-1])).astype(int)  # 各层第一个单元的序号
+        self.ele_story = np.repeat(np.arange(self.N), n_story_ele)  # 各单元所在楼层（从0开始）
+        self.story_ele = [list(range(start, start + n)) for start, n in zip(self.story_start, n_story_ele)]  # 各层的单元序号
+        self.has_ele = n_story_ele > 0  # 各层是否有单元
+        self.last_ele = self.story_start + n_story_ele - 1  # 各层最后一个单元的序号
+        if self.n_ele * self.N <= self.max_matrix_size:
+            # 单元-楼层归属矩阵，规模较小时以矩阵乘法求和（BLAS）快于reduceat
+            self.matrix = np.zeros((self.n_ele, self.N))
+            self.matrix[np.arange(self.n_ele), self.ele_story] = 1
+        else:
+            self.matrix = None
+
+    def stress_cols(self, story_idx: int) -> list[int]:
+        """第story_idx层（从0开始）各单元应力所在的列"""
+        return [2 * n for n in self.story_ele[story_idx]]
+
+    def story_shear(self, mat: np.ndarray) -> np.ndarray:
+        """计算所有楼层的剪力（NPTS行N列），为各层单元应力之和"""
+        mat = np.asarray(mat)
+        if self.matrix is not None:
+            return mat[:, 0::2] @ self.matrix
+        shear = np.zeros((len(mat), self.N))
+        if self.n_ele:
+            shear[:, self.has_ele] = np.add.reduceat(mat[:, 0::2], self.story_start[self.has_ele], axis=1)
+        return shear
+
+    def story_deform(self, mat: np.ndarray) -> np.ndarray:
+        """所有楼层的变形（NPTS行N列），同层各单元变形相同，取该层最后一个单元的应变"""
+        mat = np.asarray(mat)
+        deform = np.zeros((len(mat), self.N))
+        deform[:, self.has_ele] = mat[:, 2 * self.last_ele[self.has_ele] + 1]
+        return deform
+
+
+def _response(name: str, doc: str) -> property:
+    """以完整数组的形式读取响应name"""
+    return property(lambda self: np.asarray(self.data[name][()]), doc=doc)
+
+
 class Results:
+    """单条地震动的计算结果
+
+    各响应可为np.ndarray，也可为np.memmap或h5py.Dataset等支持切片的惰性数组（见`from_binary`与
+    `ResultStore.read_results`）。惰性数组仅在访问时读取：访问`ra`、`mat`等属性时读取完整数组，
+    `get_response`、`get_story_hysteresis`等方法仅读取所需楼层的列。
+    派生响应在首次访问时计算并缓存于`Results.cache`（所有实例共用内存上限`cache.budget`），
+    修改`data`后需调用`invalidate`清除缓存。
+    """
+    cache = DerivedCache(512 * 2 ** 20)  # 派生响应缓存
+    _ids = count()
+
+    t = _response('t', '时间序列')
+    base_a = _response('base_a', '基底绝对加速度')
+    base_v = _response('base_v', '基底绝对速度')
+    base_u = _response('base_u', '基底绝对位移')
+    base_V = _response('base_V', '基底绝对反力')
+    ra = _response('ra', '楼层相对加速度')
+    rv = _response('rv', '楼层相对速度')
+    ru = _response('ru', '楼层相对位移')
+    mat = _response('mat', '楼层滞回响应')
+
     def __init__(self,
         t: np.ndarray,
         base_a: np.ndarray,
@@ -14,55 +169,153 @@ class Results:
         ru: np.ndarray,
         mat: np.ndarray
     ):
-        self.t = t  # 时间序列
-        self.base_a = base_a  # 基底绝对加速度
-        self.base_v = base_v  # 基底绝对速度
-        self.base_u = base_u  # 基底绝对位移
-        self.base_V = base_V  # 基底绝对反力
-        self.ra = ra  # 楼层相对加速度
-        self.rv = rv  # 楼层相对速度
-        self.ru = ru  # 楼层相对位移
-        self.mat = mat  # 楼层滞回响应
+        self.data = {
+            't': t, 'base_a': base_a, 'base_v': base_v, 'base_u': base_u, 'base_V': base_V,
+            'ra': ra, 'rv': rv, 'ru': ru, 'mat': mat
+        }  # 各响应（可为惰性数组）
         self.N = ra.shape[1]  # 楼层数目
         self.NPTS = len(t)  # 时间步数
+        self.cache_id = next(Results._ids)  # 缓存中的编号
+        weakref.finalize(self, Results.cache.invalidate, self.cache_id)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['cache_id']  # 缓存编号仅在当前进程内有效
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.cache_id = next(Results._ids)
+        weakref.finalize(self, Results.cache.invalidate, self.cache_id)
+
+    def cached(self, key: tuple, func) -> np.ndarray:
+        """读取派生响应key，无缓存时调用func()计算并缓存"""
+        value = Results.cache.get((self.cache_id, key))
+        if value is None:
+            value = func()
+            value.flags.writeable = False  # 缓存的数组为共用数据，不可原位修改
+            Results.cache.put((self.cache_id, key), value)
+        return value
+
+    def invalidate(self):
+        """清除该结果的派生响应缓存"""
+        Results.cache.invalidate(self.cache_id)
 
     @property
     def aa(self):
         """计算楼层绝对加速度"""
-        return self.base_a[:, np.newaxis] + self.ra
+        return self.cached(('aa',), lambda: self.get_response('aa'))
     
     @property
     def av(self):
         """计算楼层绝对速度"""
-        return self.base_v[:, np.newaxis] + self.rv
+        return self.cached(('av',), lambda: self.get_response('av'))
     
     @property
     def au(self):
         """计算楼层绝对位移"""
-        return self.base_u[:, np.newaxis] + self.ru
+        return self.cached(('au',), lambda: self.get_response('au'))
     
     @property
     def resu(self):
         """残余相对层间位移"""
-        return self.ru[-1]
+        return self.cached(('resu',), lambda: np.array(self.data['ru'][-1]))
+
+    @property
+    def drift(self):
+        """层间位移（NPTS行N列）"""
+        def func():
+            ru = self.ru
+            return np.column_stack((ru[:, 0], np.diff(ru, axis=1)))
+        return self.cached(('drift',), func)
+
+    @property
+    def max_drift(self):
+        """各层最大层间位移"""
+        return self.cached(('max_drift',), lambda: np.amax(np.abs(self.drift), axis=0))
+
+    @property
+    def res_drift(self):
+        """各层残余层间位移"""
+        return self.cached(('res_drift',), lambda: np.insert(np.diff(self.resu), 0, self.resu[0]))
+
+    @property
+    def max_aa(self):
+        """各层绝对加速度包络"""
+        return self.cached(('max_aa',), lambda: np.amax(np.abs(self.aa), axis=0))
+
+    def story_shear(self, index: StoryMatIndex) -> np.ndarray:
+        """楼层剪力（NPTS行N列），为各层所有材料应力之和
+
+        Args:
+            index (StoryMatIndex): 楼层与材料响应列的对应关系
+        """
+        return self.cached(('story_shear', index.key), lambda: index.story_shear(self.mat))
+
+    def max_story_shear(self, index: StoryMatIndex) -> np.ndarray:
+        """各层楼层剪力包络"""
+        return self.cached(('max_story_shear', index.key),
+                           lambda: np.amax(np.abs(self.story_shear(index)), axis=0))
+
+    def story_deform(self, index: StoryMatIndex) -> np.ndarray:
+        """楼层变形（NPTS行N列），与楼层剪力组成各层并联材料的滞回曲线"""
+        return self.cached(('story_deform', index.key), lambda: index.story_deform(self.mat))
     
     @property
     def all_responses(self) -> tuple[np.ndarray, ...]:
         return self.t, self.base_a, self.base_v, self.base_u, self.base_V, self.aa, self.av, self.au, self.ra, self.rv, self.ru, self.resu, self.mat
 
-    def get_story_hysteresis(self, story_id: int) -> np.ndarray:
-        """获取楼层的滞回响应，
-        story_id从1到N，返回一个NPTS行2列的数组，表示楼层story_id的滞回响应
+    def get_response(self, name: str, story_id: int | None=None) -> np.ndarray:
+        """获取楼层响应，仅读取所需的列
+
+        Args:
+            name (str): 响应名，'ra'、'rv'、'ru'（相对响应）或'aa'、'av'、'au'（绝对响应）
+            story_id (int | None, optional): 楼层号（从1到N），为None时返回所有楼层. Defaults to None.
+
+        Returns:
+            np.ndarray: story_id为None时为NPTS行N列的数组，否则为长度NPTS的数组
+        """
+        col = slice(None) if story_id is None else story_id - 1
+        if name in ('aa', 'av', 'au') and story_id is not None:
+            value = Results.cache.get((self.cache_id, (name,)))
+            if value is not None:
+                return value[:, col]
+        if name in ('aa', 'av', 'au'):
+            base = getattr(self, f'base_{name[1]}')
+            value = np.asarray(self.data[f'r{name[1]}'][:, col])
+            if story_id is None:
+                base = base[:, np.newaxis]
+            return base + value
+        return np.asarray(self.data[name][:, col])
+
+    def get_mat_column(self, col_idx: int) -> np.ndarray:
+        """获取楼层滞回响应mat的第col_idx列（从0开始），仅读取该列"""
+        return np.asarray(self.data['mat'][:, col_idx])
+
+    def get_story_hysteresis(self, story_id: int, index: StoryMatIndex | None=None) -> np.ndarray:
+        """获取楼层的滞回响应（该层并联材料），仅读取该层的列，
+        story_id从1到N，返回一个NPTS行2列的数组（楼层剪力、楼层变形），
+        index为None时按每层一个材料处理
         """
-        row_idx = story_id - 1
-        return self.mat[:, 2 * row_idx: 2 * row_idx + 2]
+        F = self.get_story_shear(story_id, index)
+        if index is None:
+            col_idx = 2 * (story_id - 1)
+        else:
+            col_idx = 2 * index.story_ele[story_id - 1][-1]
+        return np.column_stack((F, self.get_mat_column(col_idx + 1)))
     
-    def get_story_shear(self, story_id: int) -> np.ndarray:
-        """获取楼层的剪力，
-        story_id从1到N，返回一个NPTS行1列的数组，表示楼层story_id的楼层剪力
+    def get_story_shear(self, story_id: int, index: StoryMatIndex | None=None) -> np.ndarray:
+        """获取楼层的剪力（该层各材料应力之和），仅读取该层的列，
+        story_id从1到N，返回一个长度NPTS的数组，index为None时按每层一个材料处理
         """
-        row_idx = story_id - 1
-        return self.mat[:, 2 * row_idx + 1]
+        value = Results.cache.get((self.cache_id, ('story_shear', index.key))) if index is not None else None
+        if value is not None:
+            return value[:, story_id - 1]
+        cols = [2 * (story_id - 1)] if index is None else index.stress_cols(story_id - 1)
+        F = np.zeros(self.NPTS)
+        for col_idx in cols:
+            F += self.get_mat_column(col_idx)
+        return F
     
     @classmethod
     def from_file(cls, gm_name: str, temp_path: str | Path):
@@ -91,6 +344,82 @@ class Results:
         resutls = cls(t, base_a, base_v, base_u, base_V, ra, rv, ru, mat)
         return resutls
 
+    @classmethod
+    def from_binary(cls, gm_name: str, temp_path: str | Path, mmap: bool=False):
+        """读取二进制计算结果（OpenSees `-binary` recorder或`to_binary`输出的.bin文件），
+        文件格式为逐行的float64数据，每行末尾附1个字节的换行符
+
+        Args:
+            gm_name (str): 地震动名
+            temp_path (str | Path): 临时文件夹路径
+            mmap (bool, optional): 是否以内存映射方式读取（不一次性读入内存）. Defaults to False.
+
+        Returns:
+            Results: 返回Results的实例
+        """
+        result_path = Path(temp_path) / 'temp_NLMDOF_results'
+        try:
+            file = result_path / f'{gm_name}_base_reaction.bin'
+            nrow = os.path.getsize(file) // _binary_dtype(2).itemsize  # 基底反力文件含时间与反力两列
+            base_reaction = _read_binary(file, nrow, mmap)
+            t = base_reaction[:, 0]  # 时间序列
+            base_V = base_reaction[:, 1]  # 基底反力
+            base_a = _read_binary(result_path / f'{gm_name}_base_acc.bin', nrow, mmap)[:, 0]  # 基底绝对加速度
+            base_v = _read_binary(result_path / f'{gm_name}_base_vel.bin', nrow, mmap)[:, 0]  # 基底绝对速度
+            base_u = _read_binary(result_path / f'{gm_name}_base_disp.bin', nrow, mmap)[:, 0]  # 基底绝对位移
+            ra = _read_binary(result_path / f'{gm_name}_floor_acc.bin', nrow, mmap)  # 楼层相对加速度
+            rv = _read_binary(result_path / f'{gm_name}_floor_vel.bin', nrow, mmap)  # 楼层相对速度
+            ru = _read_binary(result_path / f'{gm_name}_floor_disp.bin', nrow, mmap)  # 楼层相对位移
+            mat = _read_binary(result_path / f'{gm_name}_material.bin', nrow, mmap)  # 楼层滞回响应
+        except FileNotFoundError:
+            raise FileNotFoundError(f'【find_result】无法找到{gm_name}的计算结果！')
+        resutls = cls(t, base_a, base_v, base_u, base_V, ra, rv, ru, mat)
+        return resutls
+
+    @classmethod
+    def from_store(cls, gm_name: str, file: str | Path):
+        """从HDF5结果库读取计算结果（仅读取该条地震动的数据）
+
+        Args:
+            gm_name (str): 地震动名
+            file (str | Path): 结果库文件路径
+
+        Returns:
+            Results: 返回Results的实例
+        """
+        from core.result_store import ResultStore
+        with ResultStore(file) as store:
+            return store.read_results(gm_name)
+
+    @staticmethod
+    def binary_exists(gm_name: str, temp_path: str | Path) -> bool:
+        """判断是否存在二进制计算结果"""
+        return (Path(temp_path) / 'temp_NLMDOF_results' / f'{gm_name}_base_reaction.bin').exists()
+
+    @staticmethod
+    def remove_binary(gm_name: str, temp_path: str | Path):
+        """删除二进制计算结果（读取并写入结果库后调用）"""
+        result_path = Path(temp_path) / 'temp_NLMDOF_results'
+        for name in ['base_reaction', 'base_acc', 'base_vel', 'base_disp', 'floor_acc', 'floor_vel', 'floor_disp', 'material']:
+            (result_path / f'{gm_name}_{name}.bin').unlink(missing_ok=True)
+
+    def to_binary(self, gm_name: str, temp_path: str | Path):
+        """按OpenSees `-binary` recorder的格式输出结果文件，可由`from_binary`读取
+
+        Args:
+            gm_name (str): 地震动名
+            temp_path (str | Path): 临时文件夹路径
+        """
+        result_path = Path(temp_path) / 'temp_NLMDOF_results'
+        _write_binary(result_path / f'{gm_name}_base_reaction.bin', np.column_stack((self.t, self.base_V)))
+        _write_binary(result_path / f'{gm_name}_base_acc.bin', self.base_a)
+        _write_binary(result_path / f'{gm_name}_base_vel.bin', self.base_v)
+        _write_binary(result_path / f'{gm_name}_base_disp.bin', self.base_u)
+        _write_binary(result_path / f'{gm_name}_floor_acc.bin', self.ra)
+        _write_binary(result_path / f'{gm_name}_floor_vel.bin', self.rv)
+        _write_binary(result_path / f'{gm_name}_floor_disp.bin', self.ru)
+        _write_binary(result_path / f'{gm_name}_material.bin', self.mat)
+
 
 class ModeResults:
     def __init__(self,
@@ -137,3 +466,56 @@ class ModeResults:
             FileNotFoundError(f'【find_mode】无法找到模态结果！')
         mode_results = cls(T, mode)
         return mode_results
+
+    @classmethod
+    def from_store(cls, file: str | Path):
+        """从HDF5结果库读取模态结果
+
+        Args:
+            file (str | Path): 结果库文件路径
+
+        Returns:
+            ModeResults: 返回ModeResults的实例
+        """
+        from core.result_store import ResultStore
+        with ResultStore(file) as store:
+            return store.read_modes()
+
+
+if __name__ == '__main__':
+    # 对比文本结果与二进制结果的读取速度（用法：python Results.py [楼层数] [时间步数]）
+    import sys
+    import time
+    import tempfile
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    NPTS = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    rng = np.random.default_rng(0)
+    results = Results(np.arange(1, NPTS + 1) * 0.01, *rng.standard_normal((4, NPTS)),
+                      *rng.standard_normal((3, NPTS, N)), rng.standard_normal((NPTS, 2 * N)))
+    with tempfile.TemporaryDirectory() as temp_path:
+        result_path = Path(temp_path) / 'temp_NLMDOF_results'
+        result_path.mkdir()
+        np.savetxt(result_path / 'gm_base_reaction.txt', np.column_stack((results.t, results.base_V)))
+        np.savetxt(result_path / 'gm_base_acc.txt', results.base_a)
+        np.savetxt(result_path / 'gm_base_vel.txt', results.base_v)
+        np.savetxt(result_path / 'gm_base_disp.txt', results.base_u)
+        np.savetxt(result_path / 'gm_floor_acc.txt', results.ra)
+        np.savetxt(result_path / 'gm_floor_vel.txt', results.rv)
+        np.savetxt(result_path / 'gm_floor_disp.txt', results.ru)
+        np.savetxt(result_path / 'gm_material.txt', results.mat)
+        results.to_binary('gm', temp_path)
+        t0 = time.perf_counter()
+        results_txt = Results.from_file('gm', temp_path)
+        t1 = time.perf_counter()
+        results_bin = Results.from_binary('gm', temp_path)
+        t2 = time.perf_counter()
+        results_mmap = Results.from_binary('gm', temp_path, mmap=True)
+        t3 = time.perf_counter()
+        peak = np.max(np.abs(results_mmap.mat[:, 1::2]), axis=0)  # 仅读取所需的列
+        t4 = time.perf_counter()
+        assert np.array_equal(results_bin.mat, results.mat) and np.array_equal(results_txt.mat, results.mat)
+        print(f'楼层数：{N}，时间步数：{NPTS}')
+        print(f'from_file：{t1 - t0:.3f} s')
+        print(f'from_binary：{t2 - t1:.3f} s（{(t1 - t0) / (t2 - t1):.0f}倍）')
+        print(f'from_binary(mmap=True)：{t3 - t2:.4f} s，读取各层峰值剪力：{t4 - t3:.3f} s')
+        del results_mmap  # 释放内存映射后才能删除临时文件
@@ -1,5 +1,16 @@
 from .calc_relative_values import *
 from .resources_path import *
 from .run_OS import *
+from .materials import *
+from .run_NP import *
 from .Results import *
+from .xlsx_export import *
+from .txt_export import *
+from .parquet_export import *
+from .result_store import *
+from .project import *
+from .gm_io import *
+from .result_cache import *
+from .tcl_pool import *
+from .scratch import *
 from .emittingstream import *
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""无图形界面的批量时程分析
+
+用法：
+    python -m core.batch model.json records/ -o results.h5 --solver py -j 8
+    python -m core.batch model.json records/ -o results.h5 --solver tcl --opensees OpenSees.exe -j 4
+
+model.json为模型文件（见`core.Project`），records/为地震动文件夹（或多个地震动文件），
+计算结果逐条写入HDF5结果库（见`core.ResultStore`），可由图形界面或`ResultStore`读取。
+tcl求解器将地震动分为与进程数相同的组，每组由一个OpenSees进程运行一个批量脚本（见`core.tcl_pool.build_tcl_batch`）。
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from typing import Callable, Literal
+from multiprocessing import freeze_support
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from core.run_OS import run_OS_reuse, modes_OS_py, default_recorder
+from core.run_NP import run_NP, modes_NP
+from core.materials import check_NP_mat
+from core.Results import Results, ModeResults
+from core.tcl_pool import run_tcl_batch
+from core.result_store import ResultStore
+from core.result_cache import GMCache
+from core.project import Project, SETTING_OPTIONS, check_BW_mat
+from core.scratch import ScratchDir
+
+
+def run_project(
+        project: Project,
+        store_file: str | Path,
+        solver: Literal['py', 'np', 'tcl']='py',
+        workers: int | None=None,
+        temp_path: str | Path | None=None,
+        collapse_drift: float | list[float] | None=None,
+        opensees: str | None=None,
+        myprint: Callable[[str], None]=print
+    ) -> list[int]:
+    """计算所有地震动并写入结果库，不收敛的地震动继续计算后续地震动
+
+    Args:
+        project (Project): 模型与地震动
+        store_file (str | Path): 结果库文件路径（已存在时覆盖）
+        solver (Literal['py', 'np', 'tcl'], optional): 求解器，'py'为OpenSeesPy，'np'为NumPy，'tcl'为OpenSees.exe. Defaults to 'py'.
+        workers (int | None, optional): 进程数，默认为`project.worker_num`. Defaults to None.
+        temp_path (str | Path | None, optional): 临时文件夹的父文件夹，在其中新建本次计算的临时文件夹（见`ScratchDir`），
+        计算后删除，默认为系统临时文件夹. Defaults to None.
+        collapse_drift (float | list[float] | None, optional): 倒塌判定的层间位移限值(mm)，达到时提前终止分析（见`run_OS_py`）. Defaults to None.
+        opensees (str | None, optional): OpenSees求解器路径（tcl求解器）. Defaults to None.
+        myprint (Callable[[str], None], optional): 输出计算进度. Defaults to print.
+
+    Returns:
+        list[int]: 各条地震动的计算状态（1: 计算完成，0: 不收敛，2: 材料错误，3: 倒塌（提前终止））
+    """
+    project.check()
+    if solver == 'np':
+        mat_lib = [mat[3:] for mat in check_BW_mat(project.mat_lib)]
+        if not check_NP_mat(mat_lib):
+            raise ValueError('【run_project】NumPy求解器仅支持内置材料（不含退化的BoucWen模型）！')
+        if SETTING_OPTIONS[5][project.setting[5]] not in ['Newmark', 'HHT']:
+            raise ValueError('【run_project】NumPy求解器仅支持Newmark与HHT积分方法！')
+    if solver == 'tcl' and opensees is None:
+        raise ValueError('【run_project】tcl求解器需指定OpenSees求解器路径！')
+    run_func = run_NP if solver == 'np' else run_OS_reuse  # 同一进程中的地震动复用模型域
+    recorder = default_recorder(solver)
+    workers = max(1, min(workers or project.worker_num, project.gm_N))
+    scratch = ScratchDir(temp_path)  # 同时进行的多次计算互不覆盖临时文件
+    temp_path = scratch.path
+    gm_N = project.gm_N
+    done_list = [0] * gm_N
+    finished = 0
+    t_start = time.perf_counter()
+
+    def collect(i: int, done: int, results: Results | None):
+        nonlocal finished
+        done_list[i] = done
+        if results is None and done in [1, 3] and Results.binary_exists(project.gm_name[i], temp_path):
+            results = Results.from_binary(project.gm_name[i], temp_path)  # 读入内存后删除文件
+            Results.remove_binary(project.gm_name[i], temp_path)
+        if results is not None:
+            store.write_results(project.gm_name[i], results, done)
+        finished += 1
+        status = {1: '计算完成', 0: '不收敛', 2: '材料错误', 3: '倒塌'}.get(done, '计算出错')
+        if done == 3 and results is not None and len(results.t):
+            status += f'（{results.t[-1]:.2f} s时层间位移达到限值）'
+        myprint(f'({finished}/{gm_N}) {project.gm_name[i]}：{status}，已用时{time.perf_counter() - t_start:.1f} s')
+
+    try:
+        with ResultStore(store_file, 'w') as store:
+            if solver == 'tcl':
+                run_tcl(project, store, temp_path, workers, opensees, collapse_drift, collect, myprint)
+            else:
+                # 模态分析只进行一次，各条地震动不再输出周期与振型文件
+                modes_func = modes_NP if solver == 'np' else modes_OS_py
+                N, m, mat_lib, story_mat, *_ = project.py_args(0, temp_path)
+                try:
+                    store.write_modes(modes_func(N, m, mat_lib, story_mat, project.mode_num))
+                except Exception as e:
+                    myprint(f'模态分析出错：{e}')
+                if workers == 1:
+                    for i in range(gm_N):
+                        done, _, _, results = run_func(*project.py_args(i, temp_path), record_mode=False, recorder=recorder,
+                                                       collapse_drift=collapse_drift)
+                        collect(i, done, results)
+                else:
+                    myprint(f'并行计算，进程数：{workers}')
+                    with ProcessPoolExecutor(max_workers=workers) as executor:
+                        pending = {}
+                        def collect_done(futures):
+                            for future in futures:
+                                i = pending.pop(future)
+                                try:
+                                    done, _, _, results = future.result()
+                                except Exception as e:
+                                    myprint(f'{project.gm_name[i]}计算出错：{e}')
+                                    done, results = -1, None
+                                collect(i, done, results)
+                        for i in range(gm_N):
+                            if len(pending) >= 2 * workers:  # 限制等待计算的地震动数量，以限制内存占用
+                                collect_done(wait(pending, return_when=FIRST_COMPLETED).done)
+                            future = executor.submit(run_func, *project.py_args(i, temp_path), record_mode=False, recorder=recorder,
+                                                     collapse_drift=collapse_drift)
+                            pending[future] = i
+                        collect_done(wait(pending).done)
+    finally:
+        scratch.cleanup()
+    n_done = done_list.count(1)
+    n_collapsed = done_list.count(3)
+    myprint(f'全部计算完成，{n_done}/{gm_N}条地震动计算完成，{n_collapsed}条倒塌，用时{time.perf_counter() - t_start:.1f} s，结果已保存至：{store_file}')
+    return done_list
+
+
+def run_tcl(
+        project: Project,
+        store: ResultStore,
+        temp_path: str,
+        workers: int,
+        opensees: str,
+        collapse_drift: float | list[float] | None,
+        collect: Callable[[int, int, Results | None], None],
+        myprint: Callable[[str], None]=print
+    ):
+    """tcl求解器：每个进程运行一个批量脚本（见`core.tcl_pool.run_tcl_batch`），读取结果文件后写入结果库"""
+    result_path = Path(temp_path) / 'temp_NLMDOF_results'
+    gm_cache = GMCache()  # 地震动时程文件在多次计算间共用
+    jobs = []
+    for i in range(project.gm_N):
+        args = project.py_args(i, temp_path)
+        jobs.append((i, i == 0, args, gm_cache.file(args[4])))  # 周期与振型文件仅由第1条地震动输出
+    myprint(f'OpenSees进程数：{workers}')
+    for i, done in run_tcl_batch(opensees, jobs, workers, temp_path, collapse_drift=collapse_drift,
+                                 myprint=myprint):
+        results = None
+        if done in [1, 3]:
+            try:
+                results = Results.from_file(project.gm_name[i], temp_path)
+            except (OSError, ValueError) as e:
+                myprint(f'{project.gm_name[i]}读取结果文件出错：{e}')
+                done = -1
+        collect(i, done, results)
+    if (result_path / 'Periods.txt').exists():
+        store.write_modes(ModeResults.from_file(project.mode_num, temp_path))
+
+
+def main(argv: list[str] | None=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m core.batch', description='无图形界面的批量非线性时程分析')
+    parser.add_argument('model', help='模型文件（json）')
+    parser.add_argument('records', nargs='+', help='地震动文件或文件夹')
+    parser.add_argument('-o', '--output', default='NLMDOF_results.h5', help='结果库文件路径（默认：NLMDOF_results.h5）')
+    parser.add_argument('--solver', choices=['py', 'np', 'tcl'], default='py', help='求解器，py: OpenSeesPy，np: NumPy，tcl: OpenSees.exe（默认：py）')
+    parser.add_argument('--opensees', default=None, help='OpenSees求解器路径（tcl求解器）')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='并行计算进程数（默认：模型文件中的worker_num）')
+    parser.add_argument('--pattern', default='*', help='地震动文件夹中文件名的匹配模式（默认：*）')
+    parser.add_argument('--dt', type=float, default=None, help='单列加速度文件的步长')
+    parser.add_argument('--skip-rows', type=int, default=0, help='地震动文件跳过的行数（默认：0）')
+    parser.add_argument('--unit', choices=['g', 'mm/s^2', 'cm/s^2', 'm/s^2'], default='g', help='地震动单位（默认：g）')
+    parser.add_argument('--temp', default=None, help='临时文件夹的父文件夹（默认为系统临时文件夹，计算后删除本次计算的临时文件夹）')
+    parser.add_argument('--collapse-drift', type=float, nargs='+', default=None,
+                        help='倒塌判定的层间位移限值(mm)，输入一个值时各层相同，达到时提前终止分析')
+    args = parser.parse_args(argv)
+    project = Project.from_json(args.model)
+    for path in map(Path, args.records):
+        files = sorted(file for file in path.glob(args.pattern) if file.is_file()) if path.is_dir() else [path]
+        for file in files:
+            project.load_record(file, args.dt, args.skip_rows, args.unit)
+    if not project.gm_N:
+        print('【core.batch】未找到地震动文件！')
+        return 1
+    print(f'【core.batch】共{project.gm_N}条地震动')
+    collapse_drift = args.collapse_drift
+    if collapse_drift is not None and len(collapse_drift) == 1:
+        collapse_drift = collapse_drift[0]
+    done_list = run_project(project, args.output, args.solver, args.workers, args.temp, collapse_drift, args.opensees,
+                            myprint=lambda text: print(f'【core.batch】{text}'))
+    return 0 if all(done in [1, 3] for done in done_list) else 1
+
+
+if __name__ == '__main__':
+    freeze_support()
+    sys.exit(main())
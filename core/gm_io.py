@@ -0,0 +1,131 @@
+"""地震动文件读取
+
+支持三种格式：
+1. PEER NGA数据库的.AT2文件（4行文件头，第4行含NPTS与DT，之后每行若干个加速度值，单位为g）；
+2. 时间&加速度两列（时间序列须单调递增且非负）；
+3. 单列加速度（需指定步长，每行有多个值时按行展开）。
+数值由numpy的C实现一次性解析为float（两列数据用`np.loadtxt(dtype=float)`，每行个数不定的数据用`np.fromstring`），时间序列以数组运算检查。
+批量导入时由线程池读取（见`read_gm_files`），文件读取时各线程并行。
+"""
+import re
+import warnings
+from pathlib import Path
+from typing import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+
+AT2_HEADER = re.compile(r'NPTS\s*=\s*(\d+)\s*,?\s*DT\s*=\s*([-+.\dEe]+)', re.IGNORECASE)  # NPTS=  5590, DT=   .0050 SEC
+AT2_HEADER_OLD = re.compile(r'^\s*(\d+)\s+([-+.\dEe]+)\s+NPTS\s*,?\s*DT', re.IGNORECASE)  # 4000   .0100    NPTS, DT
+
+
+def _parse_AT2_header(line: str) -> tuple[int, float] | None:
+    """解析.AT2文件第4行的NPTS与DT，不是.AT2文件头时返回None"""
+    match = AT2_HEADER.search(line) or AT2_HEADER_OLD.search(line)
+    if match is None:
+        return None
+    return int(match.group(1)), float(match.group(2))
+
+
+def _read_values(path: Path, skip_rows: int) -> np.ndarray:
+    """跳过skip_rows行后，读取以空白分隔的全部数值（各行数值个数可不同）"""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        lines = f.read().split('\n', skip_rows)
+    text = lines[skip_rows] if len(lines) > skip_rows else ''
+    if not text.strip():
+        return np.array([])  # np.fromstring对仅含空白的字符串返回[-1.]
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)  # 旧版numpy遇到非数字时仅警告
+        return np.fromstring(text, sep=' ')
+
+
+def _n_columns(path: Path, skip_rows: int) -> int:
+    """跳过skip_rows行后，第一个非空行的数值个数"""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for i, line in enumerate(f):
+            if i >= skip_rows and line.strip():
+                return len(line.split())
+    return 0
+
+
+def read_gm(
+        path: str | Path,
+        dt: float | None=None,
+        skip_rows: int=0,
+        single_column: bool | None=False
+    ) -> tuple[np.ndarray, float, np.ndarray]:
+    """读取地震动文件（.AT2文件按文件头读取，忽略其余参数）
+
+    Args:
+        path (str | Path): 地震动文件路径
+        dt (float | None, optional): 单列加速度的步长. Defaults to None.
+        skip_rows (int, optional): 跳过的行数. Defaults to 0.
+        single_column (bool | None, optional): 是否为单列加速度，否则为时间&加速度两列，为None时按第一个数据行的列数判断. Defaults to False.
+
+    Returns:
+        tuple[np.ndarray, float, np.ndarray]: 加速度、步长与时间序列（格式错误时抛出ValueError）
+    """
+    path = Path(path)
+    with open(path, encoding='utf-8', errors='replace') as f:
+        head = [f.readline() for _ in range(4)]
+    header = _parse_AT2_header(head[3])
+    if header is not None:
+        NPTS, dt = header
+        if NPTS == 0 or dt <= 0:
+            raise ValueError(f'【read_gm】"{path}"的文件头中NPTS或DT有误！')
+        th = _read_values(path, 4)  # 跳过4行文件头
+        if len(th) < NPTS:
+            raise ValueError(f'【read_gm】"{path}"的数据点数（{len(th)}）少于文件头中的NPTS（{NPTS}）！')
+        return th[:NPTS], dt, np.arange(NPTS) * dt
+    if single_column is None:
+        single_column = _n_columns(path, skip_rows) == 1
+    if single_column:
+        th = _read_values(path, skip_rows)
+        if len(th) == 0:
+            raise ValueError(f'【read_gm】"{path}"数据为空！')
+        if dt is None:
+            raise ValueError(f'【read_gm】"{path}"为单列加速度，需指定步长！')
+        return th, dt, np.linspace(0, (len(th) - 1) * dt, len(th))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', UserWarning)  # 空文件的警告，下面统一处理
+        data = np.loadtxt(path, dtype=float, encoding='utf-8', skiprows=skip_rows, ndmin=2)
+    if data.size == 0:
+        raise ValueError(f'【read_gm】"{path}"数据为空！')
+    if data.shape[1] < 2 or len(data) < 2:
+        raise ValueError(f'【read_gm】"{path}"不是时间&加速度两列数据！')
+    t, th = data[:, 0], data[:, 1]
+    if np.any(np.diff(t) <= 0):
+        raise ValueError(f'【read_gm】"{path}"的时间序列不是单调递增的！')
+    if np.any(t < 0):
+        raise ValueError(f'【read_gm】"{path}"的时间序列存在负数！')
+    return th, t[1] - t[0], t
+
+
+def read_gm_files(
+        paths: list[str | Path],
+        dt: float | None=None,
+        skip_rows: int=0,
+        single_column: bool | None=False,
+        workers: int | None=None
+    ) -> Iterator[tuple[int, tuple[np.ndarray, float, np.ndarray] | Exception]]:
+    """由线程池读取多个地震动文件，按完成顺序返回(序号, `read_gm`的返回值或读取时的异常)
+
+    提前停止迭代（如取消导入）时，尚未开始读取的文件不再读取。
+
+    Args:
+        paths (list[str | Path]): 地震动文件路径
+        dt, skip_rows, single_column: 见`read_gm`
+        workers (int | None, optional): 线程数，为None时使用`ThreadPoolExecutor`的默认值. Defaults to None.
+    """
+    executor = ThreadPoolExecutor(workers)
+    try:
+        futures = {executor.submit(read_gm, path, dt, skip_rows, single_column): i for i, path in enumerate(paths)}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except (OSError, ValueError, UnicodeDecodeError) as e:
+                result = e
+            yield futures[future], result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
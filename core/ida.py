@@ -0,0 +1,292 @@
+"""增量动力分析（IDA）
+
+用法：
+    python -m core.ida model.json records/ --drift-limit 0.1 --heights 3000 -o ida.npz -j 8
+
+每条地震动按hunt & fill算法（Vamvatsikos & Cornell, 2004）确定调幅系数：
+1. hunt：强度指标（IM）按逐级增大的步长递增，直至倒塌（最大层间位移（角）达到限值或不收敛，
+   达到限值时即提前终止该次分析）；
+2. bracket：在最后一个未倒塌点与首个倒塌点之间二分，直至区间小于容差；
+3. fill：在未倒塌点之间最大的间隔处补充计算，直至达到最大计算次数。
+模态分析仅进行一次，所有地震动及调幅等级均复用其周期；同一地震动的各调幅等级复用同一模型域（见`OpenSeesSession`）。
+"""
+import sys
+import time
+import argparse
+from math import pi
+from pathlib import Path
+from typing import Callable, Literal
+from multiprocessing import freeze_support
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy.signal import cont2discrete, lfilter
+
+from core.run_OS import OpenSeesSession, eigen_OS_py
+from core.project import Project
+from core.scratch import ScratchDir
+
+
+def spectral_acceleration(th: np.ndarray, dt: float, T: float, zeta: float=0.05) -> float:
+    """弹性单自由度体系的拟加速度反应谱值（单位与th相同），
+    按加速度分段线性的精确解（一阶保持离散化）计算
+    """
+    omg = 2 * pi / T
+    num, den, _ = cont2discrete(([-1], [1, 2 * zeta * omg, omg ** 2]), dt, method='foh')
+    u = lfilter(np.ravel(num), den, np.asarray(th, dtype=float))
+    return omg ** 2 * float(np.max(np.abs(u)))
+
+
+def intensity_measure(th: np.ndarray, dt: float, im: Literal['PGA', 'Sa(T1)'], T1: float) -> float:
+    """地震动的强度指标（单位与th相同）"""
+    if im == 'PGA':
+        return float(np.max(np.abs(th)))
+    elif im == 'Sa(T1)':
+        return spectral_acceleration(th, dt, T1)
+    raise ValueError(f'【intensity_measure】未知的强度指标：{im}')
+
+
+class IDACurve:
+    """单条地震动的IDA曲线
+
+    im、edp、SF、collapsed为按IM排序的各次计算的强度指标(g)、工程需求参数（各楼层最大层间位移（角）
+    的最大值，倒塌时为inf）、地震动放大倍数与是否倒塌。
+    """
+    def __init__(self, gm_name: str, im0: float):
+        """
+        Args:
+            gm_name (str): 地震动名
+            im0 (float): 原始地震动的强度指标(g)
+        """
+        self.gm_name = gm_name
+        self.im0 = im0
+        self.im = np.array([])
+        self.edp = np.array([])
+        self.SF = np.array([])
+        self.collapsed = np.array([], dtype=bool)
+        self.n_runs = 0  # 计算次数
+
+    def add(self, im: float, edp: float, SF: float, collapsed: bool):
+        idx = np.searchsorted(self.im, im)
+        self.im = np.insert(self.im, idx, im)
+        self.edp = np.insert(self.edp, idx, edp)
+        self.SF = np.insert(self.SF, idx, SF)
+        self.collapsed = np.insert(self.collapsed, idx, collapsed)
+        self.n_runs += 1
+
+    @property
+    def collapse_im(self) -> float:
+        """首个倒塌点的IM（未倒塌时为inf）"""
+        return float(self.im[self.collapsed][0]) if self.collapsed.any() else np.inf
+
+    @property
+    def capacity(self) -> float:
+        """倒塌能力，即首个倒塌点以下最大的IM"""
+        below = self.im[~self.collapsed & (self.im < self.collapse_im)]
+        return float(below[-1]) if len(below) else 0.0
+
+    def edp_at(self, im: np.ndarray) -> np.ndarray:
+        """在给定IM处线性插值的EDP（IM = 0时EDP = 0）
+
+        超过倒塌能力时为inf；未出现倒塌点时，超过已计算的最大IM处没有结果，为nan。
+        """
+        mask = ~self.collapsed & (self.im < self.collapse_im)
+        x = np.concatenate([[0], self.im[mask]])
+        y = np.concatenate([[0], self.edp[mask]])
+        im = np.asarray(im, dtype=float)
+        above = np.inf if np.isfinite(self.collapse_im) else np.nan
+        return np.where(im > self.capacity, above, np.interp(im, x, y))
+
+
+def trace_ida(
+        args: tuple,
+        im0: float,
+        periods: list[float],
+        drift_limit: float,
+        heights: list[float] | None=None,
+        im_start: float=0.1,
+        im_step: float=0.1,
+        step_increase: float=0.05,
+        tol: float=0.05,
+        max_runs: int=12
+    ) -> IDACurve:
+    """单条地震动的hunt & fill调幅计算（可在子进程中运行）
+
+    Args:
+        args (tuple): 调用`run_OS_py`所需的参数（见`core.get_py_args`），按IM调幅时修改其中的SF
+        im0 (float): 原始地震动的强度指标(g)
+        periods (list[float]): 周期（见`eigen_OS_py`）
+        drift_limit (float): 倒塌限值，heights为None时为层间位移(mm)，否则为层间位移角
+        heights (list[float] | None, optional): 各层层高(mm). Defaults to None.
+        im_start (float, optional): hunt的初始IM(g). Defaults to 0.1.
+        im_step (float, optional): hunt的初始步长(g). Defaults to 0.1.
+        step_increase (float, optional): hunt每步步长的增量(g). Defaults to 0.05.
+        tol (float, optional): 倒塌能力的容差及fill的最小间隔(g). Defaults to 0.05.
+        max_runs (int, optional): 最大计算次数. Defaults to 12.
+
+    Returns:
+        IDACurve: IDA曲线
+    """
+    args = list(args)
+    SF0 = args[5]
+    heights = np.ones(args[0]) if heights is None else np.asarray(heights, dtype=float)
+    curve = IDACurve(args[13], im0)
+
+    try:
+        session = OpenSeesSession(*args[:4], *args[7:13], args[14], args[15], periods=periods)
+    except Exception as e:
+        raise ValueError('【trace_ida】材料参数不正确！') from e
+
+    def run(im: float) -> bool:
+        args[5] = SF0 * im / im0
+        # 层间位移达到限值时提前终止分析（done为3）
+        done, results = session.run(args[4], args[5], args[6], args[13], recorder='memory',
+                                    collapse_drift=drift_limit * heights)
+        collapsed = done != 1
+        edp = np.inf if collapsed else float(np.max(results.max_drift / heights))
+        curve.add(im, edp, args[5], collapsed)
+        return collapsed
+
+    with session:
+        # hunt
+        im, step, lo, hi = im_start, im_step, 0.0, None
+        while curve.n_runs < max_runs:
+            if run(im):
+                hi = im
+                break
+            lo = im
+            im += step
+            step += step_increase
+        # bracket
+        while hi is not None and hi - lo > tol and curve.n_runs < max_runs:
+            im = (lo + hi) / 2
+            if run(im):
+                hi = im
+            else:
+                lo = im
+        # fill
+        while curve.n_runs < max_runs:
+            points = np.concatenate([[0], curve.im[curve.im < curve.collapse_im], [curve.collapse_im]])
+            if not np.isfinite(points[-1]):
+                points = points[:-1]
+            gaps = np.diff(points)
+            if not len(gaps) or gaps.max() <= tol:
+                break
+            k = int(np.argmax(gaps))
+            run((points[k] + points[k + 1]) / 2)
+    return curve
+
+
+def run_ida(
+        project: Project,
+        drift_limit: float,
+        heights: list[float] | None=None,
+        im: Literal['PGA', 'Sa(T1)']='Sa(T1)',
+        im_start: float=0.1,
+        im_step: float=0.1,
+        step_increase: float=0.05,
+        tol: float=0.05,
+        max_runs: int=12,
+        workers: int | None=None,
+        temp_path: str | Path | None=None,
+        myprint: Callable[[str], None]=print
+    ) -> list[IDACurve]:
+    """对所有地震动进行IDA，各条地震动分发至进程池并行计算（参数见`trace_ida`）
+
+    Args:
+        project (Project): 模型与地震动
+        im (Literal['PGA', 'Sa(T1)'], optional): 强度指标，Sa(T1)为5%阻尼比的拟加速度谱值. Defaults to 'Sa(T1)'.
+        workers (int | None, optional): 进程数，默认为`project.worker_num`. Defaults to None.
+        temp_path (str | Path | None, optional): 临时文件夹的父文件夹（见`ScratchDir`），默认为系统临时文件夹. Defaults to None.
+        myprint (Callable[[str], None], optional): 输出计算进度. Defaults to print.
+
+    Returns:
+        list[IDACurve]: 各条地震动的IDA曲线
+    """
+    project.check()
+    with ScratchDir(temp_path) as scratch:  # 同时进行的多次计算互不覆盖临时文件
+        args = [project.py_args(i, scratch.path) for i in range(project.gm_N)]
+        periods = eigen_OS_py(*args[0][:4], project.mode_num)
+        myprint(f'周期：{", ".join(f"{T:.4f}" for T in periods)} s')
+        kwargs = dict(drift_limit=drift_limit, heights=heights, im_start=im_start, im_step=im_step,
+                      step_increase=step_increase, tol=tol, max_runs=max_runs)
+        im0 = []
+        for arg in args:
+            th, SF, dt = np.asarray(arg[4]), arg[5], arg[6]
+            im0.append(intensity_measure(th * SF, dt, im, periods[0]))
+            if im0[-1] == 0:
+                raise ValueError(f'【run_ida】地震动{arg[13]}的强度指标为0！')
+        workers = max(1, min(workers or project.worker_num, project.gm_N))
+        curves: list[IDACurve] = [None] * project.gm_N
+        t_start = time.perf_counter()
+        def collect(i: int, curve: IDACurve):
+            curves[i] = curve
+            finished = sum(curve is not None for curve in curves)
+            myprint(f'({finished}/{project.gm_N}) {curve.gm_name}：计算{curve.n_runs}次，'
+                    f'倒塌能力{curve.capacity:.3f} g，已用时{time.perf_counter() - t_start:.1f} s')
+        if workers == 1:
+            for i in range(project.gm_N):
+                collect(i, trace_ida(args[i], im0[i], periods, **kwargs))
+        else:
+            myprint(f'并行计算，进程数：{workers}')
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(trace_ida, args[i], im0[i], periods, **kwargs): i for i in range(project.gm_N)}
+                for future in as_completed(futures):
+                    collect(futures[future], future.result())
+    return curves
+
+
+def save_curves(file: str | Path, curves: list[IDACurve]):
+    """将IDA曲线保存为npz文件，各数组为(地震动数, 最大计算次数)，不足处以nan补齐"""
+    n = max(curve.n_runs for curve in curves)
+    def pad(name: str) -> np.ndarray:
+        data = np.full((len(curves), n), np.nan)
+        for i, curve in enumerate(curves):
+            data[i, :curve.n_runs] = getattr(curve, name)
+        return data
+    np.savez(file, gm_name=np.array([curve.gm_name for curve in curves]), im0=np.array([curve.im0 for curve in curves]),
+             im=pad('im'), edp=pad('edp'), SF=pad('SF'), collapsed=pad('collapsed'),
+             capacity=np.array([curve.capacity for curve in curves]))
+
+
+def main(argv: list[str] | None=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m core.ida', description='增量动力分析（hunt & fill）')
+    parser.add_argument('model', help='模型文件（json）')
+    parser.add_argument('records', nargs='+', help='地震动文件或文件夹')
+    parser.add_argument('--drift-limit', type=float, required=True, help='倒塌限值，未指定层高时为层间位移(mm)，否则为层间位移角')
+    parser.add_argument('--heights', type=float, nargs='+', default=None, help='各层层高(mm)，仅输入一个值时各层相同')
+    parser.add_argument('--im', choices=['PGA', 'Sa(T1)'], default='Sa(T1)', help='强度指标（默认：Sa(T1)）')
+    parser.add_argument('--im-start', type=float, default=0.1, help='初始IM(g)（默认：0.1）')
+    parser.add_argument('--im-step', type=float, default=0.1, help='初始步长(g)（默认：0.1）')
+    parser.add_argument('--step-increase', type=float, default=0.05, help='每步步长的增量(g)（默认：0.05）')
+    parser.add_argument('--tol', type=float, default=0.05, help='倒塌能力的容差(g)（默认：0.05）')
+    parser.add_argument('--max-runs', type=int, default=12, help='每条地震动的最大计算次数（默认：12）')
+    parser.add_argument('-o', '--output', default='NLMDOF_ida.npz', help='IDA曲线文件路径（默认：NLMDOF_ida.npz）')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='并行计算进程数（默认：模型文件中的worker_num）')
+    parser.add_argument('--pattern', default='*', help='地震动文件夹中文件名的匹配模式（默认：*）')
+    parser.add_argument('--dt', type=float, default=None, help='单列加速度文件的步长')
+    parser.add_argument('--skip-rows', type=int, default=0, help='地震动文件跳过的行数（默认：0）')
+    parser.add_argument('--unit', choices=['g', 'mm/s^2', 'cm/s^2', 'm/s^2'], default='g', help='地震动单位（默认：g）')
+    args = parser.parse_args(argv)
+    project = Project.from_json(args.model)
+    for path in map(Path, args.records):
+        files = sorted(file for file in path.glob(args.pattern) if file.is_file()) if path.is_dir() else [path]
+        for file in files:
+            project.load_record(file, args.dt, args.skip_rows, args.unit)
+    if not project.gm_N:
+        print('【core.ida】未找到地震动文件！')
+        return 1
+    heights = args.heights
+    if heights is not None and len(heights) == 1:
+        heights = heights * project.N
+    print(f'【core.ida】共{project.gm_N}条地震动')
+    curves = run_ida(project, args.drift_limit, heights, args.im, args.im_start, args.im_step, args.step_increase,
+                     args.tol, args.max_runs, args.workers, myprint=lambda text: print(f'【core.ida】{text}'))
+    save_curves(args.output, curves)
+    print(f'【core.ida】IDA曲线已保存至：{args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    freeze_support()
+    sys.exit(main())
@@ -0,0 +1,184 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+EPS = np.finfo(float).eps
+
+
+class UniaxialMaterial(ABC):
+    """向量化单轴材料，与OpenSees同名材料的状态更新算法一致
+
+    材料参数为形状(n,)的数组（n为使用该材料的单元数量），
+    状态数组的形状为(..., n)，前面的维度可用于多条地震动同时计算。
+    """
+    n_para = 0  # 材料参数个数（不含材料编号）
+    has_damp_tangent = False  # 是否提供阻尼切线（黏性材料）
+
+    def __init__(self, para: np.ndarray):
+        self.para = np.asarray(para, dtype=float)  # (n_para, n)
+        self.stress = None  # 试探应力
+        self.tangent = None  # 试探切线刚度
+        self.damp_tangent = None  # 试探阻尼切线（仅黏性材料非零）
+
+    @abstractmethod
+    def initial_tangent(self) -> np.ndarray:
+        """初始切线刚度"""
+
+    def revert_to_start(self, shape: tuple):
+        """初始化状态数组"""
+        self.c_strain = np.zeros(shape)  # 已提交应变
+        self.c_stress = np.zeros(shape)  # 已提交应力
+        self.strain = np.zeros(shape)
+        self.stress = np.zeros(shape)
+        self.tangent = np.zeros(shape) + self.initial_tangent()
+        self.damp_tangent = np.zeros(shape)
+
+    @abstractmethod
+    def set_trial(self, strain: np.ndarray, rate: np.ndarray | None):
+        """更新试探状态，rate仅在has_damp_tangent为True时传入"""
+
+    def commit(self, mask: np.ndarray | None=None):
+        """提交试探状态，mask（可广播至状态数组的形状）不为None时仅提交其为True的部分"""
+        self.c_strain = _commit(self.c_strain, self.strain, mask)
+        self.c_stress = _commit(self.c_stress, self.stress, mask)
+
+
+class Elastic(UniaxialMaterial):
+    """线弹性模型：Elastic tag E"""
+    n_para = 1
+
+    def initial_tangent(self):
+        return self.para[0]
+
+    def set_trial(self, strain, rate):
+        E = self.para[0]
+        self.strain = strain
+        self.stress = E * strain
+        self.tangent = np.zeros(strain.shape) + E
+
+
+class Steel01(UniaxialMaterial):
+    """双线性随动强化模型：Steel01 tag Fy E0 b（不含等向强化参数）"""
+    n_para = 3
+
+    def __init__(self, para):
+        super().__init__(para)
+        Fy, E0, b = self.para
+        self.Esh = b * E0  # 强化段刚度
+        self.fy_one_minus_b = Fy * (1.0 - b)
+
+    def initial_tangent(self):
+        return self.para[1]
+
+    def set_trial(self, strain, rate):
+        E0, Esh, fy_one_minus_b = self.para[1], self.Esh, self.fy_one_minus_b
+        c = self.c_stress + E0 * (strain - self.c_strain)  # 弹性试探应力
+        c1 = Esh * strain
+        stress = np.minimum(c, c1 + fy_one_minus_b)
+        stress = np.maximum(stress, c1 - fy_one_minus_b)
+        self.strain = strain
+        self.stress = stress
+        self.tangent = np.where(np.abs(stress - c) < EPS, E0, Esh)
+
+
+class BoucWen(UniaxialMaterial):
+    """Bouc-Wen模型：BoucWen tag alpha ko n gamma beta Ao deltaA deltaNu deltaEta
+    （仅支持deltaA = deltaNu = deltaEta = 0，即不考虑退化）
+    """
+    n_para = 9
+    tolerance = 1e-8
+    max_iter = 20
+
+    def initial_tangent(self):
+        alpha, ko, _, _, _, Ao = self.para[:6]
+        return alpha * ko + (1 - alpha) * ko * Ao
+
+    def revert_to_start(self, shape):
+        super().revert_to_start(shape)
+        self.c_z = np.zeros(shape)  # 已提交滞变位移
+        self.z = np.zeros(shape)
+
+    def set_trial(self, strain, rate):
+        alpha, ko, n, gamma, beta, Ao = self.para[:6]
+        d_strain = strain - self.c_strain
+        # Newton法求解z，初值与OpenSees一致，各单元分别判断收敛（已收敛的单元不再更新）
+        z = np.full(strain.shape, 0.01)
+        iterating = np.ones(strain.shape, dtype=bool)
+        count = 0
+        while iterating.any() and count < self.max_iter:
+            psi = gamma + beta * np.sign(d_strain * z)
+            abs_z = np.abs(z)
+            phi = Ao - abs_z ** n * psi
+            f = z - self.c_z - phi * d_strain
+            pow1 = np.where(z == 0, 0, abs_z ** (n - 1))
+            phi_ = -n * pow1 * np.sign(z) * psi
+            f_ = 1 - phi_ * d_strain
+            z_new = z - f / f_
+            z_old = z
+            z = np.where(iterating, z_new, z)
+            iterating &= np.abs(z_old - z_new) > self.tolerance
+            count += 1
+        psi = gamma + beta * np.sign(d_strain * z)
+        abs_z = np.abs(z)
+        phi = Ao - abs_z ** n * psi
+        phi_ = -n * np.where(z == 0, 0, abs_z ** (n - 1)) * np.sign(z) * psi
+        z_dot = phi / (1 - phi_ * d_strain)  # dz/dε
+        self.z = z
+        self.strain = strain
+        self.stress = alpha * ko * strain + (1 - alpha) * ko * z
+        self.tangent = alpha * ko + (1 - alpha) * ko * z_dot
+
+    def commit(self, mask=None):
+        super().commit(mask)
+        self.c_z = _commit(self.c_z, self.z, mask)
+
+
+class Viscous(UniaxialMaterial):
+    """黏性模型：Viscous tag C alpha"""
+    n_para = 2
+    has_damp_tangent = True
+    min_vel = 1e-11
+
+    def initial_tangent(self):
+        return np.zeros_like(self.para[0])
+
+    def set_trial(self, strain, rate):
+        C, alpha = self.para
+        self.strain = strain
+        self.stress = np.sign(rate) * C * np.abs(rate) ** alpha
+        self.tangent = np.zeros(strain.shape)
+        abs_rate = np.maximum(np.abs(rate), self.min_vel)
+        self.damp_tangent = alpha * C * abs_rate ** (alpha - 1)
+
+
+def _commit(committed: np.ndarray, trial: np.ndarray, mask: np.ndarray | None) -> np.ndarray:
+    return trial.copy() if mask is None else np.where(mask, trial, committed)
+
+
+MATERIALS: dict[str, type[UniaxialMaterial]] = {
+    'Elastic': Elastic,
+    'Steel01': Steel01,
+    'BoucWen': BoucWen,
+    'Viscous': Viscous,
+}
+
+
+def check_NP_mat(mat_lib: list[list]) -> bool:
+    """判断材料库中的材料是否均可由NumPy求解器计算
+
+    Args:
+        mat_lib (list[list]): 材料库（不含备注名等前三项，如['Steel01', 1, 235, 206000, 0.02]）
+
+    Returns:
+        bool: 是否均为支持的材料
+    """
+    for mat in mat_lib:
+        mat_type = MATERIALS.get(mat[0])
+        if mat_type is None or len(mat) != mat_type.n_para + 2:
+            return False
+        if not all(isinstance(para, (int, float)) for para in mat[2:]):
+            return False
+        if mat_type is BoucWen and any(mat[-3:]):
+            return False  # 不支持考虑退化的BoucWen模型
+    return True
@@ -0,0 +1,179 @@
+import json
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from core.Results import Results, StoryMatIndex
+
+
+class ParquetExporter:
+    """以列式存储（Parquet）导出计算结果，供后续统计分析（如易损性分析）直接查询
+
+    每个响应量一个文件`{name}.parquet`，为长表格式：record（地震动名）、story（楼层，
+    底部响应为0）、time（时间）、value（响应值），同一地震动的数据按楼层、时间排序，
+    作为一个行组写入，无需将所有地震动的结果同时读入内存。
+    `summary.parquet`为各地震动、各楼层的工程需求参数（EDP）峰值。
+    各文件的单位记录于schema的元数据中。
+    """
+    # 响应量名称: (单位, 响应的计算函数)
+    QUANTITIES: dict[str, tuple[str, Callable[[Results, StoryMatIndex, float], np.ndarray]]] = {
+        'base_a': ('g', lambda results, index, g: results.base_a / g),
+        'base_V': ('kN', lambda results, index, g: results.base_V / 1000),
+        'ru': ('mm', lambda results, index, g: results.ru),
+        'rv': ('mm/s', lambda results, index, g: results.rv),
+        'ra': ('g', lambda results, index, g: results.ra / g),
+        'au': ('mm', lambda results, index, g: results.au),
+        'av': ('mm/s', lambda results, index, g: results.av),
+        'aa': ('g', lambda results, index, g: results.aa / g),
+        'drift': ('mm', lambda results, index, g: results.drift),
+        'story_shear': ('kN', lambda results, index, g: results.story_shear(index) / 1000),
+        'story_deform': ('mm', lambda results, index, g: results.story_deform(index)),
+    }
+    # EDP峰值名称: (单位, 各楼层峰值的计算函数)
+    SUMMARY: dict[str, tuple[str, Callable[[Results, StoryMatIndex, float], np.ndarray]]] = {
+        'max_drift': ('mm', lambda results, index, g: results.max_drift),
+        'res_drift': ('mm', lambda results, index, g: results.res_drift),
+        'max_ru': ('mm', lambda results, index, g: np.amax(np.abs(results.ru), axis=0)),
+        'max_aa': ('g', lambda results, index, g: results.max_aa / g),
+        'max_story_shear': ('kN', lambda results, index, g: results.max_story_shear(index) / 1000),
+    }
+    compression = 'zstd'
+
+    def __init__(
+            self,
+            output_path: str | Path,
+            index: StoryMatIndex,
+            g: float,
+            quantities: list[str] | None=None
+        ):
+        """
+        Args:
+            output_path (str | Path): 文件夹路径
+            index (StoryMatIndex): 楼层与材料响应列的对应关系
+            g (float): 重力加速度
+            quantities (list[str] | None, optional): 导出的响应量（`QUANTITIES`的键），默认全部导出. Defaults to None.
+        """
+        self.output_path = Path(output_path)
+        self.index = index
+        self.g = g
+        self.quantities = list(self.QUANTITIES) if quantities is None else quantities
+        for name in self.quantities:
+            if name not in self.QUANTITIES:
+                raise ValueError(f'【ParquetExporter, __init__】未知的响应量：{name}')
+        self.writers: dict[str, pq.ParquetWriter] = {}
+        for name in self.quantities + ['summary']:
+            if name == 'summary':
+                fields = [(key, pa.float64()) for key in self.SUMMARY]
+                units = {key: unit for key, (unit, _) in self.SUMMARY.items()}
+            else:
+                fields = [('time', pa.float64()), ('value', pa.float64())]
+                units = {'value': self.QUANTITIES[name][0]}
+            schema = pa.schema([('record', pa.dictionary(pa.int32(), pa.string())), ('story', pa.int16())] + fields,
+                               metadata={'quantity': name, 'unit': json.dumps(units)})
+            self.writers[name] = pq.ParquetWriter(self.output_path / f'{name}.parquet', schema,
+                                                  compression=self.compression)
+        self.n_rows = 0  # 已写入的数据点数（不含summary）
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    @staticmethod
+    def record_column(gm_name: str, n: int) -> pa.DictionaryArray:
+        """地震动名列（字典编码，每行仅存储索引）"""
+        return pa.DictionaryArray.from_arrays(pa.array(np.zeros(n, dtype=np.int32)), pa.array([gm_name]))
+
+    def write_record(self, gm_name: str, results: Results):
+        """写入单条地震动的所有响应量及EDP峰值
+
+        Args:
+            gm_name (str): 地震动名
+            results (Results): 计算结果
+        """
+        t = np.asarray(results.t)
+        for name in self.quantities:
+            data = np.asarray(self.QUANTITIES[name][1](results, self.index, self.g))
+            if data.ndim == 1:
+                stories = np.zeros(1, dtype=np.int16)  # 底部响应
+                data = data.reshape(-1, 1)
+            else:
+                stories = np.arange(1, data.shape[1] + 1, dtype=np.int16)
+            n = data.size
+            writer = self.writers[name]
+            writer.write_table(pa.Table.from_arrays([
+                self.record_column(gm_name, n),
+                pa.array(np.repeat(stories, len(data))),
+                pa.array(np.tile(t, data.shape[1])),
+                pa.array(data.T.ravel()),
+            ], schema=writer.schema))
+            self.n_rows += n
+        N = self.index.N
+        writer = self.writers['summary']
+        writer.write_table(pa.Table.from_arrays(
+            [self.record_column(gm_name, N), pa.array(np.arange(1, N + 1, dtype=np.int16))]
+            + [pa.array(np.asarray(func(results, self.index, self.g), dtype=float)) for _, func in self.SUMMARY.values()],
+            schema=writer.schema))
+
+
+def export_parquet(
+        output_path: str | Path,
+        all_results: list[Results],
+        gm_names: list[str],
+        index: StoryMatIndex,
+        g: float,
+        quantities: list[str] | None=None,
+        myprint: Callable[[str], None]=print
+    ):
+    """导出所有计算结果至Parquet文件，逐条地震动写入（见`ParquetExporter`）
+
+    Args:
+        output_path (str | Path): 文件夹路径
+        all_results (list[Results]): 各条地震动的计算结果
+        gm_names (list[str]): 地震动名
+        index (StoryMatIndex): 楼层与材料响应列的对应关系
+        g (float): 重力加速度
+        quantities (list[str] | None, optional): 导出的响应量，默认全部导出. Defaults to None.
+        myprint (Callable[[str], None], optional): 输出导出进度. Defaults to print.
+    """
+    with ParquetExporter(output_path, index, g, quantities) as exporter:
+        for i, gm_name in enumerate(gm_names):
+            myprint(f'正在导出计算结果 ({i+1}/{len(gm_names)})...')
+            exporter.write_record(gm_name, all_results[i])
+    myprint(f'共导出{exporter.n_rows}个数据点')
+
+
+if __name__ == '__main__':
+    # 导出速度及查询示例（用法：python parquet_export.py [地震动数] [楼层数] [时间步数]）
+    import sys
+    import time
+    import tempfile
+    gm_N = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    N = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    NPTS = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    rng = np.random.default_rng(0)
+    index = StoryMatIndex([[1, 2]] * N)
+    all_results = [Results(np.arange(1, NPTS + 1) * 0.01, *rng.standard_normal((4, NPTS)),
+                           *rng.standard_normal((3, NPTS, N)), rng.standard_normal((NPTS, 2 * index.n_ele)))
+                   for _ in range(gm_N)]
+    gm_names = [f'gm{i + 1}' for i in range(gm_N)]
+    with tempfile.TemporaryDirectory() as temp_path:
+        t0 = time.perf_counter()
+        export_parquet(temp_path, all_results, gm_names, index, 9800, myprint=lambda text: None)
+        t1 = time.perf_counter()
+        size = sum(file.stat().st_size for file in Path(temp_path).iterdir())
+        table = pq.read_table(Path(temp_path) / 'drift.parquet', columns=['record', 'value'], filters=[('story', '=', 1)])
+        t2 = time.perf_counter()
+    n = gm_N * NPTS * (9 * N + 2)
+    print(f'地震动数：{gm_N}，楼层数：{N}，时间步数：{NPTS}，数据点数：{n}，文件大小：{size / 1e6:.1f} MB')
+    print(f'导出用时：{t1 - t0:.2f} s（{n / (t1 - t0) / 1e6:.1f}百万数据点/s）')
+    print(f'读取1层层间位移（{table.num_rows}行）用时：{t2 - t1:.3f} s')
@@ -0,0 +1,301 @@
+import json
+from pathlib import Path
+from typing import Literal
+
+import h5py
+import numpy as np
+
+from core.gm_io import read_gm
+
+
+G = 9800  # 重力加速度 (mm/s^2)
+UNIT_SF = {'g': 1, 'mm/s^2': 1 / G, 'cm/s^2': 10 / G, 'm/s^2': 1000 / G}  # 地震动单位换算为g的系数
+SETTING_OPTIONS = (
+    ['Plain', 'Lagrange', 'Penalty', 'Transformation'],
+    ['Plain', 'RCM', 'AMD'],
+    ['BandGeneral', 'BandSPD', 'ProfileSPD', 'SuperLU', 'UmfPack', 'FullGeneral', 'SparseSYM'],
+    ['NormUnbalance', 'NormDispIncr', 'EnergyIncr', 'RelativeNormUnbalance',
+     'RelativeNormDispIncr', 'RelativeTotalNormDispIncr', 'RelativeEnergyIncr', 'FixedNumIter'],
+    ['Linear', 'Newton', 'NewtonLineSearch', 'ModifiedNewton', 'KrylovNewton',
+     'SecantNewton', 'BFGS', 'Broyden'],
+    ['CentralDifference', 'Newmark', 'HHT', 'GeneralizedAlpha', 'TRBDF2', 'Explicitdifference'],
+)  # 求解设置前6项（约束、编号、方程、收敛判据、迭代算法、积分方法）的可选项
+SETTING_DEFAULT = [3, 0, 0, 0, 1, 1, '', '', '1e-5', '60', '0.5', '0.25', '1', '1e-6', '1']
+
+
+def add_free_vibration(th: np.ndarray, fv_time: int | float, dt: float) -> np.ndarray:
+    """为时程序列补零"""
+    n = int(fv_time / dt) # 补零个数
+    th_0 = np.zeros(n)
+    th = np.append(th, th_0)
+    return th
+
+
+def check_BW_mat(mat_lib: list[list]) -> list[list]:
+    """检查是否有boucwen模型，有则替换模型参数格式"""
+    # 由Fy格式转为k格式
+    new_mat_lib = []
+    for _, mat in enumerate(mat_lib):
+        if mat[1] == 2:
+            # 材料为内置的Wen模型
+            new_mat = mat.copy()[:5]
+            gamma2, beta2 = 0.5, 0.5
+            Fy, uy = eval(mat[5]), eval(mat[6])
+            alpha, n = eval(mat[7]), eval(mat[8])
+            k = Fy / uy
+            beta1 = beta2 / uy ** n
+            gamma1 = gamma2 / uy ** n
+            new_mat.extend([alpha, k, n, gamma1, beta1, 1, 0, 0, 0])
+            print('【check_BW_mat】更改BoucWen模型格式：', new_mat)
+        else:
+            new_mat = mat.copy()
+        new_mat_lib.append(new_mat)
+    return new_mat_lib
+
+
+def _to_json(obj):
+    """将numpy类型转换为json可保存的类型"""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f'【_to_json】无法保存为json：{obj!r}')
+
+
+def translate_setting(setting: list) -> list:
+    """将求解设置（前6项为可选项的序号，后7项为数值字符串）转换为求解函数所需的格式"""
+    setting = setting.copy()
+    for n, options in enumerate(SETTING_OPTIONS):
+        setting[n] = options[setting[n]]
+    setting[8:] = [eval(i) for i in setting[8:]]
+    return setting
+
+
+def get_py_args(model, i: int, path: str, print_result: bool=False) -> tuple:
+    """生成第i条地震动调用`core.run_OS_py`（或`core.run_NP`）所需的参数
+
+    Args:
+        model: 模型与地震动（`Project`或具有相同属性的对象，如主窗口）
+        i (int): 地震动序号
+        path (str): 临时文件夹路径
+        print_result (bool, optional): 是否打印结果. Defaults to False.
+    """
+    mat_lib = [mat[3:] for mat in check_BW_mat(model.mat_lib)]
+    SF = UNIT_SF[model.gm_unit[i]]
+    dt = model.gm_dt[i]
+    th = add_free_vibration(model.gm[i], model.fvtime, dt)
+    zeta = [float(i) for i in model.zeta]
+    setting = translate_setting(model.setting)
+    return (model.N, model.m, mat_lib, model.story_mat, th, SF, dt, model.mode_num, model.has_damping,
+            model.zeta_mode, zeta, setting, path, model.gm_name[i], G, print_result)
+
+
+class Project:
+    """不依赖图形界面的模型与地震动定义，属性名及含义与主窗口相同
+
+    模型文件为json格式，键与属性名相同：
+    N、m、mat_lib、story_mat（必需），mode_num、fvtime、has_damping、zeta_mode、zeta、setting、worker_num（可选）
+
+    项目文件（.nlmdof，HDF5格式）同时保存模型与地震动：
+    属性model为模型的json字符串，/gm/data为所有地震动首尾相接的一维数组（第i条地震动为
+    data[offset[i]: offset[i+1]]），/gm/offset、/gm/dt、/gm/name、/gm/unit为各条地震动的信息。
+    data可压缩保存，或连续存储以便读取时直接映射至内存（见`save`与`load`）。
+    """
+    MODEL_KEYS = ('N', 'm', 'mat_lib', 'story_mat', 'mode_num', 'fvtime', 'has_damping',
+                  'zeta_mode', 'zeta', 'setting', 'worker_num')
+    FILE_VERSION = 1  # 项目文件版本
+    chunk_size = 2 ** 16  # 压缩保存时地震动数据的分块大小
+
+    def __init__(self):
+        self.N = 0  # 自由度数量
+        self.m = []  # 各自由度质量
+        self.mat_lib = []  # 备选材料 [['备注名', 0(材料种类(常用材料:0-5,OS材料为-1)), 0(是否有备注名), 'Steel01', 1, 235, 206000, 0.02], ...]
+        self.story_mat = []  # 各层材料 [[1, 2](材料编号)], ...]
+        self.mode_num = 0  # 最大有效振型数（为0时按质量非零的自由度数确定，最多5阶）
+        self.fvtime = 0  # 自由振动时长
+        self.has_damping = True  # 是否有阻尼
+        self.zeta_mode = [1, 2]  # Rayleigh阻尼的振型选用
+        self.zeta = ['0.05', '0.05']  # Rayleigh阻尼的阻尼比
+        self.setting = SETTING_DEFAULT.copy()
+        self.worker_num = 1  # 并行计算进程数（1为串行计算）
+        self.gm: list[np.ndarray] = []  # 加速度序列
+        self.gm_name: list[str] = []
+        self.gm_dt: list[float] = []
+        self.gm_unit: list[Literal['g', 'cm/s^2', 'm/s^2', 'mm/s^2']] = []  # 单位
+
+    @property
+    def gm_N(self) -> int:
+        return len(self.gm)
+
+    @classmethod
+    def from_model(cls, model):
+        """由具有相同属性的对象（如主窗口）生成"""
+        project = cls()
+        for key in cls.MODEL_KEYS:
+            setattr(project, key, getattr(model, key, getattr(project, key)))
+        for gm_name, th, dt, unit in zip(model.gm_name, model.gm, model.gm_dt, model.gm_unit):
+            project.add_record(gm_name, th, dt, unit)
+        return project
+
+    @classmethod
+    def from_json(cls, file: str | Path):
+        """读取模型文件"""
+        with open(file, 'r', encoding='utf-8') as f:
+            data: dict = json.load(f)
+        project = cls()
+        for key in ('N', 'm', 'mat_lib', 'story_mat'):
+            if key not in data:
+                raise ValueError(f'【Project, from_json】模型文件缺少{key}！')
+        for key in cls.MODEL_KEYS:
+            if key in data:
+                setattr(project, key, data[key])
+        if not project.mode_num:
+            project.mode_num = min(sum(1 for mi in project.m if mi > 0), 5)
+        project.check()
+        return project
+
+    def model_dict(self) -> dict:
+        """模型参数（不含地震动）"""
+        return {key: getattr(self, key) for key in self.MODEL_KEYS}
+
+    def to_json(self, file: str | Path):
+        """保存模型文件（不含地震动）"""
+        with open(file, 'w', encoding='utf-8') as f:
+            json.dump(self.model_dict(), f, ensure_ascii=False, indent=4, default=_to_json)
+
+    def save(self, file: str | Path, compress: bool=True):
+        """保存项目文件（模型与地震动）
+
+        Args:
+            file (str | Path): 项目文件路径
+            compress (bool, optional): 是否压缩地震动数据，为False时连续存储，读取时可映射至内存. Defaults to True.
+        """
+        lengths = [len(th) for th in self.gm]
+        offset = np.concatenate(([0], np.cumsum(lengths, dtype=np.int64)))
+        data = np.concatenate(self.gm).astype(float) if self.gm else np.zeros(0)
+        with h5py.File(file, 'w') as f:
+            f.attrs['version'] = self.FILE_VERSION
+            f.attrs['model'] = json.dumps(self.model_dict(), ensure_ascii=False, default=_to_json)
+            group = f.create_group('gm')
+            if compress and len(data):
+                group.create_dataset('data', data=data, chunks=(min(len(data), self.chunk_size),),
+                                     shuffle=True, compression='lzf')
+            else:
+                group.create_dataset('data', data=data)
+            group.create_dataset('offset', data=offset)
+            group.create_dataset('dt', data=np.asarray(self.gm_dt, dtype=float))
+            group.create_dataset('name', data=self.gm_name, dtype=h5py.string_dtype())
+            group.create_dataset('unit', data=self.gm_unit, dtype=h5py.string_dtype())
+
+    @classmethod
+    def load(cls, file: str | Path, mmap: bool=False):
+        """读取项目文件
+
+        Args:
+            file (str | Path): 项目文件路径
+            mmap (bool, optional): 是否将地震动数据映射至内存（仅对未压缩的项目文件有效，
+            此时`gm`中各地震动为只读的np.memmap）. Defaults to False.
+
+        Returns:
+            Project: 返回Project的实例
+        """
+        project = cls()
+        with h5py.File(file, 'r') as f:
+            if f.attrs.get('version', 0) > cls.FILE_VERSION:
+                raise ValueError(f'【Project, load】项目文件版本（{f.attrs["version"]}）高于当前支持的版本！')
+            for key, value in json.loads(f.attrs['model']).items():
+                if key in cls.MODEL_KEYS:
+                    setattr(project, key, value)
+            group = f['gm']
+            dataset = group['data']
+            offset = group['offset'][()]
+            file_offset = dataset.id.get_offset()  # 连续存储时数据在文件中的位置（分块存储时为None）
+            if mmap and file_offset is not None and len(dataset):
+                data = np.memmap(file, dtype=dataset.dtype, mode='r', offset=file_offset, shape=dataset.shape)
+            else:
+                data = dataset[()]
+            project.gm = [data[offset[i]: offset[i + 1]] for i in range(len(offset) - 1)]
+            project.gm_dt = group['dt'][()].tolist()
+            project.gm_name = group['name'].asstr()[()].tolist()
+            project.gm_unit = group['unit'].asstr()[()].tolist()
+        return project
+
+    def check(self):
+        """检查模型是否完备"""
+        if not self.N or len(self.m) != self.N:
+            raise ValueError('【Project, check】质量数量与层数不等！')
+        if len(self.story_mat) != self.N:
+            raise ValueError('【Project, check】story_mat数量与层数N不等！')
+        for i, sub_list in enumerate(self.story_mat):
+            if not sub_list:
+                raise ValueError(f'【Project, check】第{i+1}层未指派材料！')
+            for tag in sub_list:
+                if not 1 <= tag <= len(self.mat_lib):
+                    raise ValueError(f'【Project, check】第{i+1}层的材料编号{tag}不存在！')
+
+    def add_record(self, gm_name: str, th: np.ndarray, dt: float, unit: Literal['g', 'cm/s^2', 'm/s^2', 'mm/s^2']='g'):
+        """添加地震动（重名时在名称后加序号）"""
+        if unit not in UNIT_SF:
+            raise ValueError(f'【Project, add_record】未知的单位：{unit}')
+        gm_name_original = gm_name
+        n = 2
+        while gm_name in self.gm_name:  # 避免重复地震动名称
+            gm_name = gm_name_original + f' ({n})'
+            n += 1
+        self.gm.append(np.asarray(th, dtype=float))
+        self.gm_name.append(gm_name)
+        self.gm_dt.append(dt)
+        self.gm_unit.append(unit)
+
+    def load_record(self, path: str | Path, dt: float | None=None, skip_rows: int=0,
+                    unit: Literal['g', 'cm/s^2', 'm/s^2', 'mm/s^2']='g'):
+        """读取地震动文件（见`core.gm_io.read_gm`）：PEER .AT2文件、单列加速度（需指定dt）或时间&加速度两列
+
+        Args:
+            path (str | Path): 地震动文件路径
+            dt (float | None, optional): 单列加速度的步长，两列数据由第一列时间序列确定. Defaults to None.
+            skip_rows (int, optional): 跳过的行数. Defaults to 0.
+            unit (Literal['g', 'cm/s^2', 'm/s^2', 'mm/s^2'], optional): 单位（.AT2文件为g）. Defaults to 'g'.
+        """
+        path = Path(path)
+        th, dt, _ = read_gm(path, dt, skip_rows, single_column=None)
+        self.add_record(path.name.split('.')[0], th, dt, unit)
+
+    def py_args(self, i: int, path: str, print_result: bool=False) -> tuple:
+        """生成第i条地震动调用`core.run_OS_py`（或`core.run_NP`）所需的参数"""
+        return get_py_args(self, i, path, print_result)
+
+
+if __name__ == '__main__':
+    # 对比逐个读取文本地震动文件与读取项目文件的速度（用法：python project.py [地震动数] [时间步数]）
+    import sys
+    import time
+    import tempfile
+    gm_N = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    NPTS = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as temp_path:
+        temp_path = Path(temp_path)
+        for i in range(gm_N):
+            np.savetxt(temp_path / f'gm{i}.txt', np.column_stack((np.arange(NPTS) * 0.01, rng.standard_normal(NPTS) * 0.1)))
+        t0 = time.perf_counter()
+        project = Project()
+        for i in range(gm_N):
+            project.load_record(temp_path / f'gm{i}.txt')
+        t1 = time.perf_counter()
+        project.save(temp_path / 'a.nlmdof')
+        project.save(temp_path / 'b.nlmdof', compress=False)
+        t2 = time.perf_counter()
+        Project.load(temp_path / 'a.nlmdof')
+        t3 = time.perf_counter()
+        Project.load(temp_path / 'b.nlmdof')
+        t4 = time.perf_counter()
+        loaded = Project.load(temp_path / 'b.nlmdof', mmap=True)
+        t5 = time.perf_counter()
+        assert all(np.array_equal(th1, th2) for th1, th2 in zip(project.gm, loaded.gm))
+        size_a, size_b = (temp_path / 'a.nlmdof').stat().st_size, (temp_path / 'b.nlmdof').stat().st_size
+        del loaded
+    print(f'地震动数：{gm_N}，时间步数：{NPTS}')
+    print(f'逐个读取文本文件：{t1 - t0:.3f} s')
+    print(f'保存项目文件（压缩与未压缩）：{t2 - t1:.3f} s')
+    print(f'读取压缩的项目文件：{t3 - t2:.3f} s（{size_a / 1e6:.1f} MB）')
+    print(f'读取未压缩的项目文件：{t4 - t3:.3f} s（{size_b / 1e6:.1f} MB）')
+    print(f'映射未压缩的项目文件：{t5 - t4:.3f} s')
@@ -0,0 +1,299 @@
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from core.Results import Results, ModeResults
+from core.result_store import ResultStore
+from core.project import _to_json
+
+
+class ResultCache:
+    """按内容寻址的计算结果缓存，模型与地震动均未改变时直接读取上次的计算结果
+
+    每条地震动的计算结果保存为一个结果库文件`{key}.h5`（见`ResultStore`，记录名为'result'），
+    key为求解器、模型参数（材料参数经`check_BW_mat`处理后）、阻尼、求解设置与地震动数据、步长、
+    缩放系数（含自由振动段）的哈希值（见`model_key`与`record_key`），与地震动名及临时文件夹无关。
+    周期与振型仅与质量、材料与模态数有关（与阻尼及求解设置无关），保存为`{modes_key}.h5`（见`modes_key`）。
+    文件总大小超过budget时，按最近使用时间（文件修改时间，命中时更新）删除最久未使用的文件。
+    """
+    VERSION = 1  # 缓存格式或求解器的计算结果改变时递增，使旧缓存失效
+    RECORD = 'result'
+
+    def __init__(self, path: str | Path, budget: int=2 * 1024 ** 3):
+        """
+        Args:
+            path (str | Path): 缓存文件夹路径（不存在时新建）
+            budget (int, optional): 缓存文件总大小上限(bytes). Defaults to 2 GB.
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.budget = budget
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中次数
+
+    @classmethod
+    def model_key(cls, args: tuple, solver: str) -> str:
+        """模型的哈希值
+
+        Args:
+            args (tuple): 调用`core.run_OS_py`所需的参数（见`core.get_py_args`）
+            solver (str): 求解器，'py'、'np'或'tcl'
+        """
+        N, m, mat_lib, story_mat, _, _, _, mode_num, has_damping, zeta_mode, zeta, setting, _, _, g, _ = args
+        text = json.dumps([cls.VERSION, solver, N, m, mat_lib, story_mat, mode_num, has_damping,
+                           zeta_mode, zeta, setting, g], default=_to_json)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    @classmethod
+    def modes_key(cls, args: tuple, solver: str) -> str:
+        """模态分析的哈希值（阻尼或求解设置不同的模型共用周期与振型）
+
+        Args:
+            args (tuple): 调用`core.run_OS_py`所需的参数（见`core.get_py_args`）
+            solver (str): 求解器，'py'、'np'或'tcl'
+        """
+        N, m, mat_lib, story_mat, _, _, _, mode_num, *_ = args
+        text = json.dumps([cls.VERSION, 'modes', solver, N, m, mat_lib, story_mat, min(mode_num, 5)], default=_to_json)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    @staticmethod
+    def record_key(model_key: str, args: tuple) -> str:
+        """模型与单条地震动的哈希值
+
+        Args:
+            model_key (str): 模型的哈希值（见`model_key`）
+            args (tuple): 调用`core.run_OS_py`所需的参数（见`core.get_py_args`）
+        """
+        th, SF, dt = args[4], args[5], args[6]
+        h = hashlib.sha256(model_key.encode())
+        h.update(np.ascontiguousarray(th, dtype=float).tobytes())
+        h.update(repr((float(SF), float(dt))).encode())
+        return h.hexdigest()
+
+    def file(self, key: str) -> Path:
+        return self.path / f'{key}.h5'
+
+    def __contains__(self, key: str) -> bool:
+        return self.file(key).exists()
+
+    def touch(self, key: str):
+        """更新最近使用时间"""
+        try:
+            os.utime(self.file(key))
+        except OSError:
+            pass
+
+    def remove(self, key: str):
+        try:
+            self.file(key).unlink()
+        except OSError:
+            pass
+
+    def get(self, key: str) -> Results | None:
+        """读取计算结果，未命中时返回None"""
+        if key not in self:
+            self.misses += 1
+            return None
+        try:
+            with ResultStore(self.file(key)) as store:
+                results = store.read_results(self.RECORD)
+        except (OSError, KeyError) as e:
+            print(f'【ResultCache, get】缓存文件损坏，已删除：{e}')
+            self.remove(key)
+            self.misses += 1
+            return None
+        self.touch(key)
+        self.hits += 1
+        return results
+
+    def copy_to(self, key: str, store: ResultStore, gm_name: str) -> bool:
+        """将计算结果直接复制至结果库（不解压），返回是否命中"""
+        if key not in self:
+            self.misses += 1
+            return False
+        try:
+            with ResultStore(self.file(key)) as source:
+                store.copy_results(source, self.RECORD, gm_name)
+        except (OSError, KeyError) as e:
+            print(f'【ResultCache, copy_to】缓存文件损坏，已删除：{e}')
+            self.remove(key)
+            self.misses += 1
+            return False
+        self.touch(key)
+        self.hits += 1
+        return True
+
+    def _write(self, key: str, write_func):
+        """写入临时文件后重命名，计算中断时不留下不完整的缓存文件（临时文件名含进程号，多个进程可同时写入）"""
+        temp_file = self.path / f'{key}.{os.getpid()}.h5.tmp'
+        try:
+            with ResultStore(temp_file, 'w') as store:
+                write_func(store)
+            os.replace(temp_file, self.file(key))
+        except OSError as e:
+            print(f'【ResultCache, _write】写入缓存失败：{e}')
+            temp_file.unlink(missing_ok=True)
+            return
+        self.evict(keep=key)
+
+    def put(self, key: str, results: Results):
+        """保存计算结果"""
+        self._write(key, lambda store: store.write_results(self.RECORD, results, key=key))
+
+    def put_from(self, key: str, store: ResultStore, gm_name: str):
+        """从结果库复制计算结果至缓存（不重新压缩）"""
+        self._write(key, lambda cache_store: cache_store.copy_results(store, gm_name, self.RECORD))
+
+    def get_modes(self, modes_key: str) -> ModeResults | None:
+        """读取周期与振型，未命中时返回None"""
+        if modes_key not in self:
+            return None
+        try:
+            with ResultStore(self.file(modes_key)) as store:
+                mode_results = store.read_modes()
+        except (OSError, KeyError) as e:
+            print(f'【ResultCache, get_modes】缓存文件损坏，已删除：{e}')
+            self.remove(modes_key)
+            return None
+        self.touch(modes_key)
+        return mode_results
+
+    def put_modes(self, modes_key: str, mode_results: ModeResults):
+        """保存周期与振型"""
+        self._write(modes_key, lambda store: store.write_modes(mode_results))
+
+    @property
+    def size(self) -> int:
+        """缓存文件总大小(bytes)"""
+        return sum(file.stat().st_size for file in self.path.glob('*.h5'))
+
+    def evict(self, keep: str | None=None):
+        """删除最久未使用的文件，直至总大小不超过budget
+
+        Args:
+            keep (str | None, optional): 不删除的文件（刚写入的文件）. Defaults to None.
+        """
+        _evict(self.path.glob('*.h5'), self.budget, keep)
+
+    def clear(self):
+        """删除所有缓存文件"""
+        for file in self.path.glob('*.h5*'):
+            file.unlink(missing_ok=True)
+
+
+class GMCache:
+    """地震动时程文件缓存，供tcl求解器读取（`timeSeries Path -filePath`）
+
+    文件名为地震动数据（含自由振动段，未缩放）的哈希值，缩放系数由`-factor`单独传入，
+    因此同一条地震动在不同缩放系数、不同模型及多次计算之间共用同一文件，只需写入一次。
+    数据按最短的可精确还原的格式（`repr`）逐行写入，读回后与原数据完全相同，
+    文件约为`np.savetxt`默认格式的1/3，写入速度约快3倍。
+    """
+    def __init__(self, path: str | Path | None=None, budget: int=512 * 1024 ** 2):
+        """
+        Args:
+            path (str | Path | None, optional): 缓存文件夹路径（不存在时新建），默认为`{系统临时文件夹}/NLMDOF_cache/gm`. Defaults to None.
+            budget (int, optional): 缓存文件总大小上限(bytes). Defaults to 512 MB.
+        """
+        self.path = Path(tempfile.gettempdir()) / 'NLMDOF_cache' / 'gm' if path is None else Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.budget = budget
+        self.hits = 0  # 命中次数
+        self.misses = 0  # 未命中次数
+
+    @staticmethod
+    def key(th: np.ndarray | list) -> str:
+        """地震动数据的哈希值"""
+        return hashlib.sha256(np.ascontiguousarray(th, dtype=float).tobytes()).hexdigest()
+
+    def file(self, th: np.ndarray | list) -> Path:
+        """返回地震动时程文件的路径，缓存中不存在时写入"""
+        key = self.key(th)
+        file = self.path / f'{key}.txt'
+        if file.exists():
+            try:
+                os.utime(file)
+            except OSError:
+                pass
+            self.hits += 1
+            return file
+        self.misses += 1
+        temp_file = self.path / f'{key}.{os.getpid()}.txt.tmp'
+        try:
+            with open(temp_file, 'w') as f:
+                f.write('\n'.join(map(repr, np.asarray(th, dtype=float).tolist())))
+                f.write('\n')
+            os.replace(temp_file, file)
+        except OSError:
+            temp_file.unlink(missing_ok=True)
+            raise
+        _evict(self.path.glob('*.txt'), self.budget, keep=key)
+        return file
+
+    def clear(self):
+        """删除所有缓存文件"""
+        for file in self.path.glob('*.txt*'):
+            file.unlink(missing_ok=True)
+
+
+def _evict(files: Iterable[Path], budget: int, keep: str | None=None):
+    """按修改时间删除最久未使用的文件，直至总大小不超过budget（文件名为keep的文件不删除）"""
+    stats = []
+    for file in files:
+        try:
+            stat = file.stat()
+        except OSError:
+            continue
+        stats.append((stat.st_mtime, stat.st_size, file))
+    total = sum(size for _, size, _ in stats)
+    for _, size, file in sorted(stats):
+        if total <= budget:
+            break
+        if file.stem == keep:
+            continue
+        try:
+            file.unlink()
+        except OSError:
+            continue
+        total -= size
+
+
+if __name__ == '__main__':
+    # 缓存命中时读取结果与重新计算的耗时对比（用法：python result_cache.py [楼层数] [时间步数]）
+    import sys
+    import time
+    from core.run_OS import run_OS_py
+    from core.project import Project
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    NPTS = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    project = Project()
+    project.N, project.m, project.mode_num = N, [1.0] * N, min(N, 5)
+    project.mat_lib = [['Steel01', -1, 1, 'Steel01', 1, 8000, 8000, 0.02]]
+    project.story_mat = [[1]] * N
+    rng = np.random.default_rng(0)
+    project.add_record('gm', 0.3 * np.sin(np.arange(NPTS) * 0.02) * rng.random(NPTS), 0.01, 'g')
+    with tempfile.TemporaryDirectory() as temp_path:
+        (Path(temp_path) / 'temp_NLMDOF_results').mkdir()
+        cache = ResultCache(Path(temp_path) / 'cache')
+        args = project.py_args(0, temp_path)
+        t0 = time.perf_counter()
+        done, _, _, results = run_OS_py(*args, recorder='memory')
+        t1 = time.perf_counter()
+        cache.put(ResultCache.record_key(ResultCache.model_key(args, 'py'), args), results)
+        t2 = time.perf_counter()
+        key = ResultCache.record_key(ResultCache.model_key(args, 'py'), args)
+        cached = cache.get(key)
+        t3 = time.perf_counter()
+        with ResultStore(Path(temp_path) / 'store.h5', 'w') as store:
+            cache.copy_to(key, store, 'gm')
+        t4 = time.perf_counter()
+        size = cache.size
+    assert np.array_equal(cached.ru, results.ru)
+    print(f'楼层数：{N}，时间步数：{NPTS}，缓存文件大小：{size / 1e6:.2f} MB')
+    print(f'计算：{t1 - t0:.3f} s，写入缓存：{t2 - t1:.3f} s')
+    print(f'命中（哈希+读取）：{t3 - t2:.4f} s，命中（哈希+复制至结果库）：{t4 - t3:.4f} s')
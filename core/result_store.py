@@ -0,0 +1,141 @@
+from pathlib import Path
+from typing import Literal
+
+import h5py
+import numpy as np
+
+from core.Results import Results, ModeResults
+
+
+class ResultStore:
+    """单文件计算结果库（HDF5格式）
+
+    文件结构：
+    /records/{gm_name}/t, base_a, base_v, base_u, base_V, ra, rv, ru, mat（属性done为计算状态）
+    /modes/T, mode（mode为(模态数, N)的数组，第i行为第i+1阶振型）
+
+    每条地震动计算完成后即写入并刷新文件，数据集分块并压缩存储，
+    读取时仅读取所需地震动的数据。
+    """
+    RESULT_NAMES = ('t', 'base_a', 'base_v', 'base_u', 'base_V', 'ra', 'rv', 'ru', 'mat')
+    chunk_rows = 1024  # 分块的时间步数
+    chunk_cols = 16  # 分块的列数（按列读取时只需解压所在的分块）
+    compression = 'lzf'  # 浮点结果的压缩率有限，选用速度较快的lzf
+    compression_opts = None
+
+    def __init__(self, file: str | Path, mode: Literal['r', 'r+', 'w', 'a']='r'):
+        """
+        Args:
+            file (str | Path): 结果库文件路径
+            mode (Literal['r', 'r+', 'w', 'a'], optional): 打开方式，与`h5py.File`相同. Defaults to 'r'.
+        """
+        self.file_path = Path(file)
+        self.file = h5py.File(self.file_path, mode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+    def __contains__(self, gm_name: str) -> bool:
+        return f'records/{gm_name}' in self.file
+
+    @property
+    def gm_names(self) -> list[str]:
+        """已保存的地震动名"""
+        if 'records' not in self.file:
+            return []
+        return list(self.file['records'].keys())
+
+    @property
+    def keys(self) -> dict[str, str]:
+        """计算完成的地震动的哈希值与地震动名"""
+        if 'records' not in self.file:
+            return {}
+        return {group.attrs['key']: gm_name for gm_name, group in self.file['records'].items()
+                if 'key' in group.attrs and group.attrs.get('done') == 1}
+
+    def create_dataset(self, group: h5py.Group, name: str, data: np.ndarray):
+        """以分块压缩的方式创建数据集"""
+        data = np.asarray(data, dtype=float)
+        if data.size == 0:
+            group.create_dataset(name, data=data)
+            return
+        chunks = (min(len(data), self.chunk_rows),) + tuple(min(n, self.chunk_cols) for n in data.shape[1:])
+        group.create_dataset(name, data=data, chunks=chunks, shuffle=True,
+                             compression=self.compression, compression_opts=self.compression_opts)
+
+    def write_results(self, gm_name: str, results: Results, done: int=1, key: str | None=None):
+        """写入单条地震动的计算结果（已存在时覆盖）
+
+        Args:
+            gm_name (str): 地震动名
+            results (Results): 计算结果
+            done (int, optional): 计算状态. Defaults to 1.
+            key (str | None, optional): 模型与地震动的哈希值（见`ResultCache.record_key`），用于复用计算结果. Defaults to None.
+        """
+        if gm_name in self:
+            del self.file[f'records/{gm_name}']
+        group = self.file.require_group('records').create_group(gm_name)
+        group.attrs['done'] = done
+        if key is not None:
+            group.attrs['key'] = key
+        for name in self.RESULT_NAMES:
+            self.create_dataset(group, name, getattr(results, name))
+        self.file.flush()
+
+    def read_results(self, gm_name: str, lazy: bool=False) -> Results:
+        """读取单条地震动的计算结果
+
+        Args:
+            gm_name (str): 地震动名
+            lazy (bool, optional): 是否惰性读取，为True时各响应为h5py.Dataset，
+            切片时才读取（并解压）所需的分块，使用期间结果库不可关闭. Defaults to False.
+
+        Returns:
+            Results: 返回Results的实例
+        """
+        if gm_name not in self:
+            raise FileNotFoundError(f'【ResultStore, read_results】{self.file_path}中无{gm_name}的计算结果！')
+        group = self.file[f'records/{gm_name}']
+        if lazy:
+            return Results(**{name: group[name] for name in self.RESULT_NAMES})
+        return Results(**{name: group[name][()] for name in self.RESULT_NAMES})
+
+    def copy_results(self, source: 'ResultStore', gm_name: str, new_name: str | None=None):
+        """从另一个结果库复制单条地震动的计算结果（含计算状态，已存在时覆盖），
+        分块数据直接复制，无需解压与重新压缩
+
+        Args:
+            source (ResultStore): 源结果库
+            gm_name (str): 源结果库中的地震动名
+            new_name (str | None, optional): 写入的地震动名，默认与源相同. Defaults to None.
+        """
+        if gm_name not in source:
+            raise FileNotFoundError(f'【ResultStore, copy_results】{source.file_path}中无{gm_name}的计算结果！')
+        new_name = gm_name if new_name is None else new_name
+        if new_name in self:
+            del self.file[f'records/{new_name}']
+        source.file.copy(source.file[f'records/{gm_name}'], self.file.require_group('records'), name=new_name)
+        self.file.flush()
+
+    def write_modes(self, mode_results: ModeResults):
+        """写入周期与振型"""
+        if 'modes' in self.file:
+            del self.file['modes']
+        group = self.file.create_group('modes')
+        group.create_dataset('T', data=np.asarray(mode_results.T, dtype=float))
+        group.create_dataset('mode', data=np.asarray(mode_results.mode, dtype=float).reshape(len(mode_results.mode), -1))
+        self.file.flush()
+
+    def read_modes(self) -> ModeResults:
+        """读取周期与振型"""
+        if 'modes' not in self.file:
+            raise FileNotFoundError(f'【ResultStore, read_modes】{self.file_path}中无模态结果！')
+        group = self.file['modes']
+        return ModeResults(group['T'][()].tolist(), list(group['mode'][()]))
@@ -0,0 +1,839 @@
+import os
+from math import pi
+from typing import Literal
+
+import numpy as np
+from scipy.linalg import eigh_tridiagonal, eig
+from scipy.linalg.lapack import dgtsv
+
+from core.materials import MATERIALS, UniaxialMaterial, check_NP_mat
+from core.Results import Results, ModeResults
+from core.txt_export import savetxt
+
+
+RECORDER_FMT = '%.6g'  # 与OpenSees文本recorder的默认精度（6位有效数字）一致
+
+
+class ShearBuilding:
+    """剪切层模型，与`run_OS_py`中由zeroLength单元串联而成的模型等效
+
+    第i层（从0开始）的所有单元连接第i-1层与第i层节点，
+    因此整体刚度矩阵与阻尼矩阵均为三对角矩阵。
+    """
+    def __init__(self, N: int, m: list, mat_lib: list[list], story_mat: list[list]):
+        self.N = N
+        self.m = np.array(m, dtype=float)
+        mat_dict = {mat[1]: mat for mat in mat_lib}
+        # 单元按楼层顺序编号，与run_OS_py一致
+        ele_story, ele_mat = [], []
+        self.element_tags: list[list] = []
+        current_ele_tag = 1
+        for i in range(N):
+            self.element_tags.append([])
+            for mat_tag in story_mat[i]:
+                ele_story.append(i)
+                ele_mat.append(mat_tag)
+                self.element_tags[i].append(current_ele_tag)
+                current_ele_tag += 1
+        self.n_ele = len(ele_story)
+        self.ele_story = np.array(ele_story)
+        self.story_start = np.searchsorted(self.ele_story, np.arange(N))  # 各层第一个单元的序号
+        # 按材料类型将单元分组
+        self.materials: list[tuple[UniaxialMaterial, np.ndarray]] = []
+        for mat_name, mat_cls in MATERIALS.items():
+            idx = [j for j, tag in enumerate(ele_mat) if mat_dict[tag][0] == mat_name]
+            if not idx:
+                continue
+            para = np.array([mat_dict[ele_mat[j]][2:] for j in idx], dtype=float).T
+            self.materials.append((mat_cls(para), np.array(idx)))
+        self.k0 = self.story_sum(self.ele_initial_tangent())  # 各层初始刚度
+        self.has_damp_tangent = any(mat.has_damp_tangent for mat, _ in self.materials)
+        self.one_group = self.n_ele == N and len(self.materials) == 1
+
+    def ele_initial_tangent(self) -> np.ndarray:
+        k0 = np.zeros(self.n_ele)
+        for mat, idx in self.materials:
+            k0[idx] = mat.initial_tangent()
+        return k0
+
+    def story_sum(self, ele_value: np.ndarray) -> np.ndarray:
+        """将单元的值按楼层求和（并联）"""
+        return np.add.reduceat(ele_value, self.story_start, axis=-1)
+
+    def revert_to_start(self, shape: tuple=()):
+        for mat, idx in self.materials:
+            mat.revert_to_start(shape + (len(idx),))
+
+    def set_trial(self, u: np.ndarray, v: np.ndarray):
+        """根据楼层相对位移和速度更新单元试探状态
+
+        Returns:
+            tuple: 单元应变、单元应力、楼层力、楼层切线刚度、楼层阻尼切线（无黏性材料时为None）
+        """
+        drift = u.copy()
+        drift[..., 1:] -= u[..., :-1]
+        if self.has_damp_tangent:
+            drift_rate = v.copy()
+            drift_rate[..., 1:] -= v[..., :-1]
+        else:
+            drift_rate = None
+        if self.one_group:
+            # 每层一个单元且为同一种材料，无需按单元重排
+            mat = self.materials[0][0]
+            mat.set_trial(drift, drift_rate)
+            damp_tangent = mat.damp_tangent if self.has_damp_tangent else None
+            return drift, mat.stress, mat.stress, mat.tangent, damp_tangent
+        strain = drift[..., self.ele_story]
+        rate = drift_rate[..., self.ele_story] if self.has_damp_tangent else None
+        stress = np.empty_like(strain)
+        tangent = np.empty_like(strain)
+        damp_tangent = np.zeros_like(strain) if self.has_damp_tangent else None
+        for mat, idx in self.materials:
+            mat.set_trial(strain[..., idx], None if rate is None else rate[..., idx])
+            stress[..., idx] = mat.stress
+            tangent[..., idx] = mat.tangent
+            if mat.has_damp_tangent:
+                damp_tangent[..., idx] = mat.damp_tangent
+        if self.has_damp_tangent:
+            damp_tangent = self.story_sum(damp_tangent)
+        return strain, stress, self.story_sum(stress), self.story_sum(tangent), damp_tangent
+
+    def commit(self, mask: np.ndarray | None=None):
+        """提交试探状态，mask不为None时仅提交其为True的地震动（形状为(R, 1)）"""
+        for mat, _ in self.materials:
+            mat.commit(mask)
+
+    @staticmethod
+    def assemble(story_value: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """由各层刚度（或阻尼）组装三对角矩阵，返回主对角线与副对角线"""
+        diag = story_value.copy()
+        diag[..., :-1] += story_value[..., 1:]
+        off = -story_value[..., 1:]
+        return diag, off
+
+    def eigen(self, mode_num: int) -> tuple[np.ndarray, np.ndarray]:
+        """基于初始刚度的模态分析
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: 特征值(mode_num,)，质量归一化振型(N, mode_num)
+        """
+        diag, off = self.assemble(self.k0)
+        if np.all(self.m > 0):
+            # M^(-1/2) K M^(-1/2)仍为三对角矩阵
+            s = 1 / np.sqrt(self.m)
+            lambda_, phi = eigh_tridiagonal(diag * s * s, off * s[:-1] * s[1:],
+                                            select='i', select_range=(0, mode_num - 1))
+            phi = phi * s[:, np.newaxis]
+        else:
+            K = np.diag(diag) + np.diag(off, 1) + np.diag(off, -1)
+            lambda_, phi = eig(K, np.diag(self.m))
+            finite = np.isfinite(lambda_)
+            lambda_, phi = lambda_[finite].real, phi[:, finite].real
+            order = np.argsort(lambda_)[:mode_num]
+            lambda_, phi = lambda_[order], phi[:, order]
+            phi = phi / np.sqrt(np.sum(self.m[:, np.newaxis] * phi ** 2, axis=0))
+        phi = phi * np.where(phi[0] < 0, -1, 1)  # 使第一层振型值为正
+        return lambda_, phi
+
+
+class NewmarkSolver:
+    """Newmark/HHT直接积分求解器，迭代与收敛判断方式参考OpenSees
+
+    Newmark法取alpha = 1；HHT法按OpenSees约定alpha取0.67~1.0，
+    此时gamma = 1.5 - alpha，beta = (2 - alpha)^2 / 4。
+    状态数组的形状为(R, N)，R为同时计算的地震动数量（单条地震动时R = 1），
+    各条地震动的步长、收敛判断与提交均相互独立，已收敛的地震动在后续迭代中不再更新。
+    """
+    def __init__(self,
+            model: ShearBuilding,
+            integrator: str,
+            int_para: tuple,
+            test: str,
+            tol: float,
+            max_iter: int,
+            algorithm: str,
+            a: float,
+            b: float,
+            load_factor
+        ):
+        self.model = model
+        if integrator == 'Newmark':
+            self.alpha = 1.0
+            self.gamma, self.beta = int_para
+        elif integrator == 'HHT':
+            self.alpha = int_para[0]
+            self.gamma = 1.5 - self.alpha
+            self.beta = (2 - self.alpha) ** 2 / 4
+        else:
+            raise ValueError(f'NumPy求解器不支持积分方法：{integrator}')
+        self.test = test
+        self.tol = tol
+        self.max_iter = int(max_iter)
+        self.algorithm = algorithm
+        self.load_factor = load_factor  # 函数：各条地震动的时间(R,) -> 基底加速度(R,)
+        self.c_diag, self.c_off = model.assemble(b * model.k0)  # Rayleigh阻尼（初始刚度项）
+        self.c_diag = self.c_diag + a * model.m  # Rayleigh阻尼（质量项）
+        self.c_diag_tangent = self.alpha * self.c_diag  # 切线矩阵中阻尼项的系数（不含c2）
+        self.c_off_tangent = np.append(self.alpha * self.c_off, 0)  # 补0至N个元素（见`solve_tridiagonal`）
+        self._dt = None  # 上一步的步长数组（见`coefficients`）
+
+    def revert_to_start(self, R: int=1):
+        N = self.model.N
+        self.model.revert_to_start((R,))
+        self.R = R
+        self.time = np.zeros(R)
+        self.u = np.zeros((R, N))
+        self.v = np.zeros((R, N))
+        self.a = np.zeros((R, N))
+        self.ub = np.zeros(R)
+        self.vb = np.zeros(R)
+        self.ab = np.zeros(R)
+        self.strain = np.zeros((R, self.model.n_ele))
+        self.stress = np.zeros((R, self.model.n_ele))
+        self.story_force = np.zeros((R, N))
+        self.base_V = np.zeros(R)
+
+    def test_norm(self, du: np.ndarray, R: np.ndarray, dub: np.ndarray) -> np.ndarray:
+        """收敛判断所用的范数，dub为基底节点的位移增量"""
+        if self.test in ['NormDispIncr', 'RelativeNormDispIncr', 'RelativeTotalNormDispIncr']:
+            return np.sqrt((du * du).sum(axis=-1) + dub ** 2)
+        elif self.test in ['EnergyIncr', 'RelativeEnergyIncr']:
+            return 0.5 * np.abs((du * R).sum(axis=-1))  # 基底节点的不平衡力恒为0
+        return np.sqrt((R * R).sum(axis=-1))
+
+    def residual(self, P: np.ndarray, a: np.ndarray, va: np.ndarray, F: np.ndarray) -> np.ndarray:
+        """不平衡力 = 外荷载 - 惯性力 - Rayleigh阻尼力 - 恢复力"""
+        R = P - self.model.m * a - tridiagonal_dot(self.c_diag, self.c_off, va)
+        R -= F
+        R[..., :-1] += F[..., 1:]
+        return R
+
+    def coefficients(self, dt: np.ndarray) -> tuple:
+        """与步长有关的系数，步长数组不变（同一对象）时直接复用上一步的结果"""
+        if dt is not self._dt:
+            alpha, gamma, beta = self.alpha, self.gamma, self.beta
+            m = self.model.m
+            dt_ = dt[:, np.newaxis]
+            c2 = gamma / (beta * dt)
+            c3 = 1 / (beta * dt ** 2)
+            c2_, c3_ = c2[:, np.newaxis], c3[:, np.newaxis]
+            self._dt = dt
+            self._coefficients = (
+                c2_, c3_, alpha * c2_, beta * dt_, dt_ * (1 - 0.5 * gamma / beta), dt ** 2,
+                self.c_diag_tangent * c2_ + c3_ * m,  # 切线矩阵中与试探状态无关的部分
+                self.c_off_tangent * c2_
+            )
+        return self._coefficients
+
+    def analyze(self, dt: np.ndarray, active: np.ndarray) -> np.ndarray:
+        """分析一个时间步
+
+        Args:
+            dt (np.ndarray): 各条地震动的步长(R,)
+            active (np.ndarray): 各条地震动是否参与计算(R,)，不参与计算的地震动状态保持不变
+
+        Returns:
+            np.ndarray: 各条地震动是否收敛(R,)，不收敛（或不参与计算）的地震动状态保持为上一步
+        """
+        model, m = self.model, self.model.m
+        alpha, gamma, beta = self.alpha, self.gamma, self.beta
+        c2_, c3_, alpha_c2_, beta_dt_, dt_v, dt2, const_diag, const_off = self.coefficients(dt)
+        # 预测
+        u = self.u.copy()
+        v = (1 - gamma / beta) * self.v + dt_v * self.a
+        a = -self.v / beta_dt_ + (1 - 0.5 / beta) * self.a
+        ag = self.load_factor(self.time + alpha * dt)
+        P = -ag[:, np.newaxis] * m
+        # 基底（零刚度大质量节点）的响应可直接求得
+        ab = ag
+        ub = self.ub + dt * self.vb + dt2 * ((0.5 - beta) * self.ab + beta * ab)
+        vb = self.vb + dt * ((1 - gamma) * self.ab + gamma * ab)
+        dub = ub - self.ub  # 基底位移增量，仅计入第一次迭代的收敛判断
+        if alpha == 1:
+            ua, va = u, v
+        else:
+            ua = (1 - alpha) * self.u + alpha * u
+            va = (1 - alpha) * self.v + alpha * v
+        state = model.set_trial(ua, va)
+        R = self.residual(P, a, va, state[2])
+        converged = ~active
+        n_converged = self.R - np.count_nonzero(active)
+        norm0 = None
+        du_total = None
+        for i in range(self.max_iter if self.algorithm != 'Linear' else 1):
+            if i == 0 or self.algorithm != 'ModifiedNewton':
+                # 切线矩阵（三对角），楼层切线刚度与阻尼切线的组装方式相同
+                k = state[3] if alpha == 1 else alpha * state[3]
+                if state[4] is not None:
+                    k = k + alpha_c2_ * state[4]
+                diag = const_diag + k
+                diag[:, :-1] += k[:, 1:]
+                off = const_off.copy()
+                off[:, :-1] -= k[:, 1:]
+            du = solve_tridiagonal(diag, off, R)
+            if n_converged:
+                du[converged] = 0
+            u += du
+            v += c2_ * du
+            a += c3_ * du
+            if alpha != 1:
+                ua = (1 - alpha) * self.u + alpha * u
+                va = (1 - alpha) * self.v + alpha * v
+            state = model.set_trial(ua, va)
+            R = self.residual(P, a, va, state[2])
+            if self.algorithm == 'Linear' or self.test == 'FixedNumIter':
+                continue  # 完成迭代即视为收敛
+            norm = self.test_norm(du, R, dub if i == 0 else 0)
+            if self.test == 'RelativeTotalNormDispIncr':
+                du_total = du if du_total is None else du_total + du
+                norm0 = np.sqrt((du_total * du_total).sum(axis=-1) + dub ** 2)
+                norm = norm / np.where(norm0 == 0, 1, norm0)
+            elif self.test.startswith('Relative'):
+                norm0 = norm if norm0 is None else norm0
+                norm = norm / np.where(norm0 == 0, 1, norm0)
+            converged |= norm <= self.tol
+            n_converged = np.count_nonzero(converged)
+            if n_converged == self.R:
+                break
+        if self.algorithm == 'Linear' or self.test == 'FixedNumIter':
+            ok = active.copy()
+        else:
+            ok = converged & active
+        n_ok = np.count_nonzero(ok)
+        if n_ok == 0:
+            return ok
+        # 提交
+        if alpha != 1:
+            state = model.set_trial(u, v)
+        if n_ok == self.R:
+            self.strain, self.stress, self.story_force = state[:3]
+            model.commit()
+            self.u, self.v, self.a = u, v, a
+            self.ub, self.vb, self.ab = ub, vb, ab
+            self.time = self.time + dt
+        else:
+            # 仅提交收敛的地震动
+            mask = ok[:, np.newaxis]
+            self.strain, self.stress, self.story_force = [np.where(mask, new, old) for new, old in
+                zip(state[:3], (self.strain, self.stress, self.story_force))]
+            model.commit(mask)
+            self.u, self.v, self.a = np.where(mask, u, self.u), np.where(mask, v, self.v), np.where(mask, a, self.a)
+            self.ub, self.vb, self.ab = np.where(ok, ub, self.ub), np.where(ok, vb, self.vb), np.where(ok, ab, self.ab)
+            self.time = np.where(ok, self.time + dt, self.time)
+        self.base_V = -self.story_force[:, 0]
+        return ok
+
+    def collapsed(self, collapse_drift: np.ndarray) -> np.ndarray:
+        """当前（已提交）状态下各条地震动是否有楼层的层间位移达到限值(R,)"""
+        return np.any(np.abs(np.diff(self.u, prepend=0, axis=-1)) >= collapse_drift, axis=-1)
+
+
+def tridiagonal_dot(diag: np.ndarray, off: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """对称三对角矩阵与向量相乘"""
+    y = diag * x
+    y[..., :-1] += off * x[..., 1:]
+    y[..., 1:] += off * x[..., :-1]
+    return y
+
+
+def solve_tridiagonal(diag: np.ndarray, off: np.ndarray, rhs: np.ndarray) -> np.ndarray:
+    """求解R个独立的对称三对角方程组，diag、off与rhs的形状均为(R, N)，off的最后一列为0
+
+    各方程组组成一个块对角的三对角方程组（off的最后一列即为块间的副对角线元素），由一次dgtsv调用求解。
+    奇异或含非有限值（发散）的方程组的解为nan，且不影响其余方程组。
+    """
+    R, N = rhs.shape
+    if N == 1:
+        return rhs / diag
+    if R > 1 and not np.isfinite(diag.sum() + rhs.sum()):
+        # 非有限值会经由dgtsv的选主元影响相邻的方程组，因此单独剔除
+        finite = np.isfinite(diag.sum(axis=1) + rhs.sum(axis=1))
+        x = np.full(rhs.shape, np.nan)
+        if finite.any():
+            x[finite] = solve_tridiagonal(diag[finite], off[finite], rhs[finite])
+        return x
+    off_all = off.ravel()[:-1]
+    x, info = dgtsv(off_all, diag.ravel(), off_all, rhs.ravel())[3:]
+    if info > 0:
+        # 存在奇异的方程组，逐个求解
+        if R == 1:
+            return np.full(rhs.shape, np.nan)
+        return np.vstack([solve_tridiagonal(diag[[i]], off[[i]], rhs[[i]]) for i in range(R)])
+    return x.reshape(R, N)
+
+
+def path_series(ths: list[np.ndarray], dt: np.ndarray, factor: np.ndarray):
+    """与OpenSees的Path时间序列一致的线性插值（超出时程后取0）
+
+    Args:
+        ths (list[np.ndarray]): 各条地震动（长度可不同）
+        dt (np.ndarray): 各条地震动的步长(R,)
+        factor (np.ndarray): 各条地震动的放大系数(R,)
+
+    Returns:
+        函数：各条地震动的时间(R,) -> 基底加速度(R,)
+    """
+    R = len(ths)
+    L = max(len(th) for th in ths) + 1
+    # 将插值区间的起点值与增量制表（区间终点超出时程时均为0），各条地震动首尾相接
+    value1 = np.zeros((R, L))
+    incr_value = np.zeros((R, L))
+    for i, th in enumerate(ths):
+        value1[i, :len(th) - 1] = th[:-1]
+        incr_value[i, :len(th) - 1] = th[1:] - th[:-1]
+    value1, incr_value = value1.ravel(), incr_value.ravel()
+    offset = np.arange(R) * L
+    def load_factor(t: np.ndarray) -> np.ndarray:
+        incr = t / dt  # t不小于0
+        incr1 = np.floor(incr)
+        idx = offset + np.minimum(incr1, L - 1).astype(int)
+        return factor * (value1[idx] + incr_value[idx] * (incr - incr1))
+    return load_factor
+
+
+def rayleigh_coefficients(
+        omg: list[float],
+        mode_num: int,
+        has_damping: bool,
+        zeta_mode: tuple[int, int],
+        zeta: tuple[float, float]
+    ) -> tuple[float, float]:
+    """计算Rayleigh阻尼系数a、b"""
+    if not has_damping:
+        return 0, 0
+    z1, z2 = zeta
+    if mode_num >= 2:
+        # MDOF
+        w1, w2 = omg[zeta_mode[0] - 1], omg[zeta_mode[1] - 1]
+        a = 2 * w1 * w2 / (w2 ** 2 - w1 ** 2) * (w2 * z1 - w1 * z2)
+        b = 2 * w1 * w2 / (w2 ** 2 - w1 ** 2) * (z2 / w1 - z1 / w2)
+    else:
+        # SDOF
+        w1 = omg[0]
+        a = 0
+        b = 2 * z1 / w1
+    return a, b
+
+
+def build_solver(
+        N: int,
+        m: list,
+        mat_lib: list[list],
+        story_mat: list[list],
+        mode_num: int,
+        has_damping: bool,
+        zeta_mode: tuple[int, int],
+        zeta: tuple[float, float],
+        setting: list,
+        path: str,
+        record_mode: bool,
+        myprint
+    ) -> tuple[NewmarkSolver, list[float]]:
+    """建立模型，进行模态分析并计算Rayleigh阻尼，返回求解器（尚未指定地震动）与周期"""
+    if mode_num >= 5:
+        mode_num = 5
+    model = ShearBuilding(N, m, mat_lib, story_mat)
+
+    # Eigen analysis
+    lambda_, phi = model.eigen(mode_num)
+    omg = [i ** 0.5 for i in lambda_.tolist()]
+    T = [2 * pi / i for i in omg]
+    myprint('')
+    for i, Ti in enumerate(T):
+        myprint(f'T{i + 1} = {Ti}')
+    if not os.path.exists(f'{path}/temp_NLMDOF_results'):
+        os.makedirs(f'{path}/temp_NLMDOF_results')
+    if record_mode:
+        np.savetxt(f'{path}/temp_NLMDOF_results/Periods.txt', T)
+        for i in range(1, mode_num + 1):
+            np.savetxt(f'{path}/temp_NLMDOF_results/mode_{i}.txt', phi[:, i - 1][np.newaxis])
+
+    # Rayleigh damping
+    a, b = rayleigh_coefficients(omg, mode_num, has_damping, zeta_mode, zeta)
+    if has_damping:
+        myprint('阻尼: a =', a, ' b =', b)
+    else:
+        myprint('无阻尼')
+
+    solver = NewmarkSolver(model, setting[5], (setting[10], setting[11]), setting[3], setting[8], setting[9],
+                           setting[4], a, b, None)
+    return solver, T
+
+
+def modes_NP(N: int, m: list, mat_lib: list[list], story_mat: list[list], mode_num: int) -> ModeResults:
+    """仅进行模态分析，返回周期与振型（不输出周期与振型文件，与`build_solver`输出的文件相同）"""
+    mode_num = min(mode_num, 5)
+    lambda_, phi = ShearBuilding(N, m, mat_lib, story_mat).eigen(mode_num)
+    T = [2 * pi / i ** 0.5 for i in lambda_.tolist()]
+    return ModeResults(T, [phi[:, i] for i in range(mode_num)])
+
+
+def time_history_analysis(
+        solver: NewmarkSolver,
+        duration: np.ndarray,
+        init_dt: np.ndarray,
+        setting: list,
+        myprint,
+        collapse_drift: np.ndarray | None=None,
+        gm_names: list[str] | None=None
+    ) -> tuple[np.ndarray, list[dict[str, np.ndarray]]]:
+    """时程分析，各条地震动分别按`run_OS_py`的策略调整步长
+
+    某条地震动不收敛时仅该地震动减小步长（其余地震动不受影响），减小至最小步长仍不收敛时仅该地震动终止分析。
+
+    Args:
+        duration (np.ndarray): 各条地震动的持时(R,)
+        init_dt (np.ndarray): 各条地震动的初始步长(R,)
+        collapse_drift (np.ndarray | None, optional): 各层的层间位移限值(mm)，任一层达到限值时提前终止该地震动的分析. Defaults to None.
+        gm_names (list[str] | None, optional): 各条地震动名，同时计算多条地震动时用于区分打印信息. Defaults to None.
+
+    Returns:
+        tuple[np.ndarray, list[dict[str, np.ndarray]]]: 各条地震动是否完成（1为完成，0为不收敛，3为倒塌），
+        以及各条地震动各分析步的响应（第一维为分析步）
+    """
+    R = solver.R
+    prefix = [''] * R if R == 1 or gm_names is None else [f'[{name}] ' for name in gm_names]
+    rec = {name: [] for name in ['t', 'base_V', 'base_a', 'base_v', 'base_u',
+                                 'floor_a', 'floor_v', 'floor_u', 'stress', 'strain']}
+    rec_ok = []  # 各分析步中收敛（即记录了该步响应）的地震动
+    factor = np.ones(R)
+    max_factor = setting[12]
+    min_factor = setting[13]
+    dt_ratio = setting[14]
+    done = np.zeros(R, dtype=int)
+    active = solver.time < duration
+    done[~active] = 1
+    step = init_dt * factor * dt_ratio  # 仅在factor改变时重新计算，使求解器可复用与步长有关的系数
+    while np.count_nonzero(active):
+        dt = step
+        last = active & (solver.time + step > duration)
+        if np.count_nonzero(last):
+            dt = np.where(last, duration - solver.time, step)
+        ok = solver.analyze(dt, active)
+        n_ok = np.count_nonzero(ok)
+        n_failed = np.count_nonzero(active) - n_ok
+        if n_ok:
+            # current step finished
+            rec_ok.append(ok)
+            rec['t'].append(solver.time)
+            rec['base_V'].append(solver.base_V)
+            rec['base_a'].append(solver.ab)
+            rec['base_v'].append(solver.vb)
+            rec['base_u'].append(solver.ub)
+            rec['floor_a'].append(solver.a)
+            rec['floor_v'].append(solver.v)
+            rec['floor_u'].append(solver.u)
+            rec['stress'].append(solver.stress)
+            rec['strain'].append(solver.strain)
+            if collapse_drift is not None:
+                collapsed = ok & solver.collapsed(collapse_drift)
+                if np.count_nonzero(collapsed):
+                    for i in np.flatnonzero(collapsed):
+                        myprint(f'{prefix[i]}--- Story drift exceeds the collapse limit at time {solver.time[i]}. ---')
+                    done[collapsed] = 3
+                    active &= ~collapsed  # collapsed
+                    ok = ok & ~collapsed
+            enlarge = ok & (factor != max_factor)  # 即min(factor * 2, max_factor) != factor
+            if np.count_nonzero(enlarge):
+                factor = np.where(enlarge, np.minimum(factor * 2, max_factor), factor)
+                step = init_dt * factor * dt_ratio
+                for i in np.flatnonzero(enlarge):
+                    myprint(f'{prefix[i]}--- Enlarge factor to {factor[i]} ---')
+            finished = ok & (solver.time >= duration)
+            if np.count_nonzero(finished):
+                done[finished] = 1
+                active &= ~finished  # analysis finished
+        if n_failed:
+            # current step did not converge
+            failed = active & ~ok
+            factor = np.where(failed, factor / 4, factor)
+            step = init_dt * factor * dt_ratio
+            for i in np.flatnonzero(failed):
+                if factor[i] < min_factor:
+                    # analysis failed
+                    myprint(f'{prefix[i]}--- factor is less than the minimum allowed ({factor[i]} < {min_factor}). ---')
+                    myprint(f'{prefix[i]}--- Current time: {solver.time[i]}, total time: {duration[i]}. ---')
+                    myprint(f'{prefix[i]}--- The analysis did not converge. ---')
+                    active[i] = False
+                else:
+                    # reduce factor
+                    myprint(f'{prefix[i]}Current step did not converge, reduce factor to {factor[i]}.')
+    n_step = len(rec_ok)
+    n_ele = solver.model.n_ele
+    N = solver.model.N
+    rec_ok = np.array(rec_ok, dtype=bool).reshape(n_step, R)
+    for name in ['t', 'base_V', 'base_a', 'base_v', 'base_u']:
+        rec[name] = np.array(rec[name]).reshape(n_step, R)
+    for name in ['floor_a', 'floor_v', 'floor_u']:
+        rec[name] = np.array(rec[name]).reshape(n_step, R, N)
+    for name in ['stress', 'strain']:
+        rec[name] = np.array(rec[name]).reshape(n_step, R, n_ele)
+    results = [{name: value[rec_ok[:, i], i] for name, value in rec.items()} for i in range(R)]
+    return done, results
+
+
+def analyze_ground_motions(
+        solver: NewmarkSolver,
+        ths: list[np.ndarray],
+        factors: list[float],
+        dts: list[float],
+        setting: list,
+        myprint,
+        collapse_drift: np.ndarray | None=None,
+        gm_names: list[str] | None=None
+    ) -> tuple[list[Literal[0, 1, 3]], list[Results]]:
+    """同时计算多条地震动（长度与步长可不同），返回各条地震动的计算状态与计算结果
+
+    各条地震动组成(R, N)的状态数组一同积分，每条地震动的步长序列、持时与结果均与单独计算时相同。
+    """
+    dt = np.array(dts, dtype=float)
+    solver.load_factor = path_series(ths, dt, np.array(factors, dtype=float))
+    solver.revert_to_start(len(ths))
+    duration = dt * (np.array([len(th) for th in ths]) - 1)
+    done, results = time_history_analysis(solver, duration, dt, setting, myprint, collapse_drift, gm_names)
+    return done.tolist(), [pack_results(results_i) for results_i in results]
+
+
+def pack_results(results: dict[str, np.ndarray]) -> Results:
+    """将单条地震动各分析步的响应（楼层与单元的响应为二维数组）整理为Results"""
+    t = results['t']
+    mat = np.empty((len(t), 2 * results['stress'].shape[-1]))
+    mat[:, 0::2] = results['stress']
+    mat[:, 1::2] = results['strain']
+    return Results(t, results['base_a'], results['base_v'], results['base_u'], results['base_V'],
+                   results['floor_a'], results['floor_v'], results['floor_u'], mat)
+
+
+def save_results(result_path: str, gm_name: str, results: Results):
+    """按`run_OS_py`中recorder的格式输出单条地震动的结果文件"""
+    savetxt(f'{result_path}/{gm_name}_base_reaction.txt', np.column_stack((results.t, results.base_V)), RECORDER_FMT)
+    savetxt(f'{result_path}/{gm_name}_base_acc.txt', results.base_a, RECORDER_FMT)
+    savetxt(f'{result_path}/{gm_name}_base_vel.txt', results.base_v, RECORDER_FMT)
+    savetxt(f'{result_path}/{gm_name}_base_disp.txt', results.base_u, RECORDER_FMT)
+    savetxt(f'{result_path}/{gm_name}_floor_acc.txt', results.ra, RECORDER_FMT)
+    savetxt(f'{result_path}/{gm_name}_floor_vel.txt', results.rv, RECORDER_FMT)
+    savetxt(f'{result_path}/{gm_name}_floor_disp.txt', results.ru, RECORDER_FMT)
+    savetxt(f'{result_path}/{gm_name}_material.txt', results.mat, RECORDER_FMT)
+
+
+def output_results(path: str, gm_name: str, results: Results, recorder: Literal['file', 'memory', 'binary']) -> Results | None:
+    """按recorder输出单条地震动的结果，仅recorder为'memory'时返回结果"""
+    if recorder == 'file':
+        save_results(f'{path}/temp_NLMDOF_results', gm_name, results)
+    elif recorder == 'binary':
+        results.to_binary(gm_name, path)
+    return results if recorder == 'memory' else None
+
+
+def run_NP(
+        N: int,
+        m: list,
+        mat_lib: list[list],
+        story_mat: list[list],
+        th: list,
+        SF: float | int,
+        dt: float,
+        mode_num: int,
+        has_damping: bool,
+        zeta_mode: tuple[int, int],
+        zeta: tuple[float, float],
+        setting: list,
+        path: str,
+        gm_name: str,
+        g: float,
+        print_result=False,
+        record_mode=True,
+        recorder: Literal['file', 'memory', 'binary']='file',
+        collapse_drift: float | list[float] | None=None
+    ) -> tuple[Literal[0, 1, 2, 3], list[float], list[list], Results | None]:
+    """使用NumPy求解剪切层模型（仅支持内置材料），参数、输出文件与返回值均与`run_OS_py`相同
+
+    积分方法仅支持Newmark与HHT，迭代算法中Linear与ModifiedNewton按OpenSees处理，
+    其余均按Newton法处理；constraints、numberer与system设置不起作用。
+    单条地震动时每步的耗时主要为数十次小数组的NumPy调用，计算速度慢于`run_OS_py`（见`__main__`），
+    因此主要用于无OpenSees环境时的计算与校核；多条地震动应使用`run_NP_batch`同时计算。
+
+    Returns:
+        tuple[Literal[0, 1, 2, 3], list[float], list[list], Results | None]:
+        (1) 1: 分析完成，0: 分析不收敛，2: 材料错误，3: 倒塌（提前终止）
+        (2) 周期值
+        (3) 各振型模态
+        (4) 计算结果（仅recorder为'memory'时返回，否则为None）
+    """
+    def myprint(*str_):
+        if print_result:
+            print(*str_)
+
+    myprint('========== 分析开始（NumPy） ==========')
+    myprint(f'层数：{N}')
+    myprint(f'质量：{m}')
+    myprint(f'材料：{mat_lib}')
+    myprint(f'材料指派：{story_mat}')
+    myprint(f'地震动步长：{dt}')
+    myprint(f'最大可选模态数：{mode_num}')
+    myprint(f'是否考虑阻尼：{has_damping}')
+    myprint(f'阻尼振型选用：{zeta_mode}')
+    myprint(f'阻尼比：{zeta}')
+    myprint(f'求解设置：{setting}')
+
+    if not check_NP_mat(mat_lib):
+        print(f'【run_NP】NumPy求解器不支持所定义的材料：{mat_lib}')
+        return 2, None, None, None
+    solver, T = build_solver(N, m, mat_lib, story_mat, mode_num, has_damping, zeta_mode, zeta,
+                             setting, path, record_mode, myprint)
+
+    # Time history analysis
+    if collapse_drift is not None:
+        collapse_drift = np.broadcast_to(np.asarray(collapse_drift, dtype=float), (N,))
+    done, results = analyze_ground_motions(solver, [np.asarray(th, dtype=float)], [SF * g], [dt],
+                                           setting, myprint, collapse_drift)
+
+    # recorder
+    results = output_results(path, gm_name, results[0], recorder)
+    myprint('========== 分析结束 ==========')
+
+    return done[0], T, solver.model.element_tags, results
+
+
+def run_NP_batch(
+        N: int,
+        m: list,
+        mat_lib: list[list],
+        story_mat: list[list],
+        ths: list[list],
+        SFs: list[float],
+        dts: list[float],
+        mode_num: int,
+        has_damping: bool,
+        zeta_mode: tuple[int, int],
+        zeta: tuple[float, float],
+        setting: list,
+        path: str,
+        gm_names: list[str],
+        g: float,
+        print_result=False,
+        record_mode=True,
+        recorder: Literal['file', 'memory', 'binary']='file',
+        collapse_drift: float | list[float] | None=None
+    ) -> tuple[list[Literal[0, 1, 2, 3]], list[float], list[list], list[Results] | None]:
+    """使用NumPy同时求解多条地震动，输出文件与各条地震动的计算状态均与逐条调用`run_NP`相同
+
+    各条地震动（已由调用方补充自由振动段，见`get_py_args`）组成(R, N)的状态数组一同积分，每步的NumPy调用由所有地震动分摊，
+    地震动越多加速越明显（见`__main__`）。各条地震动的步长与收敛判断相互独立：
+    某条地震动不收敛时仅该地震动减小步长或终止分析，其余地震动不受影响。
+    地震动长度相差较大时，已完成的地震动仍占用计算量，因此宜将长度相近的地震动一同计算。
+
+    Args:
+        ths (list[list]): 各条地震动（含自由振动段，长度可不同）
+        SFs (list[float]): 各条地震动的放大倍数
+        dts (list[float]): 各条地震动的步长（可不同）
+        gm_names (list[str]): 各条地震动名
+        其余参数与`run_NP`相同
+
+    Returns:
+        tuple[list[Literal[0, 1, 2, 3]], list[float], list[list], list[Results] | None]:
+        各条地震动的计算状态，周期值，各振型模态，各条地震动的计算结果（仅recorder为'memory'时返回）
+    """
+    def myprint(*str_):
+        if print_result:
+            print(*str_)
+
+    R = len(ths)
+    myprint(f'========== 分析开始（NumPy，{R}条地震动） ==========')
+    myprint(f'层数：{N}')
+    myprint(f'质量：{m}')
+    myprint(f'材料：{mat_lib}')
+    myprint(f'材料指派：{story_mat}')
+    myprint(f'地震动步长：{dts}')
+    myprint(f'最大可选模态数：{mode_num}')
+    myprint(f'是否考虑阻尼：{has_damping}')
+    myprint(f'阻尼振型选用：{zeta_mode}')
+    myprint(f'阻尼比：{zeta}')
+    myprint(f'求解设置：{setting}')
+
+    if not check_NP_mat(mat_lib):
+        print(f'【run_NP_batch】NumPy求解器不支持所定义的材料：{mat_lib}')
+        return [2] * R, None, None, None
+    solver, T = build_solver(N, m, mat_lib, story_mat, mode_num, has_damping, zeta_mode, zeta,
+                             setting, path, record_mode, myprint)
+
+    # Time history analysis
+    if collapse_drift is not None:
+        collapse_drift = np.broadcast_to(np.asarray(collapse_drift, dtype=float), (N,))
+    done_list, results = analyze_ground_motions(solver, [np.asarray(th, dtype=float) for th in ths],
+                                                [SF * g for SF in SFs], dts, setting, myprint, collapse_drift, gm_names)
+
+    # recorder
+    results_list = [output_results(path, gm_names[i], results[i], recorder) for i in range(R)]
+    myprint('========== 分析结束 ==========')
+
+    return done_list, T, solver.model.element_tags, results_list if recorder == 'memory' else None
+
+
+if __name__ == '__main__':
+    # 与run_OS_py对比计算速度与结果（需可导入core.opensees）
+    # 单条地震动时对比输出文件（均为6位有效数字），相对误差为0表示两者结果在该精度下相同；
+    # 同时计算时对比OpenSeesPy的二进制结果（双精度）与NumPy直接返回的结果
+    import sys
+    import time
+    from pathlib import Path
+    sys.path.append(Path(__file__).parent.parent.as_posix())
+    import core
+    N = 3
+    m = [2, 1, 1]
+    mat_lib = [['Steel01', 1, 3000, 1500, 0.02], ['Steel01', 2, 2000, 1000, 0.02]]
+    story_mat = [[1], [2], [2]]
+    mode_num = 3
+    has_damping = True
+    zeta_mode = (1, 2)
+    zeta = (0.05, 0.05)
+    setting = ['Transformation', 'Plain', 'BandGeneral', 'NormUnbalance', 'Newton', 'Newmark', '', '', 1e-5, 60, 0.5, 0.25, 1, 1e-6, 1]
+    path = 'temp'
+    g = 9800
+    SF_list = [0.5, 1, 2, 4]  # 多条地震动同时计算时，每条地震动按各放大倍数分别计算（类似IDA）
+    names, ths, dts = [], [], []
+    for file in sorted((Path(__file__).parent.parent / 'data').glob('*.dat')):
+        data = np.loadtxt(file)
+        names.append(file.stem)
+        ths.append(data[:, 1])
+        dts.append(round(data[1, 0] - data[0, 0], 6))
+
+    # 单条地震动
+    time_OS, time_NP = 0, 0
+    for name, th, dt in zip(names, ths, dts):
+        t0 = time.perf_counter()
+        core.run_OS_py(N, m, mat_lib, story_mat, th, 1, dt, mode_num, has_damping, zeta_mode, zeta, setting, path, f'{name}_OS', g)
+        t1 = time.perf_counter()
+        run_NP(N, m, mat_lib, story_mat, th, 1, dt, mode_num, has_damping, zeta_mode, zeta, setting, path, f'{name}_NP', g)
+        t2 = time.perf_counter()
+        time_OS += t1 - t0
+        time_NP += t2 - t1
+        ru_OS = core.Results.from_file(f'{name}_OS', path).ru
+        ru_NP = core.Results.from_file(f'{name}_NP', path).ru
+        err = np.max(np.abs(ru_OS - ru_NP)) / np.max(np.abs(ru_OS))
+        print(f'{name:<16}OpenSeesPy: {t1 - t0:.3f} s, NumPy: {t2 - t1:.3f} s, '
+              f'加速比: {(t1 - t0) / (t2 - t1):.2f}, 相对位移最大相对误差: {err:.2e}')
+    print(f'单条计算合计  OpenSeesPy: {time_OS:.3f} s, NumPy: {time_NP:.3f} s, 加速比: {time_OS / time_NP:.2f}')
+
+    # 多条地震动同时计算，两者均采用各自最快的结果输出方式（见`default_recorder`）
+    time_OS = {SF: 0 for SF in SF_list}
+    results_OS = {}
+    for SF in SF_list:
+        for name, th, dt in zip(names, ths, dts):
+            t0 = time.perf_counter()
+            core.run_OS_py(N, m, mat_lib, story_mat, th, SF, dt, mode_num, has_damping, zeta_mode, zeta,
+                           setting, path, f'{name}_{SF}', g, recorder=core.default_recorder('py'))
+            time_OS[SF] += time.perf_counter() - t0
+            results_OS[f'{name}_{SF}'] = core.Results.from_binary(f'{name}_{SF}', path)
+    for SFs in [[1], SF_list]:
+        gm_names = [f'{name}_{SF}' for SF in SFs for name in names]
+        t0 = time.perf_counter()
+        done_list, _, _, results_list = run_NP_batch(N, m, mat_lib, story_mat, ths * len(SFs), [SF for SF in SFs for _ in names],
+                                                     dts * len(SFs), mode_num, has_damping, zeta_mode, zeta, setting, path,
+                                                     gm_names, g, recorder=core.default_recorder('np'))
+        time_batch = time.perf_counter() - t0
+        time_OS_SFs = sum(time_OS[SF] for SF in SFs)
+        err = max(np.max(np.abs(results_OS[name].ru - results.ru)) / np.max(np.abs(results_OS[name].ru))
+                  for name, results in zip(gm_names, results_list))
+        print(f'同时计算{len(gm_names)}条  OpenSeesPy（逐条）: {time_OS_SFs:.3f} s, NumPy: {time_batch:.3f} s, '
+              f'加速比: {time_OS_SFs / time_batch:.2f}, 完成: {done_list.count(1)}/{len(done_list)}, 相对位移最大相对误差: {err:.2e}')
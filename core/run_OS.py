@@ -1,10 +1,390 @@
 import os
 import traceback
+from copy import deepcopy
 from math import pi
 from typing import Literal
 
 import numpy as np
 from core import opensees as ops
+from core.Results import Results, ModeResults
+from core.result_cache import GMCache
+
+
+def is_collapsed(ru: list[float], collapse_drift: list[float]) -> bool:
+    """是否有楼层的层间位移达到限值"""
+    u_below = 0.0
+    for u, limit in zip(ru, collapse_drift):
+        if abs(u - u_below) >= limit:
+            return True
+        u_below = u
+    return False
+
+
+def default_recorder(solver: Literal['py', 'np', 'tcl']) -> Literal['memory', 'binary']:
+    """求解器最快的结果输出方式
+
+    NumPy求解器的计算结果本身即为数组，直接返回（'memory'）；OpenSeesPy与tcl求解器使用OpenSees的二进制recorder，
+    由调用方读取（'binary'，可以内存映射方式读取，见`Results.from_binary`）。
+    """
+    return 'memory' if solver == 'np' else 'binary'
+
+
+def build_model(N: int, m: list, mat_lib: list[list], story_mat: list[list]) -> tuple[list[int], list[list], int, int]:
+    """建立剪切层模型的节点、材料与单元（不含地震动、阻尼与分析设置）
+
+    Returns:
+        tuple[list[int], list[list], int, int]: 楼层节点编号、各楼层包含的单元编号、
+        下一个可用的节点编号与材料编号（材料定义出错时抛出异常）
+    """
+    global _session
+    _session = None  # 原有的模型域被清除
+    ops.wipe()
+    ops.model('basic', '-ndm', 2, '-ndf', 3)
+
+    # node
+    ops.node(1, 0, 0)  # base node
+    ops.fix(1, 1, 1, 1)
+    story_nodes = []
+    for i in range(N):
+        ops.node(i + 2, 0, 0, '-mass', m[i], 0, 0)
+        ops.fix(i + 2, 0, 1, 1)
+        story_nodes.append(i + 2)
+    nodeTag = i + 3
+
+    # material
+    for i, mat in enumerate(mat_lib):
+        ops.uniaxialMaterial(*mat)
+    matTag = i + 2
+
+    # element
+    element_tags: list[list] = []  # 各楼层包含的单元编号 [[1, 2], [3], [4, 5], ...]
+    current_ele_tag = 1
+    for i in range(N):
+        element_tags.append([])
+        for j in range(len(story_mat[i])):
+            ops.element('zeroLength', current_ele_tag, i + 1, i + 2, '-mat', story_mat[i][j], '-dir', 1, '-doRayleigh', 1)
+            element_tags[i].append(current_ele_tag)
+            current_ele_tag += 1
+    return story_nodes, element_tags, nodeTag, matTag
+
+
+_eigen_cache: dict[str, tuple[list[float], list[list[float]]]] = {}  # 本进程中各模型的圆频率与振型（见`modal_analysis`）
+EIGEN_CACHE_SIZE = 16
+
+
+def modal_analysis(
+        N: int,
+        m: list,
+        mat_lib: list[list],
+        story_mat: list[list],
+        mode_num: int,
+        story_nodes: list[int] | None=None
+    ) -> tuple[list[float], list[list[float]]]:
+    """模态分析，同一进程中相同模型（质量、材料与模态数相同）只计算一次
+
+    Args:
+        story_nodes (list[int] | None, optional): 模型已建立时传入楼层节点编号，否则建立模型，分析后清除. Defaults to None.
+
+    Returns:
+        tuple[list[float], list[list[float]]]: 各阶圆频率、振型（楼层节点的水平分量）
+    """
+    mode_num = min(mode_num, 5)
+    key = repr((N, m, mat_lib, story_mat, mode_num))
+    if key in _eigen_cache:
+        return _eigen_cache[key]
+    wipe = story_nodes is None
+    if wipe:
+        story_nodes, *_ = build_model(N, m, mat_lib, story_mat)
+    solver = '-genBandArpack' if N > 5 else '-fullGenLapack'
+    lambda_ = ops.eigen(solver, mode_num)
+    omg = [i ** 0.5 for i in lambda_]
+    modes = [[ops.nodeEigenvector(node, i, 1) for node in story_nodes] for i in range(1, mode_num + 1)]
+    if wipe:
+        ops.wipe()
+    if len(_eigen_cache) >= EIGEN_CACHE_SIZE:
+        _eigen_cache.pop(next(iter(_eigen_cache)))
+    _eigen_cache[key] = (omg, modes)
+    return omg, modes
+
+
+def eigen_OS_py(N: int, m: list, mat_lib: list[list], story_mat: list[list], mode_num: int) -> list[float]:
+    """仅进行模态分析，返回周期（可传入`run_OS_py`的periods参数，以免重复进行模态分析）"""
+    omg, _ = modal_analysis(N, m, mat_lib, story_mat, mode_num)
+    return [2 * pi / i for i in omg]
+
+
+def modes_OS_py(N: int, m: list, mat_lib: list[list], story_mat: list[list], mode_num: int) -> ModeResults:
+    """仅进行模态分析，返回周期与振型（不输出周期与振型文件）"""
+    omg, modes = modal_analysis(N, m, mat_lib, story_mat, mode_num)
+    return ModeResults([2 * pi / i for i in omg], [np.array(mode) for mode in modes])
+
+
+class OpenSeesSession:
+    """可复用的OpenSees模型域：节点、材料、单元、模态分析、Rayleigh阻尼与分析设置只建立一次，
+    每条地震动计算前将模型域恢复至初始状态（`reset`），删除上一条地震动的荷载模式、时程与recorder后
+    重新施加地震动，适用于同一模型计算多条地震动（或同一地震动的多个调幅等级）。
+
+    OpenSees在每个进程中只有一个模型域，同一进程同时只能使用一个`OpenSeesSession`，
+    调用`wipe`（或建立其他模型）后本实例失效。
+    """
+    def __init__(
+            self,
+            N: int,
+            m: list,
+            mat_lib: list[list],
+            story_mat: list[list],
+            mode_num: int,
+            has_damping: bool,
+            zeta_mode: tuple[int, int],
+            zeta: tuple[float, float],
+            setting: list,
+            path: str,
+            g: float,
+            print_result=False,
+            periods: list[float] | None=None
+        ):
+        """参数与`run_OS_py`相同，periods不为None时不进行模态分析（不可输出振型文件），
+        否则模态分析结果在同一进程中按模型缓存（见`modal_analysis`）
+
+        材料参数不正确时抛出异常。
+        """
+        self.print_result = print_result
+        self.myprint('========== 建立模型 ==========')
+        self.myprint(f'层数：{N}')
+        self.myprint(f'质量：{m}')
+        self.myprint(f'材料：{mat_lib}')
+        self.myprint(f'材料指派：{story_mat}')
+        self.myprint(f'最大可选模态数：{mode_num}')
+        self.myprint(f'是否考虑阻尼：{has_damping}')
+        self.myprint(f'阻尼振型选用：{zeta_mode}')
+        self.myprint(f'阻尼比：{zeta}')
+        self.myprint(f'求解设置：{setting}')
+        self.N = N
+        self.m = m
+        self.mode_num = min(mode_num, 5)
+        self.setting = setting
+        self.path = path
+        self.g = g
+        self.n_runs = 0  # 已计算的地震动数
+        self._th_key = None  # 上一次计算的地震动的哈希值（见`GMCache.key`）及其列表形式（同一条地震动重复计算时不再转换）
+        self._th_values: list[float] = []
+
+        story_nodes, self.element_tags, nodeTag, matTag = build_model(N, m, mat_lib, story_mat)
+        self.floor_nodes = story_nodes
+        all_node_tags = [1] + story_nodes
+        self.all_element_tags = [tag for tags in self.element_tags for tag in tags]  # 所有单元编号 [1, 2, 3, 4, 5]
+        current_ele_tag = self.all_element_tags[-1] + 1
+
+        # Eigen analysis
+        self.modes: list[list[float]] | None = None  # 各阶振型（楼层节点的水平分量）
+        if periods is None:
+            omg, self.modes = modal_analysis(N, m, mat_lib, story_mat, self.mode_num, story_nodes)
+            self.T = [2 * pi / i for i in omg]
+        else:
+            self.T = list(periods[:self.mode_num])
+            omg = [2 * pi / Ti for Ti in self.T]
+        self.myprint('')
+        for i, Ti in enumerate(self.T):
+            self.myprint(f'T{i + 1} = {Ti}')
+
+        # 用于读取绝对响应的零刚度SDOF（模态分析后建立，以免影响特征值）
+        self.large_m = max(m) * 1e6
+        ops.node(nodeTag, 0, 0, 0)
+        ops.node(nodeTag + 1, 0, 0, 0)
+        ops.fix(nodeTag, 1, 1, 1)
+        ops.fix(nodeTag + 1, 0, 1, 1)
+        ops.mass(nodeTag + 1, self.large_m, 0, 0)
+        self.static_node = nodeTag + 1  # 静止节点
+        ops.uniaxialMaterial('Elastic', matTag, 0)
+        ops.element('zeroLength', current_ele_tag, nodeTag, nodeTag + 1, '-mat', matTag, '-dir', 1, '-doRayleigh', 0)
+
+        # Rayleigh damping
+        if has_damping:
+            z1, z2 = zeta
+            if self.mode_num >= 2:
+                # MDOF
+                w1, w2 = omg[zeta_mode[0] - 1], omg[zeta_mode[1] - 1]
+                a = 2 * w1 * w2 / (w2 ** 2 - w1 ** 2) * (w2 * z1 - w1 * z2)
+                b = 2 * w1 * w2 / (w2 ** 2 - w1 ** 2) * (z2 / w1 - z1 / w2)
+            elif self.mode_num == 1:
+                # SDOF
+                w1 = omg[0]
+                a = 0
+                b = 2 * z1 / w1
+            self.myprint('阻尼: a =', a, ' b =', b)
+            # ops.rayleigh(a, 0, b, 0)
+            ops.region(1, '-ele', *self.all_element_tags, '-rayleigh', a, 0, b, 0)
+            ops.region(1, '-node', *all_node_tags, '-rayleigh', a, 0, b, 0)
+        else:
+            self.myprint('无阻尼')
+
+        # Analysis
+        if setting[6]:
+            ops.constraints(setting[0], setting[6], setting[7])
+        else:
+            ops.constraints(setting[0])
+        ops.numberer(setting[1])
+        ops.system(setting[2])
+        ops.test(setting[3], setting[8], setting[9])
+        ops.algorithm(setting[4])
+        ops.integrator(setting[5], setting[10], setting[11])
+        ops.analysis('Transient')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def myprint(self, *str_):
+        if self.print_result:
+            print(*str_)
+
+    def close(self):
+        global _session
+        if _session is not None and _session[1] is self:
+            _session = None
+        ops.wipeAnalysis()
+        ops.wipe()
+
+    @property
+    def mode_results(self) -> ModeResults:
+        """周期与振型"""
+        if self.modes is None:
+            raise ValueError('【OpenSeesSession, mode_results】未进行模态分析，无法获取振型！')
+        return ModeResults(list(self.T), [np.array(mode) for mode in self.modes])
+
+    def save_modes(self):
+        """输出周期与振型文件"""
+        if self.modes is None:
+            raise ValueError('【OpenSeesSession, save_modes】未进行模态分析，无法输出振型！')
+        np.savetxt(f'{self.path}/temp_NLMDOF_results/Periods.txt', self.T)
+        for i, mode in enumerate(self.modes, 1):
+            np.savetxt(f'{self.path}/temp_NLMDOF_results/mode_{i}.txt', np.array(mode)[np.newaxis])
+
+    def reset(self):
+        """恢复至初始状态，并删除上一条地震动的荷载模式、时程与recorder"""
+        ops.reset()
+        ops.setTime(0.0)
+        for i in range(self.N + 1):
+            ops.remove('loadPattern', i + 1)
+        ops.remove('timeSeries', 1)
+        ops.remove('recorders')
+
+    def run(
+            self,
+            th: list,
+            SF: float | int,
+            dt: float,
+            gm_name: str,
+            record_mode=False,
+            recorder: Literal['file', 'memory', 'binary']='file',
+            collapse_drift: float | list[float] | None=None
+        ) -> tuple[Literal[0, 1, 3], Results | None]:
+        """计算单条地震动，参数与返回值见`run_OS_py`
+
+        Returns:
+            tuple[Literal[0, 1, 3], Results | None]: 计算状态与计算结果（仅recorder为'memory'时返回）
+        """
+        N, m, path, setting = self.N, self.m, self.path, self.setting
+        if self.n_runs:
+            self.reset()
+        self.n_runs += 1
+        self.myprint(f'========== 分析开始：{gm_name} ==========')
+        self.myprint(f'地震动步长：{dt}')
+        if not os.path.exists(f'{path}/temp_NLMDOF_results'):
+            os.makedirs(f'{path}/temp_NLMDOF_results')
+        if record_mode:
+            self.save_modes()
+
+        # ground motion
+        # 展开为Python float的列表比直接展开numpy数组快约一倍（10万点约4 ms与8.5 ms），且比-filePath读取文本文件快得多；
+        # 缩放系数由-factor传入，同一条地震动以不同缩放系数重复计算时（如IDA）只转换一次；
+        # 按数据内容而非对象判断是否为同一条地震动，调用方原地修改数组后不会沿用旧值
+        th_key = GMCache.key(th)
+        if th_key != self._th_key:
+            self._th_key, self._th_values = th_key, np.asarray(th, dtype=float).tolist()
+        ops.timeSeries('Path', 1, '-dt', dt, '-values', *self._th_values, '-factor', SF * self.g)
+        for i in range(N):
+            ops.pattern('Plain', i + 1, 1, '-fact', -m[i])  # D'Alembert's principle
+            ops.load(self.floor_nodes[i], 1, 0, 0)
+        ops.pattern('Plain', N + 1, 1, '-fact', self.large_m)
+        ops.load(self.static_node, 1, 0, 0)
+
+        # recorder
+        floor_nodes = self.floor_nodes
+        static_node = self.static_node
+        all_element_tags = self.all_element_tags
+        if recorder in ('file', 'binary', 'memory'):
+            fmt, ext = ('-file', 'txt') if recorder == 'file' else ('-binary', 'bin')
+            # 1 base node
+            ops.recorder('Node', fmt, f'{path}/temp_NLMDOF_results/{gm_name}_base_reaction.{ext}', '-time', '-node', 1, '-dof', 1, 'reaction')
+            ops.recorder('Node', fmt, f'{path}/temp_NLMDOF_results/{gm_name}_base_acc.{ext}', '-node', static_node, '-dof', 1, 'accel')
+            ops.recorder('Node', fmt, f'{path}/temp_NLMDOF_results/{gm_name}_base_vel.{ext}', '-node', static_node, '-dof', 1, 'vel')
+            ops.recorder('Node', fmt, f'{path}/temp_NLMDOF_results/{gm_name}_base_disp.{ext}', '-node', static_node, '-dof', 1, 'disp')
+            # 2 floor nodes
+            ops.recorder('Node', fmt, f'{path}/temp_NLMDOF_results/{gm_name}_floor_acc.{ext}', '-node', *floor_nodes, '-dof', 1, 'accel')
+            ops.recorder('Node', fmt, f'{path}/temp_NLMDOF_results/{gm_name}_floor_vel.{ext}', '-node', *floor_nodes, '-dof', 1, 'vel')
+            ops.recorder('Node', fmt, f'{path}/temp_NLMDOF_results/{gm_name}_floor_disp.{ext}', '-node', *floor_nodes, '-dof', 1, 'disp')
+            # 3 material hysteretic curves
+            ops.recorder('Element', fmt, f'{path}/temp_NLMDOF_results/{gm_name}_material.{ext}', '-ele', *all_element_tags, 'material', 1, 'stressStrain')
+
+        # Time history analysis
+        current_time = 0
+        duration = dt * (len(th) - 1)
+        init_dt = dt
+        factor = 1
+        max_factor = setting[12]
+        min_factor = setting[13]
+        dt_ratio = setting[14]
+        done = 0
+        if collapse_drift is not None:
+            # 逐步判定，层数较少时逐层比较比数组运算快
+            collapse_drift = np.broadcast_to(np.asarray(collapse_drift, dtype=float), (N,)).tolist()
+        while True:
+            if current_time >= duration:
+                done = 1
+                break  # analysis finished
+            dt = init_dt * factor * dt_ratio
+            if current_time + dt > duration:
+                dt = duration - current_time
+            ok = ops.analyze(1, dt)
+            if ok == 0:
+                # current step finished
+                current_time += dt
+                if collapse_drift is not None and is_collapsed([ops.nodeDisp(node, 1) for node in floor_nodes], collapse_drift):
+                    self.myprint(f'--- Story drift exceeds the collapse limit at time {current_time}. ---')
+                    done = 3
+                    break  # collapsed
+                old_factor = factor
+                factor = factor * 2
+                factor = min(factor, max_factor)
+                dt = init_dt * factor
+                if factor != old_factor:
+                    self.myprint(f'--- Enlarge factor to {factor} ---')
+            else:
+                # current step did not converge
+                factor = factor / 4
+                if factor < min_factor:
+                    # analysis failed
+                    self.myprint(f'--- factor is less than the minimum allowed ({factor} < {min_factor}). ---')
+                    self.myprint(f'--- Current time: {current_time}, total time: {duration}. ---')
+                    self.myprint('--- The analysis did not converge. ---')
+                    
+                    break  # analysis failed
+                else:
+                    # reduce factor
+                    dt = init_dt * factor
+                    self.myprint(f'Current step did not converge, reduce factor to {factor}.')
+
+        ops.remove('recorders')  # 关闭结果文件
+        results = None
+        if recorder == 'memory':
+            # 逐步调用nodeDisp、eleResponse等取值每步需5 + 3N + 单元数次调用，比二进制recorder写入后读回慢
+            results = Results.from_binary(gm_name, path)
+            Results.remove_binary(gm_name, path)
+        self.myprint('========== 分析结束 ==========')
+        return done, results
 
 
 def run_OS_py(
@@ -23,8 +403,12 @@ def run_OS_py(
         path: str,
         gm_name: str,
         g: float,
-        print_result=False
-    ) -> tuple[Literal[0, 1, 2], list[float], list[list]]:
+        print_result=False,
+        record_mode=True,
+        recorder: Literal['file', 'memory', 'binary']='file',
+        periods: list[float] | None=None,
+        collapse_drift: float | list[float] | None=None
+    ) -> tuple[Literal[0, 1, 2, 3], list[float], list[list], Results | None]:
     """调用openseespy求解非线性多自由度
 
     Args:
@@ -44,197 +428,81 @@ def run_OS_py(
         gm_name (str): 地震动名
         g (float): 重力加速度
         print_result (bool, optional): 是否打印结果. Defaults to False.
+        record_mode (bool, optional): 是否输出周期与振型文件（并行计算时仅由一个进程输出，避免文件冲突）. Defaults to True.
+        recorder (Literal['file', 'memory', 'binary'], optional): 响应输出方式，'file'为输出文本文件，
+        'memory'为返回Results（由二进制recorder输出后读回并删除文件，周期与振型仍输出为文件），
+        'binary'为输出二进制文件（可由`Results.from_binary`读取）. Defaults to 'file'.
+        periods (list[float] | None, optional): 已知的周期（见`eigen_OS_py`），同一模型多次计算（如IDA）时传入，
+        不输出振型文件时跳过模态分析. Defaults to None.
+        collapse_drift (float | list[float] | None, optional): 倒塌判定的层间位移限值(mm)（各层相同或逐层指定），
+        任一层的层间位移达到限值时提前终止分析（结果截至该时刻）并返回3，为None时不判定. Defaults to None.
 
     Returns:
-        tuple[Literal[0, 1, 2], list[float], list[list]]:  
-        (1) 0: 分析完成，1: 分析不收敛，2: 材料错误  
+        tuple[Literal[0, 1, 2, 3], list[float], list[list], Results | None]:  
+        (1) 1: 分析完成，0: 分析不收敛，2: 材料错误，3: 倒塌（提前终止）  
         (2) 周期值  
-        (3) 各振型模态
+        (3) 各振型模态  
+        (4) 计算结果（仅recorder为'memory'时返回，否则为None）
     """
-    def myprint(*str_):
-        if print_result:
-            print(*str_)
+    try:
+        session = OpenSeesSession(N, m, mat_lib, story_mat, mode_num, has_damping, zeta_mode, zeta, setting, path, g,
+                                  print_result, None if record_mode else periods)
+    except Exception as e:
+        print(traceback.format_exc())
+        print(e.args)
+        return 2, None, None, None
+    with session:
+        done, results = session.run(th, SF, dt, gm_name, record_mode, recorder, collapse_drift)
+    return done, session.T, session.element_tags, results
 
-    myprint('========== 分析开始 ==========')
-    myprint(f'层数：{N}')
-    myprint(f'质量：{m}')
-    myprint(f'材料：{mat_lib}')
-    myprint(f'材料指派：{story_mat}')
-    myprint(f'地震动步长：{dt}')
-    myprint(f'最大可选模态数：{mode_num}')
-    myprint(f'是否考虑阻尼：{has_damping}')
-    myprint(f'阻尼振型选用：{zeta_mode}')
-    myprint(f'阻尼比：{zeta}')
-    myprint(f'求解设置：{setting}')
-
-    if mode_num >= 5:
-        mode_num = 5
 
-    ops.wipe()
-    ops.model('basic', '-ndm', 2, '-ndf', 3)
+_session: tuple[tuple, OpenSeesSession] | None = None  # 当前进程中复用的模型域及其模型参数（见`run_OS_reuse`）
 
-    # node
-    ops.node(1, 0, 0)  # base node
-    ops.fix(1, 1, 1, 1)
-    all_node_tags = [1]
-    story_nodes = []
-    for i in range(N):
-        ops.node(i + 2, 0, 0, '-mass', m[i], 0, 0)
-        ops.fix(i + 2, 0, 1, 1)
-        story_nodes.append(i + 2)
-        all_node_tags.append(i + 2)
-    nodeTag = i + 3
-    
-    # material
-    for i, mat in enumerate(mat_lib):
+
+def run_OS_reuse(
+        N: int,
+        m: list,
+        mat_lib: list[list],
+        story_mat: list[list],
+        th: list,
+        SF: float | int,
+        dt: float,
+        mode_num: int,
+        has_damping: bool,
+        zeta_mode: tuple[int, int],
+        zeta: tuple[float, float],
+        setting: list,
+        path: str,
+        gm_name: str,
+        g: float,
+        print_result=False,
+        record_mode=True,
+        recorder: Literal['file', 'memory', 'binary']='file',
+        periods: list[float] | None=None,
+        collapse_drift: float | list[float] | None=None
+    ) -> tuple[Literal[0, 1, 2, 3], list[float], list[list], Results | None]:
+    """与`run_OS_py`相同，但模型参数与本进程上次调用时相同时复用已建立的模型域（见`OpenSeesSession`），
+    仅重新施加地震动。并行计算时每个进程各自保留一个模型域。
+    """
+    global _session
+    key = (N, m, mat_lib, story_mat, mode_num, has_damping, zeta_mode, zeta, setting, path, g, print_result)
+    if _session is None or _session[0] != key:
         try:
-            ops.uniaxialMaterial(*mat)
+            session = OpenSeesSession(N, m, mat_lib, story_mat, mode_num, has_damping, zeta_mode, zeta, setting,
+                                      path, g, print_result)
         except Exception as e:
+            _session = None
             print(traceback.format_exc())
             print(e.args)
-            return 2, None, None
-    matTag = i + 2
-    
-    # element
-    element_tags: list[list] = []  # 各楼层包含的单元编号 [[1, 2], [3], [4, 5], ...]
-    all_element_tags = []  # 所有单元编号 [1, 2, 3, 4, 5]
-    current_ele_tag = 1
-    for i in range(N):
-        element_tags.append([])
-        for j in range(len(story_mat[i])):
-            ops.element('zeroLength', current_ele_tag, i + 1, i + 2, '-mat', story_mat[i][j], '-dir', 1, '-doRayleigh', 1)
-            element_tags[i].append(current_ele_tag)
-            all_element_tags.append(current_ele_tag)
-            current_ele_tag += 1
-
-    # Eigen analysis
-    solver = '-genBandArpack' if N > 5 else '-fullGenLapack'
-    lambda_ = ops.eigen(solver, mode_num)
-    omg = [i ** 0.5 for i in lambda_]
-    T = [2 * pi / i for i in omg]
-    myprint('')
-    for i, Ti in enumerate(T):
-        myprint(f'T{i + 1} = {Ti}')
-    np.savetxt(f'{path}/temp_NLMDOF_results/Periods.txt', T)
-
-    # ground motion
-    ops.timeSeries('Path', 1, '-dt', dt, '-values', *th, '-factor', SF * g)
-    for i in range(N):
-        ops.pattern('Plain', i + 1, 1, '-fact', -m[i])  # D'Alembert's principle
-        ops.load(story_nodes[i], 1, 0, 0)
-
-    # 用于读取绝对响应的零刚度SDOF
-    large_m = max(m) * 1e6
-    ops.node(nodeTag, 0, 0, 0)
-    ops.node(nodeTag + 1, 0, 0, 0)
-    ops.fix(nodeTag, 1, 1, 1)
-    ops.fix(nodeTag + 1, 0, 1, 1)
-    ops.mass(nodeTag + 1, large_m, 0, 0)
-    static_node = nodeTag + 1  # 静止节点
-    ops.uniaxialMaterial('Elastic', matTag, 0)
-    ops.element('zeroLength', current_ele_tag, nodeTag, nodeTag + 1, '-mat', matTag, '-dir', 1, '-doRayleigh', 0)
-    ops.pattern('Plain', i + 2, 1, '-fact', large_m)
-    ops.load(static_node, 1, 0, 0)
-    nodeTag += 2
-    matTag += 1
-    current_ele_tag += 1
-
-    # Rayleigh damping
-    if has_damping:
-        z1, z2 = zeta
-        if mode_num >= 2:
-            # MDOF
-            w1, w2 = omg[zeta_mode[0] - 1], omg[zeta_mode[1] - 1]
-            a = 2 * w1 * w2 / (w2 ** 2 - w1 ** 2) * (w2 * z1 - w1 * z2)
-            b = 2 * w1 * w2 / (w2 ** 2 - w1 ** 2) * (z2 / w1 - z1 / w2)
-        elif mode_num == 1:
-            # SDOF
-            w1 = omg[0]
-            a = 0
-            b = 2 * z1 / w1
-        myprint('阻尼: a =', a, ' b =', b)
-        # ops.rayleigh(a, 0, b, 0)
-        ops.region(1, '-ele', *all_element_tags, '-rayleigh', a, 0, b, 0)
-        ops.region(1, '-node', *all_node_tags, '-rayleigh', a, 0, b, 0)
-    else:
-        myprint('无阻尼')
-
-    # recorder
-    if not os.path.exists(f'{path}/temp_NLMDOF_results'):
-        os.makedirs(f'{path}/temp_NLMDOF_results')
-    # 1 base node
-    ops.recorder('Node', '-file', f'{path}/temp_NLMDOF_results/{gm_name}_base_reaction.txt', '-time', '-node', 1, '-dof', 1, 'reaction')
-    ops.recorder('Node', '-file', f'{path}/temp_NLMDOF_results/{gm_name}_base_acc.txt', '-node', static_node, '-dof', 1, 'accel')
-    ops.recorder('Node', '-file', f'{path}/temp_NLMDOF_results/{gm_name}_base_vel.txt', '-node', static_node, '-dof', 1, 'vel')
-    ops.recorder('Node', '-file', f'{path}/temp_NLMDOF_results/{gm_name}_base_disp.txt', '-node', static_node, '-dof', 1, 'disp')
-    # 2 floor nodes
-    floor_nodes = [2 + i for i in range(N)]
-    ops.recorder('Node', '-file', f'{path}/temp_NLMDOF_results/{gm_name}_floor_acc.txt', '-node', *floor_nodes, '-dof', 1, 'accel')
-    ops.recorder('Node', '-file', f'{path}/temp_NLMDOF_results/{gm_name}_floor_vel.txt', '-node', *floor_nodes, '-dof', 1, 'vel')
-    ops.recorder('Node', '-file', f'{path}/temp_NLMDOF_results/{gm_name}_floor_disp.txt', '-node', *floor_nodes, '-dof', 1, 'disp')
-    # 3 material hysteretic curves
-    ops.recorder('Element', '-file', f'{path}/temp_NLMDOF_results/{gm_name}_material.txt', '-ele', *all_element_tags, 'material', 1, 'stressStrain')
-    # 4 modal results
-    for i in range(1, mode_num + 1):
-        ops.recorder('Node', '-file', f'{path}/temp_NLMDOF_results/mode_{i}.txt', '-node', *floor_nodes, '-dof', 1, f'eigen {i}')
-
-    # Time history analysis
-    if setting[6]:
-        ops.constraints(setting[0], setting[6], setting[7])
-    else:
-        ops.constraints(setting[0])
-    ops.numberer(setting[1])
-    ops.system(setting[2])
-    ops.test(setting[3], setting[8], setting[9])
-    ops.algorithm(setting[4])
-    ops.integrator(setting[5], setting[10], setting[11])
-    ops.analysis('Transient')
-
-    current_time = 0
-    duration = dt * (len(th) - 1)
-    init_dt = dt
-    factor = 1
-    max_factor = setting[12]
-    min_factor = setting[13]
-    dt_ratio = setting[14]
-    done = 0
-    while True:
-        if current_time >= duration:
-            done = 1
-            break  # analysis finished
-        dt = init_dt * factor * dt_ratio
-        if current_time + dt > duration:
-            dt = duration - current_time
-        ok = ops.analyze(1, dt)
-        if ok == 0:
-            # current step finished
-            current_time += dt
-            old_factor = factor
-            factor = factor * 2
-            factor = min(factor, max_factor)
-            dt = init_dt * factor
-            if factor != old_factor:
-                myprint(f'--- Enlarge factor to {factor} ---')
-        else:
-            # current step did not converge
-            factor = factor / 4
-            if factor < min_factor:
-                # analysis failed
-                myprint(f'--- factor is less than the minimum allowed ({factor} < {min_factor}). ---')
-                myprint(f'--- Current time: {current_time}, total time: {duration}. ---')
-                myprint(f'--- The analysis did not converge. ---')
-                
-                break  # analysis failed
-            else:
-                # reduce factor
-                dt = init_dt * factor
-                myprint(f'Current step did not converge, reduce factor to {factor}.')
-    
-    ops.wipeAnalysis()
-    ops.wipe()
-    myprint('========== 分析结束 ==========')
-    
-    return done, T, element_tags
+            return 2, None, None, None
+        _session = (deepcopy(key), session)
+    session = _session[1]
+    try:
+        done, results = session.run(th, SF, dt, gm_name, record_mode, recorder, collapse_drift)
+    except Exception:
+        _session = None  # 模型域状态未知，下次调用时重新建立
+        raise
+    return done, session.T, session.element_tags, results
 
 
 if __name__ == '__main__':
@@ -258,7 +526,7 @@ if __name__ == '__main__':
     gm_name = 'ChiChi'
     g = 9800
 
-    done, T, element_tags = run_OS_py(N, m, mat_lib, story_mat, th, SF, dt, mode_num, has_damping, zeta_mode, zeta, setting, path, gm_name, g, print_result=True)
+    done, T, element_tags, _ = run_OS_py(N, m, mat_lib, story_mat, th, SF, dt, mode_num, has_damping, zeta_mode, zeta, setting, path, gm_name, g, print_result=True)
     print('done:', done)
 
 
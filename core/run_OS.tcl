@@ -1,10 +1,14 @@
-proc run_OS_tcl {N m mat_lib story_mat th_path SF dt mode_num has_damping zeta_mode zeta setting path gm_name NPTS g print_results} {
+proc run_OS_tcl {N m mat_lib story_mat th_path SF dt mode_num has_damping zeta_mode zeta setting path gm_name NPTS g print_results recorder collapse_drift} {
     
     proc myprint {print_results str} {
         if {$print_results == 1} {puts $str}
     }
 
     if {$mode_num >= 5} {set mode_num 5}
+    # 由进程池调用时（见core/tcl_pool.py）计算状态由返回值输出，不写入done.txt，
+    # 且仅当NLMDOF_record_mode为1时输出周期与振型文件，以免并行的进程同时写入同一文件
+    set pool [info exists ::NLMDOF_pool]
+    set record_mode [expr {!$pool || $::NLMDOF_record_mode}]
 
     wipe
     model basic -ndm 2 -ndf 3
@@ -23,9 +27,11 @@ proc run_OS_tcl {N m mat_lib story_mat th_path SF dt mode_num has_damping zeta_m
     set nodeTag [expr $i + 3]
 
     # material
-    set f [open "$path/temp_NLMDOF_results/done.txt" w]
-    puts $f 2
-    close $f
+    if {!$pool} {
+        set f [open "$path/temp_NLMDOF_results/done.txt" w]
+        puts $f 2
+        close $f
+    }
     for {set i 0} {$i < [llength $mat_lib]} {incr i} {
         set mat [lrange [lindex $mat_lib $i] 0 end]
         uniaxialMaterial {*}$mat
@@ -59,9 +65,11 @@ proc run_OS_tcl {N m mat_lib story_mat th_path SF dt mode_num has_damping zeta_m
     set pi [expr 2 * asin(1)]
     for {set i 0} {$i < [llength $omg]} {incr i} {lappend T [expr 2 * $pi / [lindex $omg $i]]}
     myprint $print_results "Period:\n$T"
-    set f [open [format "%s/temp_NLMDOF_results/Periods.txt" $path] w]
-    foreach Ti $T {puts $f $Ti}
-    close $f
+    if {$record_mode} {
+        set f [open [format "%s/temp_NLMDOF_results/Periods.txt" $path] w]
+        foreach Ti $T {puts $f $Ti}
+        close $f
+    }
   
     # ground motion
     timeSeries Path 1 -dt $dt -filePath $th_path -factor [expr $SF * $g]
@@ -116,22 +124,26 @@ proc run_OS_tcl {N m mat_lib story_mat th_path SF dt mode_num has_damping zeta_m
 
     # recorder
     file mkdir "$path/temp_NLMDOF_results"
+    # recorder为-file时输出文本文件，为-binary时输出二进制文件
+    if {$recorder == "-binary"} {set ext bin} else {set recorder -file; set ext txt}
     # 1 base node
-    recorder Node -file [format "%s/temp_NLMDOF_results/%s_base_reaction.txt" $path $gm_name] -time -node 1 -dof 1 reaction
-    recorder Node -file [format "%s/temp_NLMDOF_results/%s_base_acc.txt" $path $gm_name] -node $static_node -dof 1 accel
-    recorder Node -file [format "%s/temp_NLMDOF_results/%s_base_vel.txt" $path $gm_name] -node $static_node -dof 1 vel
-    recorder Node -file [format "%s/temp_NLMDOF_results/%s_base_disp.txt" $path $gm_name] -node $static_node -dof 1 disp
+    recorder Node $recorder [format "%s/temp_NLMDOF_results/%s_base_reaction.$ext" $path $gm_name] -time -node 1 -dof 1 reaction
+    recorder Node $recorder [format "%s/temp_NLMDOF_results/%s_base_acc.$ext" $path $gm_name] -node $static_node -dof 1 accel
+    recorder Node $recorder [format "%s/temp_NLMDOF_results/%s_base_vel.$ext" $path $gm_name] -node $static_node -dof 1 vel
+    recorder Node $recorder [format "%s/temp_NLMDOF_results/%s_base_disp.$ext" $path $gm_name] -node $static_node -dof 1 disp
     # 2 floor nodes
     set floor_nodes [list]
     for {set i 0} {$i < $N} {incr i} {lappend floor_nodes [expr 2 + $i]}
-    recorder Node -file [format "%s/temp_NLMDOF_results/%s_floor_acc.txt" $path $gm_name] -node {*}$floor_nodes -dof 1 accel
-    recorder Node -file [format "%s/temp_NLMDOF_results/%s_floor_vel.txt" $path $gm_name] -node {*}$floor_nodes -dof 1 vel
-    recorder Node -file [format "%s/temp_NLMDOF_results/%s_floor_disp.txt" $path $gm_name] -node {*}$floor_nodes -dof 1 disp
+    recorder Node $recorder [format "%s/temp_NLMDOF_results/%s_floor_acc.$ext" $path $gm_name] -node {*}$floor_nodes -dof 1 accel
+    recorder Node $recorder [format "%s/temp_NLMDOF_results/%s_floor_vel.$ext" $path $gm_name] -node {*}$floor_nodes -dof 1 vel
+    recorder Node $recorder [format "%s/temp_NLMDOF_results/%s_floor_disp.$ext" $path $gm_name] -node {*}$floor_nodes -dof 1 disp
     # 3 material hysteretic curves
-    recorder Element -file [format "%s/temp_NLMDOF_results/%s_material.txt" $path $gm_name] -ele {*}$all_element_tags material 1 stressStrain
+    recorder Element $recorder [format "%s/temp_NLMDOF_results/%s_material.$ext" $path $gm_name] -ele {*}$all_element_tags material 1 stressStrain
     # 4 modal results
-    for {set i 1} {$i < [expr $mode_num + 1]} {incr i} {
-        recorder Node -file [format "%s/temp_NLMDOF_results/mode_%d.txt" $path $i] -node {*}$floor_nodes -dof 1 "eigen $i"
+    if {$record_mode} {
+        for {set i 1} {$i < [expr $mode_num + 1]} {incr i} {
+            recorder Node -file [format "%s/temp_NLMDOF_results/mode_%d.txt" $path $i] -node {*}$floor_nodes -dof 1 "eigen $i"
+        }
     }
 
     # Time history analysis
@@ -155,6 +167,8 @@ proc run_OS_tcl {N m mat_lib story_mat th_path SF dt mode_num has_damping zeta_m
     set min_factor [lindex $setting 13]
     set dt_ratio [lindex $setting 14]
     set done 0
+    # collapse_drift为各层的层间位移限值，任一层达到限值时提前终止分析（为空列表时不判定）
+    set check_collapse [expr [llength $collapse_drift] > 0]
 
     while 1 {
         if {$current_time >= $duration} {
@@ -169,6 +183,20 @@ proc run_OS_tcl {N m mat_lib story_mat th_path SF dt mode_num has_damping zeta_m
         if {$ok == 0} {
             # current step finished
             set current_time [expr $current_time + $dt]
+            if {$check_collapse} {
+                set collapsed 0
+                set u_below 0.0
+                for {set i 0} {$i < $N} {incr i} {
+                    set u [nodeDisp [expr $i + 2] 1]
+                    if {abs($u - $u_below) >= [lindex $collapse_drift $i]} {set collapsed 1}
+                    set u_below $u
+                }
+                if {$collapsed} {
+                    myprint $print_results "--- Story drift exceeds the collapse limit at time $current_time. ---"
+                    set done 3
+                    break;  # collapsed
+                }
+            }
             set old_factor $factor
             set factor [expr $factor * 2]
             set factor [expr min($factor, $max_factor)]
@@ -196,16 +224,21 @@ proc run_OS_tcl {N m mat_lib story_mat th_path SF dt mode_num has_damping zeta_m
     wipe
     if {$done == 1} {
         myprint $print_results "------ Finished ------"
+    } elseif {$done == 3} {
+        myprint $print_results "------ Collapsed ------"
     } else {
         myprint $print_results "------ Not converge ------"
     }
-    set f [open "$path/temp_NLMDOF_results/done.txt" w]
-    if {$done == 1} {puts $f 1} else {puts $f 0}
-    close $f
+    if {!$pool} {
+        set f [open "$path/temp_NLMDOF_results/done.txt" w]
+        puts $f $done
+        close $f
+    }
+    return $done
 }
 
 
-if {$argc == 0} {
+if {$argc == 0 && ![info exists NLMDOF_pool]} {
     set N 3
     set m [list 2 1 1]
     set mat_lib [list [list Steel01 1 3000 1500 0.02] [list Steel01 2 2000 1000 0.02]]
@@ -223,5 +256,7 @@ if {$argc == 0} {
     set NPTS 5279
     set g 9810.0
     set print_results 0
-    run_OS_tcl $N $m $mat_lib $story_mat $th_path $SF $dt $mode_num $has_damping $zeta_mode $zeta $setting $path $gm_name $NPTS $g $print_results
+    set recorder -file
+    set collapse_drift [list]
+    run_OS_tcl $N $m $mat_lib $story_mat $th_path $SF $dt $mode_num $has_damping $zeta_mode $zeta $setting $path $gm_name $NPTS $g $print_results $recorder $collapse_drift
 }
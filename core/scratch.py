@@ -0,0 +1,90 @@
+"""计算过程中的临时文件夹
+
+各求解器的临时文件（结果文件、周期与振型文件、地震动文件等）均位于`{path}/temp_NLMDOF_results`，
+path固定为系统临时文件夹时，同时进行的两次计算（如同时打开两个主窗口，或同时运行批量计算）会相互覆盖。
+`ScratchDir`为每次计算新建名称不重复的临时文件夹`{base}/NLMDOF_{进程号}_{随机字符}`，
+其路径可直接作为`run_OS_py`、`MyWin.build_tcl_file`的path参数及`Results.from_file`、
+`ModeResults.from_file`的temp_path参数，并行计算的各进程可使用各自的子文件夹（见`ScratchDir.worker`）。
+"""
+import os
+import re
+import time
+import shutil
+import tempfile
+from pathlib import Path
+
+
+PREFIX = 'NLMDOF_'
+
+
+class ScratchDir:
+    """名称不重复的临时文件夹，退出上下文或调用`cleanup`时删除
+
+    示例：
+    >>> with ScratchDir() as scratch:
+    >>>     run_OS_py(..., path=scratch.path, ...)
+    """
+    def __init__(self, base: str | Path | None=None):
+        """
+        Args:
+            base (str | Path | None, optional): 父文件夹，默认为系统临时文件夹. Defaults to None.
+        """
+        self.base = Path(tempfile.gettempdir() if base is None else base)
+        self.base.mkdir(parents=True, exist_ok=True)
+        self.path = Path(tempfile.mkdtemp(prefix=f'{PREFIX}{os.getpid()}_', dir=self.base)).as_posix()
+        self.run_id = Path(self.path).name  # 本次计算的标识（文件夹名）
+        self.result_path.mkdir()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.cleanup()
+
+    def __repr__(self):
+        return f'ScratchDir({self.path!r})'
+
+    @property
+    def result_path(self) -> Path:
+        """结果文件夹`{path}/temp_NLMDOF_results`"""
+        return Path(self.path) / 'temp_NLMDOF_results'
+
+    def worker(self, k: int) -> str:
+        """第k个并行进程的临时文件夹（含temp_NLMDOF_results）"""
+        path = Path(self.path) / f'worker_{k}'
+        (path / 'temp_NLMDOF_results').mkdir(parents=True, exist_ok=True)
+        return path.as_posix()
+
+    def reset(self):
+        """清空结果文件夹（重新计算前调用）"""
+        shutil.rmtree(self.result_path, ignore_errors=True)
+        self.result_path.mkdir(parents=True, exist_ok=True)
+
+    def cleanup(self):
+        """删除临时文件夹（文件被占用时保留，由`remove_stale`删除）"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    @staticmethod
+    def remove_stale(base: str | Path | None=None, max_age: float=7 * 86400) -> int:
+        """删除程序异常退出时遗留的临时文件夹，返回删除的文件夹数
+
+        Args:
+            base (str | Path | None, optional): 父文件夹，默认为系统临时文件夹. Defaults to None.
+            max_age (float, optional): 最后修改时间距今超过max_age(s)的文件夹视为遗留. Defaults to 7 days.
+        """
+        base = Path(tempfile.gettempdir() if base is None else base)
+        pattern = re.compile(rf'^{PREFIX}\d+_')
+        n = 0
+        try:
+            folders = [folder for folder in base.iterdir() if folder.is_dir() and pattern.match(folder.name)]
+        except OSError:
+            return 0
+        for folder in folders:
+            try:
+                if time.time() - folder.stat().st_mtime < max_age:
+                    continue
+            except OSError:
+                continue
+            shutil.rmtree(folder, ignore_errors=True)
+            n += 1
+        return n
@@ -0,0 +1,312 @@
+"""常驻的OpenSees（Tcl）解释器进程池
+
+每个进程启动后只载入一次run_OS.tcl，之后通过stdin逐条发送`run_OS_tcl`调用（每条地震动的参数），
+计算状态由stdout返回，避免每条地震动重新启动OpenSees.exe、解析脚本并通过done.txt传递计算状态。
+各进程在各自的工作目录中运行，可同时计算多条地震动，计算结果文件仍输出至`{path}/temp_NLMDOF_results`。
+也可生成在一个OpenSees进程中逐条计算多条地震动的批量脚本（`build_tcl_batch`、`run_tcl_batch`），
+无需通过stdin通信，可直接以`OpenSees.exe script.tcl`运行。
+"""
+import re
+import queue
+import threading
+import subprocess
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Literal
+
+import numpy as np
+
+
+SCRIPT = Path(__file__).parent / 'run_OS.tcl'
+SENTINEL = 'NLMDOF_DONE'  # stdout中计算状态所在行的标记
+# 进程启动时载入run_OS.tcl（NLMDOF_pool存在时不运行脚本末尾的算例）并定义调用入口，
+# 计算出错（如材料参数不正确）时返回2
+BOOT = f"""set NLMDOF_pool 1
+source {{{SCRIPT.as_posix()}}}
+proc NLMDOF_call {{record_mode args}} {{
+    set ::NLMDOF_record_mode $record_mode
+    if {{[catch {{run_OS_tcl {{*}}$args}} result]}} {{
+        puts "run_OS_tcl: $result"
+        set result 2
+    }}
+    puts "\\n{SENTINEL} $result"
+    flush stdout
+}}
+"""
+
+
+def tcl_word(value) -> str:
+    """将Python对象转换为Tcl命令的一个参数（列表转换为Tcl列表）"""
+    if isinstance(value, (list, tuple)):
+        return '{' + ' '.join(tcl_word(item) for item in value) + '}'
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, str):
+        return '{' + value + '}' if not value or re.search(r'[\s{}"\\$\[\];]', value) else value
+    return str(value)
+
+
+def _tcl_values(
+        args: tuple,
+        th_path: Path | str,
+        recorder: Literal['file', 'binary']='file',
+        collapse_drift: float | list[float] | None=None
+    ) -> list:
+    """`run_OS_tcl`的各参数值（顺序与run_OS.tcl中的参数一致）"""
+    N, m, mat_lib, story_mat, th, SF, dt, mode_num, has_damping, zeta_mode, zeta, setting, path, gm_name, g, print_result = args
+    setting = list(setting)
+    setting[6:8] = [value or '' for value in setting[6:8]]
+    NPTS = len(th) - 1  # 与`MyWin.build_tcl_file`一致
+    if collapse_drift is None:
+        collapse_drift = []
+    else:
+        collapse_drift = np.broadcast_to(np.asarray(collapse_drift, dtype=float), (N,)).tolist()
+    return [
+        int(N), [float(mi) for mi in m], mat_lib, story_mat, Path(th_path).as_posix(),
+        float(SF), float(dt), int(mode_num), bool(has_damping), list(zeta_mode), list(zeta), setting,
+        Path(path).as_posix(), gm_name, NPTS, float(g), bool(print_result),
+        '-binary' if recorder == 'binary' else '-file', collapse_drift
+    ]
+
+
+def run_OS_tcl_args(
+        args: tuple,
+        th_path: Path | str,
+        recorder: Literal['file', 'binary']='file',
+        collapse_drift: float | list[float] | None=None
+    ) -> str:
+    """生成调用run_OS.tcl中`run_OS_tcl`的参数
+
+    Args:
+        args (tuple): 调用`core.run_OS_py`所需的参数（见`core.get_py_args`）
+        th_path (Path | str): 地震动文件路径（单列，已按args中的地震动写入）
+        recorder (Literal['file', 'binary'], optional): 结果文件格式. Defaults to 'file'.
+        collapse_drift (float | list[float] | None, optional): 倒塌判定的层间位移限值(mm)（各层相同或逐层指定）. Defaults to None.
+    """
+    return ' '.join(tcl_word(value) for value in _tcl_values(args, th_path, recorder, collapse_drift))
+
+
+class TclPool:
+    """常驻的OpenSees解释器进程池
+
+    示例：
+    >>> with TclPool('OpenSees.exe', 4, work_path) as pool:
+    >>>     for i, done in pool.imap_unordered((i, record_mode, args) for ...):
+    >>>         ...
+    """
+    def __init__(self,
+            terminal: str,
+            workers: int,
+            work_path: str | Path,
+            myprint: Callable[[str], None]=print
+        ):
+        """
+        Args:
+            terminal (str): OpenSees求解器路径
+            workers (int): 进程数
+            work_path (str | Path): 各进程工作目录的父文件夹（第k个进程的工作目录为`tcl_worker_{k}`）
+            myprint (Callable[[str], None], optional): 输出OpenSees的屏幕输出. Defaults to print.
+        """
+        self.terminal = terminal
+        self.work_path = Path(work_path)
+        self.myprint = myprint
+        self.closed = False
+        self.processes: list[subprocess.Popen] = [self._start(k) for k in range(workers)]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _start(self, k: int) -> subprocess.Popen:
+        """启动第k个进程并载入run_OS.tcl"""
+        cwd = self.work_path / f'tcl_worker_{k + 1}'
+        cwd.mkdir(parents=True, exist_ok=True)
+        process = subprocess.Popen(
+            [self.terminal], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, cwd=cwd,
+            text=True, errors='replace', bufsize=1, creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+        )
+        process.stdin.write(BOOT)
+        process.stdin.flush()
+        return process
+
+    def call(self, k: int, args: str, record_mode: bool=False) -> int:
+        """由第k个进程计算一条地震动，返回计算状态（见`run_OS_py`），进程意外退出时返回0并重新启动该进程
+
+        Args:
+            k (int): 进程序号
+            args (str): `run_OS_tcl`的参数（见`run_OS_tcl_args`）
+            record_mode (bool, optional): 是否输出周期与振型文件. Defaults to False.
+        """
+        process = self.processes[k]
+        try:
+            process.stdin.write(f'NLMDOF_call {int(record_mode)} {args}\n')
+            process.stdin.flush()
+            for line in process.stdout:
+                match = re.search(rf'{SENTINEL} (-?\d+)', line)
+                if match:
+                    return int(match.group(1))
+                if line.strip():
+                    self.myprint(line.rstrip())
+        except OSError:
+            pass
+        if not self.closed:
+            self.myprint('【TclPool, call】OpenSees进程意外退出，已重新启动')
+            process.kill()
+            self.processes[k] = self._start(k)
+        return 0
+
+    def imap_unordered(self, jobs: Iterable[tuple[object, bool, str]]) -> Iterator[tuple[object, int]]:
+        """将jobs分配至各进程计算，按完成顺序返回(标识, 计算状态)
+
+        Args:
+            jobs (Iterable[tuple[object, bool, str]]): (标识, 是否输出周期与振型文件, `run_OS_tcl`的参数)
+        """
+        tasks = queue.Queue()
+        for job in jobs:
+            tasks.put(job)
+        n = tasks.qsize()
+        results = queue.Queue()
+
+        def work(k: int):
+            while not self.closed:
+                try:
+                    key, record_mode, args = tasks.get_nowait()
+                except queue.Empty:
+                    return
+                results.put((key, self.call(k, args, record_mode)))
+
+        for k in range(len(self.processes)):
+            threading.Thread(target=work, args=(k,), daemon=True).start()
+        for _ in range(n):
+            yield results.get()
+
+    def close(self, kill: bool=False):
+        """关闭所有进程，kill为True时不等待正在进行的计算"""
+        self.closed = True
+        for process in self.processes:
+            if kill:
+                process.kill()
+                continue
+            try:
+                process.stdin.write('exit\n')
+                process.stdin.close()
+            except OSError:
+                pass
+        for process in self.processes:
+            try:
+                process.wait(timeout=None if not kill else 5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+RECORD_SENTINEL = 'NLMDOF_RECORD'  # 批量脚本中各条地震动计算状态所在行的标记
+# 批量脚本中逐条计算地震动的循环，各条地震动的计算状态输出为一行：NLMDOF_RECORD 序号 计算状态 地震动名
+BATCH_LOOP = f"""foreach record $records {{
+    lassign $record i gm_name th_path SF dt NPTS NLMDOF_record_mode
+    if {{[catch {{run_OS_tcl $N $m $mat_lib $story_mat $th_path $SF $dt $mode_num $has_damping $zeta_mode $zeta $setting $path $gm_name $NPTS $g $print_results $recorder $collapse_drift}} done]}} {{
+        puts "run_OS_tcl: $done"
+        set done 2
+    }}
+    puts "\\n{RECORD_SENTINEL} $i $done $gm_name"
+    flush stdout
+}}
+"""
+
+
+def build_tcl_batch(
+        jobs: list[tuple[int, bool, tuple, Path | str]],
+        recorder: Literal['file', 'binary']='file',
+        collapse_drift: float | list[float] | None=None
+    ) -> str:
+    """生成在一个OpenSees进程中计算多条地震动的tcl脚本（直接以`OpenSees.exe script.tcl`运行）
+
+    脚本中`run_OS_tcl`只定义一次，模型参数只写入一次，各条地震动的文件路径、缩放系数、步长、
+    时间步数与地震动名写入地震动清单，逐条计算并输出计算状态（见`BATCH_LOOP`）。
+
+    Args:
+        jobs (list[tuple[int, bool, tuple, Path | str]]): 各条地震动的(序号, 是否输出周期与振型文件,
+        调用`core.run_OS_py`所需的参数（见`core.get_py_args`）, 地震动文件路径)，模型参数取自第1条
+        recorder (Literal['file', 'binary'], optional): 结果文件格式. Defaults to 'file'.
+        collapse_drift (float | list[float] | None, optional): 倒塌判定的层间位移限值(mm). Defaults to None.
+    """
+    with open(SCRIPT, 'r', encoding='utf-8') as f:
+        text = f.read()
+    proc = text[:text.index('\nif {$argc == 0')].rstrip()
+    names = ['N', 'm', 'mat_lib', 'story_mat', 'th_path', 'SF', 'dt', 'mode_num', 'has_damping', 'zeta_mode', 'zeta',
+             'setting', 'path', 'gm_name', 'NPTS', 'g', 'print_results', 'recorder', 'collapse_drift']
+    record_names = ['gm_name', 'th_path', 'SF', 'dt', 'NPTS']
+    lines = [proc, '', '', '# 由core.tcl_pool.build_tcl_batch生成，共{}条地震动'.format(len(jobs)),
+             'set NLMDOF_pool 1']
+    values = _tcl_values(jobs[0][2], jobs[0][3], recorder, collapse_drift)
+    for name, value in zip(names, values):
+        if name not in record_names:
+            lines.append(f'set {name} {tcl_word(value)}')
+    lines.append('# 序号 地震动名 地震动文件 缩放系数 步长 时间步数 是否输出周期与振型文件')
+    lines.append('set records [list \\')
+    for i, record_mode, args, th_path in jobs:
+        record = dict(zip(names, _tcl_values(args, th_path, recorder, collapse_drift)))
+        lines.append('    ' + tcl_word([i] + [record[name] for name in record_names] + [bool(record_mode)]) + ' \\')
+    lines.append(']')
+    lines.append(BATCH_LOOP)
+    return '\n'.join(lines)
+
+
+def run_tcl_batch(
+        terminal: str,
+        jobs: list[tuple[int, bool, tuple, Path | str]],
+        workers: int,
+        work_path: str | Path,
+        recorder: Literal['file', 'binary']='file',
+        collapse_drift: float | list[float] | None=None,
+        myprint: Callable[[str], None]=print
+    ) -> Iterator[tuple[int, int]]:
+    """将地震动分为workers组，每组生成一个批量脚本（见`build_tcl_batch`）并由一个OpenSees进程计算，
+    按完成顺序返回(序号, 计算状态)，进程意外退出时其余地震动的计算状态为0
+
+    Args:
+        terminal (str): OpenSees求解器路径
+        jobs (list[tuple[int, bool, tuple, Path | str]]): 见`build_tcl_batch`
+        workers (int): 进程数
+        work_path (str | Path): 各进程工作目录的父文件夹（第k组的脚本为`tcl_worker_{k}/batch.tcl`）
+        recorder (Literal['file', 'binary'], optional): 结果文件格式. Defaults to 'file'.
+        collapse_drift (float | list[float] | None, optional): 倒塌判定的层间位移限值(mm). Defaults to None.
+        myprint (Callable[[str], None], optional): 输出OpenSees的屏幕输出. Defaults to print.
+    """
+    workers = max(1, min(workers, len(jobs)))
+    shards = [jobs[k::workers] for k in range(workers)]
+    results = queue.Queue()
+
+    def work(k: int, shard: list):
+        cwd = Path(work_path) / f'tcl_worker_{k + 1}'
+        cwd.mkdir(parents=True, exist_ok=True)
+        script = cwd / 'batch.tcl'
+        with open(script, 'w', encoding='utf-8') as f:
+            f.write(build_tcl_batch(shard, recorder, collapse_drift))
+        remaining = [job[0] for job in shard]
+        try:
+            process = subprocess.Popen(
+                [terminal, script.as_posix()], stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                cwd=cwd, text=True, errors='replace', creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+            )
+        except OSError as e:
+            myprint(f'【run_tcl_batch】无法启动OpenSees：{e}')
+        else:
+            with process:
+                for line in process.stdout:
+                    match = re.search(rf'{RECORD_SENTINEL} (\d+) (-?\d+)', line)
+                    if match:
+                        i = int(match.group(1))
+                        remaining.remove(i)
+                        results.put((i, int(match.group(2))))
+                    elif line.strip():
+                        myprint(line.rstrip())
+            if remaining:
+                myprint(f'【run_tcl_batch】OpenSees进程意外退出，{len(remaining)}条地震动未计算')
+        for i in remaining:
+            results.put((i, 0))
+
+    for k, shard in enumerate(shards):
+        threading.Thread(target=work, args=(k, shard), daemon=True).start()
+    for _ in range(len(jobs)):
+        yield results.get()
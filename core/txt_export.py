@@ -0,0 +1,202 @@
+import os
+import time
+from pathlib import Path
+from typing import Callable
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+from core.Results import Results, ModeResults, StoryMatIndex
+
+
+FMT = '%.7f'
+BLOCK_ROWS = 5000  # 每次格式化的行数
+
+
+def savetxt(file: str | Path, data: np.ndarray, fmt: str=FMT) -> int:
+    """写入一维或二维数组，输出与`np.savetxt(file, data, fmt=fmt)`相同
+
+    每次将BLOCK_ROWS行数据展平后以一个格式字符串整体格式化，而非逐行格式化。
+
+    Returns:
+        int: 写入的字符数
+    """
+    data = np.asarray(data, dtype=float)
+    data = data.reshape(len(data), -1) if data.ndim else data.reshape(1, 1)
+    row = ' '.join([fmt] * data.shape[1]) + '\n'
+    n = 0
+    with open(file, 'w') as f:
+        for start in range(0, len(data), BLOCK_ROWS):
+            block = data[start: start + BLOCK_ROWS]
+            n += f.write((row * len(block)) % tuple(block.ravel().tolist()))
+    return n
+
+
+def record_files(
+        i: int,
+        gm_name: str,
+        results: Results,
+        index: StoryMatIndex,
+        mat_names: list[str],
+        g: float
+    ) -> dict[str, np.ndarray]:
+    """单条地震动需导出的文件名及数据
+
+    Args:
+        i (int): 地震动序号（从0开始）
+        gm_name (str): 地震动名
+        results (Results): 计算结果
+        index (StoryMatIndex): 楼层与材料响应列的对应关系
+        mat_names (list[str]): 材料库中各材料的名称
+        g (float): 重力加速度
+
+    Returns:
+        dict[str, np.ndarray]: 文件名与对应的数据
+    """
+    prefix = f'{i+1}_{gm_name}'
+    files = {
+        f'{prefix}_时间序列.txt': results.t,
+        f'{prefix}_基底加速度(g).txt': results.base_a / g,
+        f'{prefix}_基底速度(mm_s).txt': results.base_v,
+        f'{prefix}_基底位移(mm).txt': results.base_u,
+        f'{prefix}_底部剪力(kN).txt': results.base_V / 1000,
+        f'{prefix}_绝对加速度(g).txt': results.aa / g,
+        f'{prefix}_绝对速度(mm_s).txt': results.av,
+        f'{prefix}_绝对位移(mm).txt': results.au,
+        f'{prefix}_相对加速度.txt': results.ra / g,
+        f'{prefix}_相对速度.txt': results.rv,
+        f'{prefix}_相对位移.txt': results.ru,
+        f'{prefix}_最大层间位移(mm).txt': results.max_drift,
+        f'{prefix}_相对残余位移(mm).txt': results.res_drift,
+        f'{prefix}_绝对加速度包络(g).txt': results.max_aa / g,
+    }
+    mat = results.mat
+    shear = results.story_shear(index)
+    deform = results.story_deform(index)
+    for story_idx, ele_idx in enumerate(index.story_ele):
+        for tag, n in zip(index.key[story_idx], ele_idx):
+            hys_curve = np.column_stack((mat[:, 2 * n + 1], mat[:, 2 * n] / 1000))  # 滞回曲线
+            files[f'{prefix}_{story_idx+1}层材料滞回曲线_{mat_names[tag-1]}.txt'] = hys_curve
+        if len(ele_idx) > 1:
+            hys_curve_parallel = np.column_stack((deform[:, story_idx], shear[:, story_idx] / 1000))  # 并联材料滞回曲线
+            files[f'{prefix}_{story_idx+1}层并联材料滞回曲线.txt'] = hys_curve_parallel
+    files[f'{prefix}_楼层剪力(kN).txt'] = shear / 1000
+    files[f'{prefix}_楼层剪力包络(kN).txt'] = results.max_story_shear(index) / 1000
+    return files
+
+
+def write_files(output_path: str | Path, files: dict[str, np.ndarray]) -> list[tuple[str, int, float]]:
+    """写入多个txt文件（可在子进程中运行）
+
+    Returns:
+        list[tuple[str, int, float]]: 各文件的文件名、字符数与写入耗时(s)
+    """
+    stats = []
+    for file_name, data in files.items():
+        t0 = time.perf_counter()
+        n = savetxt(Path(output_path) / file_name, data)
+        stats.append((file_name, n, time.perf_counter() - t0))
+    return stats
+
+
+def export_txt(
+        output_path: str | Path,
+        all_results: list[Results],
+        gm_names: list[str],
+        mode_results: ModeResults,
+        index: StoryMatIndex,
+        mat_names: list[str],
+        g: float,
+        workers: int | None=None,
+        myprint: Callable[[str], None]=print
+    ) -> list[tuple[str, int, float]]:
+    """导出所有计算结果至txt文件
+
+    主线程依次读取各条地震动的结果并计算需导出的数组，由进程池格式化并写入文件。
+    等待写入的地震动最多为进程数的2倍，以限制内存占用。
+
+    Args:
+        output_path (str | Path): 文件夹路径
+        all_results (list[Results]): 各条地震动的计算结果
+        gm_names (list[str]): 地震动名
+        mode_results (ModeResults): 模态结果
+        index (StoryMatIndex): 楼层与材料响应列的对应关系
+        mat_names (list[str]): 材料库中各材料的名称
+        g (float): 重力加速度
+        workers (int | None, optional): 进程数，为1时在当前进程写入，默认为CPU核数与地震动数中的较小值. Defaults to None.
+        myprint (Callable[[str], None], optional): 输出导出进度. Defaults to print.
+
+    Returns:
+        list[tuple[str, int, float]]: 各文件的文件名、字符数与写入耗时(s)
+    """
+    t_start = time.perf_counter()
+    gm_N = len(gm_names)
+    if workers is None:
+        workers = max(1, min(os.cpu_count() or 1, gm_N))
+    stats = write_files(output_path, {
+        '周期.txt': np.asarray(mode_results.T),
+        '振型.txt': np.array(mode_results.mode).reshape(len(mode_results.mode), -1),
+    })
+    with open(Path(output_path) / '单位制.txt', 'w') as f:
+        f.write('单位：\nN，mm，s\n')
+    count = 0
+    def collect(record_stats: list[tuple[str, int, float]]):
+        nonlocal count
+        stats.extend(record_stats)
+        count += 1
+        n = sum(item[1] for item in record_stats)
+        t = sum(item[2] for item in record_stats)
+        myprint(f'正在导出计算结果 ({count}/{gm_N})，{len(record_stats)}个文件，{n / 1e6:.1f} MB，{n / 1e6 / max(t, 1e-9):.1f} MB/s...')
+    if workers == 1:
+        for i, gm_name in enumerate(gm_names):
+            collect(write_files(output_path, record_files(i, gm_name, all_results[i], index, mat_names, g)))
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            pending = set()
+            for i, gm_name in enumerate(gm_names):
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+                files = record_files(i, gm_name, all_results[i], index, mat_names, g)
+                pending.add(executor.submit(write_files, output_path, files))
+            for future in wait(pending).done:
+                collect(future.result())
+    n = sum(item[1] for item in stats)
+    t = time.perf_counter() - t_start
+    slowest = min(stats, key=lambda item: item[1] / max(item[2], 1e-9))
+    myprint(f'共导出{len(stats)}个文件，{n / 1e6:.1f} MB，用时{t:.2f} s（{n / 1e6 / t:.1f} MB/s），'
+            f'最慢的文件为{slowest[0]}（{slowest[1] / 1e6 / max(slowest[2], 1e-9):.1f} MB/s）')
+    return stats
+
+
+if __name__ == '__main__':
+    # 对比逐文件np.savetxt（原导出方式）与进程池批量格式化的导出速度（用法：python txt_export.py [地震动数] [楼层数] [时间步数] [进程数]）
+    import sys
+    import tempfile
+    gm_N = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    N = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    NPTS = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    rng = np.random.default_rng(0)
+    index = StoryMatIndex([[1, 2]] * N)
+    all_results = [Results(np.arange(1, NPTS + 1) * 0.01, *rng.standard_normal((4, NPTS)),
+                           *rng.standard_normal((3, NPTS, N)), rng.standard_normal((NPTS, 2 * index.n_ele)))
+                   for _ in range(gm_N)]
+    gm_names = [f'gm{i + 1}' for i in range(gm_N)]
+    mode_results = ModeResults([1.0], [np.ones(N)])
+    with tempfile.TemporaryDirectory() as temp_path:
+        t0 = time.perf_counter()
+        for i, gm_name in enumerate(gm_names):
+            for file_name, data in record_files(i, gm_name, all_results[i], index, ['mat1', 'mat2'], 9800).items():
+                np.savetxt(Path(temp_path) / file_name, data, fmt=FMT)
+        t1 = time.perf_counter()
+        export_txt(temp_path, all_results, gm_names, mode_results, index, ['mat1', 'mat2'], 9800, workers=1, myprint=lambda text: None)
+        t2 = time.perf_counter()
+        stats = export_txt(temp_path, all_results, gm_names, mode_results, index, ['mat1', 'mat2'], 9800, workers=workers, myprint=lambda text: None)
+        t3 = time.perf_counter()
+    n = sum(item[1] for item in stats)
+    print(f'地震动数：{gm_N}，楼层数：{N}，时间步数：{NPTS}，文件数：{len(stats)}，{n / 1e6:.1f} MB')
+    print(f'np.savetxt逐文件写入：{t1 - t0:.2f} s（{n / 1e6 / (t1 - t0):.1f} MB/s）')
+    print(f'批量格式化（单进程）：{t2 - t1:.2f} s（{n / 1e6 / (t2 - t1):.1f} MB/s）')
+    print(f'批量格式化（{workers or min(os.cpu_count() or 1, gm_N)}进程）：{t3 - t2:.2f} s（{n / 1e6 / (t3 - t2):.1f} MB/s）')
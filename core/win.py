@@ -1,20 +1,18 @@
 import os, sys, re
-from typing import Literal
-from shutil import rmtree
+from typing import Literal, Iterator, Callable
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
 
 import dill
-import shutil
 import seismicutils as su
 import numpy as np
 import pyqtgraph as pg
-import openpyxl as px
-from openpyxl.worksheet.worksheet import Worksheet
 from PyQt5.QtGui import QIntValidator, QDoubleValidator, QFont, QColor
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QPoint
 from PyQt5.QtWidgets import QApplication, QMessageBox, QFileDialog, QDialog,\
     QTableWidgetItem, QMainWindow, QMenu, QTableWidgetItem, QHeaderView,\
-    QTableWidget, QLabel
+    QTableWidget, QLabel, QProgressDialog
 
 import core
 from ui.main_win import Ui_MainWindow
@@ -37,23 +35,21 @@ SOFTWARE = '非线性多自由度时程分析软件'
 VERSION = 'V2.1.1'
 DATE = '2025.5.13'
 TEMP_PATH = Path(os.getenv('TEMP')).as_posix()
+RESULT_CACHE = f'{TEMP_PATH}/NLMDOF_cache'  # 计算结果缓存文件夹（见`core.ResultCache`）
 ROOT = Path(__file__).parent.parent
+NP_BATCH_SIZE = 50  # NumPy求解器同时计算的地震动数上限（组越大计算越快，见`core.run_NP`；组越小，中断与进度更新越及时）
 STD_IN_SOFTWARE = True
 
 
 class MyWin(QMainWindow):
-    g = 9800
-    unit_SF = [1, 1 / g, 10 / g, 1000 / g]
-    unit = ['g', 'mm/s^2', 'cm/s^2', 'm/s^2']
-    setting1 = ['Plain', 'Lagrange', 'Penalty', 'Transformation']
-    setting2 = ['Plain', 'RCM', 'AMD']
-    setting3 = ['BandGeneral', 'BandSPD', 'ProfileSPD', 'SuperLU', 'UmfPack', 'FullGeneral', 'SparseSYM']
-    setting4 = ['NormUnbalance', 'NormDispIncr', 'EnergyIncr', 'RelativeNormUnbalance',
-                'RelativeNormDispIncr', 'RelativeTotalNormDispIncr', 'RelativeEnergyIncr', 'FixedNumIter']
-    setting5 = ['Linear', 'Newton', 'NewtonLineSearch', 'ModifiedNewton', 'KrylovNewton',
-                'SecantNewton', 'BFGS', 'Broyden']
-    setting6 = ['CentralDifference', 'Newmark', 'HHT', 'GeneralizedAlpha', 'TRBDF2', 'Explicitdifference']
+    g = core.G
+    unit_SF = list(core.UNIT_SF.values())
+    unit = list(core.UNIT_SF.keys())
+    setting1, setting2, setting3, setting4, setting5, setting6 = core.SETTING_OPTIONS
     print_result = False
+    recorder: Literal['file', 'memory', 'binary'] | None = None  # OpenSeesPy、NumPy与tcl求解器的结果输出方式（'memory'时不输出结果文件，'binary'时输出二进制文件），None时按求解器选择最快的方式（见`core.default_recorder`）
+    use_cache = True  # 模型与地震动未改变时是否直接读取缓存的计算结果
+    cache_budget = 2 * 1024 ** 3  # 计算结果缓存的总大小上限(bytes)
 
     def __init__(self, test: bool=False):
         super().__init__()
@@ -153,6 +149,8 @@ class MyWin(QMainWindow):
         self.statusBar().addPermanentWidget(self.statusBar_label_right)
         self.ui.action_2.triggered.connect(self.open_win_about)
         self.ui.action_6.triggered.connect(self.open_win_terminal)
+        self.ui.action_4.triggered.connect(self.open_project)
+        self.ui.action_7.triggered.connect(self.save_project)
         self.win_terminal = Win_terminal(self)
         self.win_terminal.setModal(False)
 
@@ -169,7 +167,12 @@ class MyWin(QMainWindow):
         self.gm_PGA = []
 
     def init_var(self):
-        self.TEMP_PATH = os.getenv('TEMP')  # 临时文件路径
+        # 本窗口的临时文件夹（名称不重复，同时打开多个窗口时互不覆盖，关闭窗口时删除）
+        core.ScratchDir.remove_stale(TEMP_PATH)
+        self.scratch = core.ScratchDir(TEMP_PATH)
+        self.TEMP_PATH = self.scratch.path  # 临时文件路径
+        self.result_store_file = f'{self.TEMP_PATH}/NLMDOF_results.h5'  # 计算结果库（重新计算时不随结果文件夹删除）
+        self.previous_store_file = f'{self.TEMP_PATH}/NLMDOF_results_previous.h5'  # 重新计算时，上次计算的结果库（用于复用未改变的地震动的结果）
         self.current_gm_idx = None  # 当前选择地震动的序号
         self.N = 0  # 自由度数量
         self.m = []  # 各自由度质量
@@ -180,18 +183,22 @@ class MyWin(QMainWindow):
         self.mode_num = 0  # 最大有效振型数
         self.fvtime = 0  # 自由振动时长
         self.has_damping = True  # 是否有阻尼
-        self.setting = [3, 0, 0, 0, 1, 1, '', '', '1e-5', '60', '0.5', '0.25', '1', '1e-6', '1']
-        self.setting_default = [3, 0, 0, 0, 1, 1, '', '', '1e-5', '60', '0.5', '0.25', '1', '1e-6', '1']
+        self.setting = core.SETTING_DEFAULT.copy()
+        self.setting_default = core.SETTING_DEFAULT.copy()
         self.OS_terminal = None  # OpenSees求解器路径
         self.current_plot_data = None  # 当前绘制的图像的数据
         self.export_type = None  # 导出数据的类型
         self.has_os_terminal = False  # 是否有OpenSees求解器路径
+        self.worker_num = 1  # 并行计算进程数（1为串行计算）
         
     def init_result(self):
         """初始化计算结果"""
         self.result_exists = False
         self.result_T = None
         self.result_mode = None
+        self.memory_results: dict[int, core.Results] = {}  # 未写入结果库的直接返回的计算结果（地震动序号: 结果）
+        self.result_store: core.ResultStore = None  # 以只读方式打开的结果库（惰性读取计算结果时保持打开）
+        self.story_index: core.StoryMatIndex = None  # 楼层与材料响应列的对应关系
 
     def replace_to_pyqtgraph(self, graphicsView, layout, index):
         """将graphicsView控件替换为pyqtgrapg"""
@@ -626,17 +633,25 @@ class MyWin(QMainWindow):
         if self.ui.radioButton_2.isChecked() and not self.has_os_terminal:
             QMessageBox.warning(self, '错误', '未选择有效的OpenSees.exe！')
             return False
+        if self.ui.radioButton_5.isChecked():
+            mat_lib = [mat[3:] for mat in core.check_BW_mat(self.mat_lib)]
+            if not core.check_NP_mat(mat_lib):
+                QMessageBox.warning(self, '错误', 'NumPy求解器仅支持内置材料（不含退化的BoucWen模型）！')
+                return False
+            if self.setting6[self.setting[5]] not in ['Newmark', 'HHT']:
+                QMessageBox.warning(self, '错误', 'NumPy求解器仅支持Newmark与HHT积分方法！')
+                return False
         print('【MyWin, ready_to_run】模型已完备')
         return True
 
-    def run(self, script_type: Literal['py', 'tcl']):
-        """script_type: 'py' or 'tcl'"""
+    def run(self, script_type: Literal['py', 'tcl', 'np']):
+        """script_type: 'py', 'tcl' or 'np'"""
         if self.ready_to_run():
-            if (Path(TEMP_PATH) / 'temp_NLMDOF_results').exists():
-                shutil.rmtree(Path(TEMP_PATH) / 'temp_NLMDOF_results')
-            os.makedirs((Path(TEMP_PATH) / 'temp_NLMDOF_results').as_posix())
+            self.scratch.reset()
             if self.ui.radioButton.isChecked():
                 script_type = 'py'
+            elif self.ui.radioButton_5.isChecked():
+                script_type = 'np'
             else:
                 script_type = 'tcl'
             if script_type == 'tcl' and self.OS_terminal is None:
@@ -644,6 +659,11 @@ class MyWin(QMainWindow):
                 return
             self.zeta_mode = [self.ui.comboBox_3.currentIndex() + 1, self.ui.comboBox_4.currentIndex() + 1]
             self.zeta = [self.ui.lineEdit_3.text(), self.ui.lineEdit_3.text()]
+            self.memory_results = {}
+            self.all_resutls = []
+            self.result_exists = False
+            core.Results.cache.clear()
+            self.close_result_store()
             win = Win_run(self, script_type)
             win.signal_converge_fail.connect(self.converge_fail)
             win.signal_finished.connect(self.running_finished)
@@ -719,9 +739,11 @@ if {{$result != 0}} {{
             path: Path | str,
             gm_name: str,
             NPTS: int,
-            print_result: bool=True
+            print_result: bool=True,
+            recorder: Literal['file', 'binary']='file',
+            collapse_drift: list[float] | None=None
         ) -> str:
-        """修改tcl文件"""
+        """修改tcl文件，collapse_drift为各层的层间位移限值(mm)（提前终止分析，见`run_OS_py`）"""
         run_OS_file = ROOT / 'core/run_OS.tcl'
         with open(run_OS_file, 'r', encoding='utf=8') as f:
             text = f.read()
@@ -805,17 +827,19 @@ if {{$result != 0}} {{
         text = pattern.sub(r'\g<1>' + text15 + r'\2', text)
         if print_result:
             text = re.sub('set print_results 0', 'set print_results 1', text)
+        if recorder == 'binary':
+            text = re.sub('set recorder -file', 'set recorder -binary', text)
+        if collapse_drift is not None:
+            text = text.replace('set collapse_drift [list]', 'set collapse_drift [list ' + ' '.join(str(float(i)) for i in collapse_drift) + ']')
         return text
     
     def clicked_build_tcl_file(self):
         if self.ready_to_run():
-            th_path = 'xxx'
-            zeta_mode = [self.ui.comboBox_3.currentIndex() + 1, self.ui.comboBox_4.currentIndex() + 1]
-            zeta = [self.ui.lineEdit_3.text(), self.ui.lineEdit_3.text()]
-            SF = 1
-            text = MyWin.build_tcl_file(self.N, self.m, self.mat_lib, self.story_mat, th_path,
-                                  SF, self.gm_dt[0], self.mode_num, self.has_damping, zeta_mode, zeta,
-                                  self.setting, TEMP_PATH, self.gm_name[0], self.gm_NPTS[0])
+            self.zeta_mode = [self.ui.comboBox_3.currentIndex() + 1, self.ui.comboBox_4.currentIndex() + 1]
+            self.zeta = [self.ui.lineEdit_3.text(), self.ui.lineEdit_3.text()]
+            # 所有地震动由一个脚本逐条计算（见`core.build_tcl_batch`），地震动文件路径需按实际修改
+            jobs = [(i, i == 0, core.get_py_args(self, i, TEMP_PATH), f'{self.gm_name[i]}.txt') for i in range(self.gm_N)]
+            text = core.build_tcl_batch(jobs)
         else:
             text = '模型未定义完全！'
         win = Win_tcl_file(text)
@@ -825,14 +849,36 @@ if {{$result != 0}} {{
 
     def running_finished(self):
         print('【MyWin, running_finished】全部计算完成！')
-        self.mode_results = core.ModeResults.from_file(self.mode_num, TEMP_PATH)
+        with core.ResultStore(self.result_store_file, 'a') as store:
+            if 'modes' in store.file:
+                self.mode_results = store.read_modes()  # 已由计算线程写入（复用或模态分析）
+            else:
+                self.mode_results = core.ModeResults.from_file(self.mode_num, self.TEMP_PATH)  # tcl求解器输出的文件
+                store.write_modes(self.mode_results)
+        self.close_result_store()
+        self.result_store = core.ResultStore(self.result_store_file, 'r')
+        self.story_index = core.StoryMatIndex(self.story_mat)
         self.all_resutls: list[core.Results] = []
         for i in range(self.gm_N):
-            results = core.Results.from_file(self.gm_name[i], TEMP_PATH)
+            # 计算结果均为惰性读取，绘图时仅读取所需楼层的数据
+            if self.gm_name[i] in self.result_store:
+                results = self.result_store.read_results(self.gm_name[i], lazy=True)
+            elif i in self.memory_results:
+                results = self.memory_results[i]
+            elif core.Results.binary_exists(self.gm_name[i], self.TEMP_PATH):
+                results = core.Results.from_binary(self.gm_name[i], self.TEMP_PATH, mmap=True)
+            else:
+                results = core.Results.from_file(self.gm_name[i], self.TEMP_PATH)
             self.all_resutls.append(results)
         self.result_exists = True
         self.update_result_combobox(self.ui.comboBox_5.currentIndex(), True)
 
+    def close_result_store(self):
+        """关闭结果库（重新计算前需关闭，以便计算线程写入）"""
+        if self.result_store is not None:
+            self.result_store.close()
+            self.result_store = None
+
     def update_result_combobox(self, idx=0, plot_curve=False):
         """更新结果combox的选项
             计算结果选择振型时，右侧列表框为振型
@@ -932,83 +978,58 @@ if {{$result != 0}} {{
             results = self.all_resutls[gm_idx]
             t = results.t
         if self.ui.comboBox_5.currentText() == '相对位移':
-            ru = results.ru[:, story_id - 1]
+            ru = results.get_response('ru', story_id)
             case_ = f'{gm_name}第{story_id}层相对位移'
             self.plot_result_th(t, ru, 't [s]', '相对位移 [mm]', case_)
             self.update_graph_data(t, ru, case_, 't [s]', '相对位移 [mm]')
             self.export_set_text(f'最大相对位移：{np.max(np.abs(ru)):.6f}')
         elif self.ui.comboBox_5.currentText() == '相对速度':
-            rv = results.rv[:, story_id - 1]
+            rv = results.get_response('rv', story_id)
             case_ = f'{gm_name}第{story_id}层相对速度'
             self.plot_result_th(t, rv, 't [s]', '相对速度 [mm/s]', case_)
             self.update_graph_data(t, rv, case_, 't [s]', '相对速度 [mm/s]')
             self.export_set_text(f'最大相对速度：{np.max(np.abs(rv)):.6f}')
         elif self.ui.comboBox_5.currentText() == '相对加速度':
-            ra = results.ra[:, story_id - 1] / self.g
+            ra = results.get_response('ra', story_id) / self.g
             case_ = f'{gm_name}第{story_id}层相对加速度'
             self.plot_result_th(t, ra, 't [s]', '相对加速度 [g]', case_)
             self.update_graph_data(t, ra, case_, 't [s]', '相对加速度 [g]')
             self.export_set_text(f'最大相对加速度：{np.max(np.abs(ra)):.6f}')
         elif self.ui.comboBox_5.currentText() == '最大层间位移':
             x_story = list(range(0, self.N + 1, 1))
-            ru = results.ru
-            interstory_ru = np.diff(ru, axis=1)
-            interstory_ru = np.column_stack((ru[:, 0], interstory_ru))
-            max_IDR = np.amax(abs(interstory_ru), axis=0)
-            max_IDR = np.insert(max_IDR, 0, 0)
+            max_IDR = np.insert(results.max_drift, 0, 0)
             case_ = f'{gm_name}最大层间位移'
             self.plot_result_th(x_story, max_IDR, '楼层', '最大层间位移 [mm]', case_, True)
             self.update_graph_data(x_story, max_IDR, case_, '楼层', '最大层间位移 [mm]')
             self.export_set_text(f'最大层间位移：{np.max(np.abs(max_IDR)):.6f}')
         elif self.ui.comboBox_5.currentText() == '最大层间残余位移':
             x_story = list(range(0, self.N + 1, 1))
-            resu = results.resu
-            RIDR = np.diff(resu)
-            RIDR = np.insert(RIDR, 0, resu[0])
-            RIDR = np.insert(RIDR, 0, 0)
+            RIDR = np.insert(results.res_drift, 0, 0)
             case_ = f'{gm_name}最大层间残余位移'
             self.plot_result_th(x_story, RIDR, '楼层', '最大层间残余位移 [mm]', case_, True)
             self.update_graph_data(x_story, RIDR, case_, '楼层', '最大层间残余位移 [mm]')
             self.export_set_text(f'最大层间残余位移：{np.max(np.abs(RIDR)):.6f}')
         elif self.ui.comboBox_5.currentText() == '绝对位移':
-            au = results.au[:, story_id - 1]
+            au = results.get_response('au', story_id)
             case_ = f'{gm_name}第{story_id}层绝对位移'
             self.plot_result_th(t, au, 't [s]', '绝对位移 [mm]', case_)
             self.update_graph_data(t, au, case_, 't [s]', '绝对位移 [mm]')
             self.export_set_text(f'最大绝对位移：{np.max(np.abs(au)):.6f}')
         elif self.ui.comboBox_5.currentText() == '绝对速度':
-            av = results.av[:, story_id - 1]
+            av = results.get_response('av', story_id)
             case_ = f'{gm_name}第{story_id}层绝对速度'
             self.plot_result_th(t, av, 't [s]', '绝对速度 [mm/s]', case_)
             self.update_graph_data(t, av, case_, 't [s]', '绝对速度 [mm/s]')
             self.export_set_text(f'最大绝对速度：{np.max(np.abs(av)):.6f}')
         elif self.ui.comboBox_5.currentText() == '绝对加速度':
-            aa = results.aa[:, story_id - 1] / self.g
+            aa = results.get_response('aa', story_id) / self.g
             case_ = f'{gm_name}第{story_id}层绝对加速度'
             self.plot_result_th(t, aa, 't [s]', '绝对加速度 [g]', case_)
             self.update_graph_data(t, aa, case_, 't [s]', '绝对加速度 [g]')
             self.export_set_text(f'最大绝对加速度：{np.max(np.abs(aa)):.6f}')
         elif self.ui.comboBox_5.currentText() == '楼层剪力':
             story_idx = self.ui.comboBox_6.currentIndex()
-            mat_idx = self.story_mat.copy()
-            n = 0
-            stressStrain = results.mat
-            for i, sub_list in enumerate(mat_idx):
-                for j, _ in enumerate(sub_list):
-                    mat_idx[i][j] = n
-                    n += 1
-            if len(self.story_mat[story_idx]) == 1:
-                # 该层只有一个材料
-                col_idx = mat_idx[story_idx][0] * 2  # 材料结果数据的列数索引
-                F = stressStrain[:, col_idx]
-            else:
-                # 该层有多种材料
-                F = np.zeros(len(t))
-                for i in range(len(mat_idx[story_idx])):
-                    # 遍历每一种单独材料并叠加
-                    col_idx = mat_idx[story_idx][i] * 2
-                    F_temp = stressStrain[:, col_idx]
-                    F += F_temp
+            F = results.get_story_shear(story_idx + 1, self.story_index)
             case_ = f'{gm_name}第{story_idx+1}层层间剪力'
             self.plot_result_th(t, F / 1000, 't [s]', '力 [kN]', case_)
             self.update_graph_data(t, F / 1000, case_, 't [s]', '力 [kN]')
@@ -1021,74 +1042,29 @@ if {{$result != 0}} {{
             self.export_set_text(f'最大底部剪力：{np.max(np.abs(base_V)):.6f}')
         elif self.ui.comboBox_5.currentText() == '材料滞回曲线':
             story_idx = self.ui.comboBox_6.currentIndex()
-            stressStrain = results.mat
-            mat_idx: list[list[int]] = []
-            n = 0
-            for i, sub_list in enumerate(self.story_mat):
-                mat_idx.append([])
-                for j, _ in enumerate(sub_list):
-                    mat_idx[i].append(n)
-                    n += 1
-            if len(self.story_mat[story_idx]) == 1:
-                # 该层只有一个材料
-                col_idx = mat_idx[story_idx][0] * 2  # 材料结果数据的列数索引
-                u = stressStrain[:, col_idx + 1]
-                F = stressStrain[:, col_idx]
+            ele_idx = self.story_index.story_ele[story_idx]  # 该层各材料的单元序号
+            if len(ele_idx) > 1 and self.ui.comboBox_7.currentIndex() == len(ele_idx):
+                # 选中并联材料
+                F, u = results.get_story_hysteresis(story_idx + 1, self.story_index).T
             else:
-                # 该层有多种材料
-                if self.ui.comboBox_7.currentIndex() != len(mat_idx[story_idx]):
-                    # 选择单独材料
-                    col_idx = mat_idx[story_idx][self.ui.comboBox_7.currentIndex()] * 2
-                    u = stressStrain[:, col_idx + 1]
-                    F = stressStrain[:, col_idx]
-                else:
-                    # 选中并联材料
-                    u, F = np.zeros(len(t)), np.zeros(len(t))
-                    for i in range(len(mat_idx[story_idx])):
-                        # 遍历每一种单独材料并叠加
-                        col_idx = mat_idx[story_idx][i] * 2
-                        u_temp = stressStrain[:, col_idx + 1]
-                        F_temp = stressStrain[:, col_idx]
-                        u = u_temp
-                        F += F_temp
+                # 该层只有一个材料或选择单独材料
+                col_idx = 2 * ele_idx[self.ui.comboBox_7.currentIndex() if len(ele_idx) > 1 else 0]  # 材料结果数据的列数索引
+                u = results.get_mat_column(col_idx + 1)
+                F = results.get_mat_column(col_idx)
             case_ = f'{gm_name}第{story_idx+1}层材料滞回曲线'
             self.plot_result_th(u, F / 1000, '位移 [mm]', '力 [kN]', case_)
             self.update_graph_data(u, F / 1000, case_, '位移 [mm]', '力 [kN]')
             self.export_set_text(f'最大材料变形：{np.max(np.abs(u)):.6f}')
         elif self.ui.comboBox_5.currentText() == '楼层剪力包络':
             x_story = list(range(0, self.N + 1, 1))[1:]
-            story_idx = self.ui.comboBox_6.currentIndex()
-            stressStrain = results.mat
-            mat_idx = self.story_mat.copy()
-            n = 0
-            for i, sub_list in enumerate(mat_idx):
-                for j, _ in enumerate(sub_list):
-                    mat_idx[i][j] = n
-                    n += 1
-            F = np.zeros((len(t), self.N))
-            for story_idx in range(self.N):
-                if len(self.story_mat[story_idx]) == 1:
-                    # 该层只有一个材料
-                    col_idx = mat_idx[story_idx][0] * 2  # 材料结果数据的列数索引
-                    F_i = stressStrain[:, col_idx]
-                else:
-                    # 该层有多种材料
-                    F_i = np.zeros(len(t))
-                    for i in range(len(mat_idx[story_idx])):
-                        # 遍历每一种单独材料并叠加
-                        col_idx = mat_idx[story_idx][i] * 2
-                        F_temp = stressStrain[:, col_idx]
-                        F_i += F_temp
-                F[:, story_idx] = F_i
-            F = np.amax(abs(F), axis=0) / 1000
-            case_ = f'{gm_name}第{story_idx+1}层层间剪力包络'
+            F = results.max_story_shear(self.story_index) / 1000
+            case_ = f'{gm_name}层间剪力包络'
             self.plot_result_th(x_story, F, '楼层', '最大剪力 [kN]', case_, True)
             self.update_graph_data(x_story, F, case_, '楼层', '最大剪力 [kN]')
             self.export_set_text(f'最大层间剪力：{np.max(np.abs(F)):.6f}')
         elif self.ui.comboBox_5.currentText() == '绝对加速度包络':
             x_story = list(range(0, self.N + 1, 1))[1:]
-            aa = results.aa / self.g
-            max_aa = np.max(abs(aa), axis=0)
+            max_aa = results.max_aa / self.g
             case_ = f'{gm_name}绝对加速度包络'
             self.plot_result_th(x_story, max_aa, 't [s]', '绝对加速度包络 [g]', case_, True)
             self.update_graph_data(x_story, max_aa, case_, 't [s]', '绝对加速度包络 [g]')
@@ -1158,7 +1134,8 @@ if {{$result != 0}} {{
             self.thread_export_data.signal_msg.connect(self.export_message)
             self.thread_export_data.signal_info.connect(self.export_set_text)
             self.thread_export_data.start()
-        elif self.export_type == 'txt':
+        elif self.export_type in ['txt', 'parquet']:
+            export_type = self.export_type
             self.export_type = None
             txt_path = QFileDialog.getExistingDirectory(self, '选择保存路径')
             if not txt_path:
@@ -1168,7 +1145,7 @@ if {{$result != 0}} {{
                 return
             print(f'【MyWin, export_data】导出路径：{txt_path}')
             # self.export_data_txt(txt_path)
-            self.thread_export_data = Thread_export_data(self, 'txt', txt_path)
+            self.thread_export_data = Thread_export_data(self, export_type, txt_path)
             self.thread_export_data.signal_finished.connect(self.export_finished)
             self.thread_export_data.signal_msg.connect(self.export_message)
             self.thread_export_data.signal_info.connect(self.export_set_text)
@@ -1198,52 +1175,78 @@ if {{$result != 0}} {{
     def export_set_text(self, text):
         self.statusBar_label_right.setText(text)
 
-    @staticmethod
-    def is_iterable(obj):
-        try:
-            iter(obj)
-            return True
-        except TypeError:
-            return False
-
-    @staticmethod
-    def write_to_excel(ws, data: np.ndarray, row_start: int, col_start: int, fmt: int=7):
-        """写入一维或二维数组到excel
-
-        Args:
-            ws (_type_): _description_
-            data (np.ndarray): 一维或二维ndarray数组
-            row_start (int): 起始行序号
-            col_start (int): 起始列序号
-            fmt (int, optional): 保留小数位数，默认7
-        """
-        # 写入一维或二维数组到excel
-        for i, rows in enumerate(data):
-            if MyWin.is_iterable(rows):
-                for j, val in enumerate(rows):
-                    val = round(val, fmt)
-                    ws.cell(row=row_start+i, column=col_start+j, value=val)
-            else:
-                ws.cell(row=row_start+i, column=col_start, value=rows)
-
-    def set_ws_center(self, ws):
-        if self.gm_N * self.N > 8:
-            return  # 如果地震动和层数过多，则不进行居中以节省时间
-        for row in ws.iter_rows():
-            for cell in row:
-                cell.alignment = px.styles.Alignment(horizontal='center', vertical='center')
-
-
     # ----------------------------- Menu ------------------------------------------
 
     def setting_clicked(self):
         win = Win_setting(self)
         win.exec_()
 
+    def open_project(self):
+        """打开项目文件（模型与地震动）"""
+        file = QFileDialog.getOpenFileName(self, '打开', '', '项目文件 (*.nlmdof)')[0]
+        if not file:
+            return
+        try:
+            project = core.Project.load(file)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, '错误', f'无法读取项目文件！\n{e}')
+            return
+        print(f'【MyWin, open_project】打开项目文件：{file}')
+        self.close_result_store()
+        self.init_result()  # 原有计算结果与新模型不对应
+        for key in core.Project.MODEL_KEYS:
+            setattr(self, key, getattr(project, key))
+        self.mat_N = len(self.mat_lib)
+        self.current_story = 0
+        self.init_gm_var()
+        for th, gm_name, dt, unit in zip(project.gm, project.gm_name, project.gm_dt, project.gm_unit):
+            self.gm.append(th)
+            self.gm_name.append(gm_name)
+            self.gm_dt.append(dt)
+            self.gm_unit.append(unit)
+            self.gm_NPTS.append(len(th) - 1)
+            self.gm_t.append(np.linspace(0, self.gm_NPTS[-1] * dt, len(th)))
+            self.gm_duration.append(self.gm_NPTS[-1] * dt)
+            self.gm_PGA.append(max(abs(th)) if len(th) else 0)
+        self.gm_N = project.gm_N
+        self.gm_list_update()
+        self.ui.lineEdit_2.setText(str(self.N))
+        self.ui.lineEdit_6.setText(str(self.fvtime))
+        self.update_mat_list()
+        self.update_conbeBox_mat()
+        self.update_story_mat_list()
+        self.ui.textBrowser.clear()
+        self.ui.radioButton_4.setChecked(self.has_damping)
+        self.ui.radioButton_3.setChecked(not self.has_damping)
+        self.ui.lineEdit_3.setText(str(self.zeta[0]))
+        self.ui.lineEdit_5.setText(str(self.zeta[1]))
+        self.init_tab3(2)
+        self.ui.comboBox_3.setCurrentIndex(self.zeta_mode[0] - 1)
+        self.ui.comboBox_4.setCurrentIndex(self.zeta_mode[1] - 1)
+        self.statusBar_label_right.setText(f'已打开：{file}')
+
+    def save_project(self):
+        """保存项目文件（模型与地震动）"""
+        file = QFileDialog.getSaveFileName(self, '保存', 'NLMDOF.nlmdof', '项目文件 (*.nlmdof)')[0]
+        if not file:
+            return
+        if self.ui.comboBox_3.count():
+            self.zeta_mode = [self.ui.comboBox_3.currentIndex() + 1, self.ui.comboBox_4.currentIndex() + 1]
+        self.zeta = [self.ui.lineEdit_3.text(), self.ui.lineEdit_3.text()]
+        try:
+            core.Project.from_model(self).save(file)
+        except OSError as e:
+            QMessageBox.warning(self, '错误', f'无法保存项目文件！\n{e}')
+            return
+        print(f'【MyWin, save_project】已保存项目文件：{file}')
+        self.statusBar_label_right.setText(f'已保存：{file}')
+
     def closeEvent(self, event):
         print('【MyWin, closeEvent】退出')
-        if os.path.exists(f'{TEMP_PATH}/temp_NLMDOF_results'):
-            rmtree(f'{TEMP_PATH}/temp_NLMDOF_results')
+        self.close_result_store()
+        self.all_resutls = []
+        core.Results.cache.clear()
+        self.scratch.cleanup()
         super().closeEvent(event)
 
     def open_win_about(self):
@@ -1286,33 +1289,19 @@ class Win_importGM(QDialog):
         if not paths:
             print('【Win_importGM, choose_gm】没有导入地震动。')
             return 0
-        for path in paths:
-            try:
-                data = np.loadtxt(path, dtype=str, encoding='utf-8', skiprows=skip_rows)
-                if len(data) == 0:
-                    QMessageBox.warning(self, '警告', '数据为空！')
-                    return 0
-                data = data.astype(float)
-                if self.ui.radioButton.isChecked():
-                    # 单列加速度
-                    th = data
-                else:
-                    # 时间&加速度
-                    t = data[:, 0]
-                    th = data[:, 1]
-                    dt = t[1] - t[0]
-                    for i in range(len(t) - 1):
-                        if t[i + 1] - t[i] <= 0:
-                            QMessageBox.warning(self, '警告', '时间序列不是单调递增的！')
-                            return 0
-                    for ti in t:
-                        if ti < 0:
-                            QMessageBox.warning(self, '警告', '时间序列存在负数！')
-                            return 0   
-            except:
-                QMessageBox.warning(self, '警告', f'"{path}"无法读取！')
-                self.close_win()
+        single_column = self.ui.radioButton.isChecked()
+        records = self.read_gm_files(paths, dt, skip_rows, single_column)
+        if records is None:
+            print('【Win_importGM, choose_gm】已取消导入地震动。')
+            return 0
+        n_imported = 0
+        for path, record in zip(paths, records):
+            if isinstance(record, Exception):
+                QMessageBox.warning(self, '警告', f'"{path}"无法读取！\n{record}')
+                if n_imported:
+                    self.close_win()
                 return 0
+            th, dt, t = record
             # 缩放选项
             if self.ui.radioButton_4.isChecked():  # 归一化
                 if max(abs(th)) == 0:
@@ -1333,11 +1322,7 @@ class Win_importGM(QDialog):
             N = len(self.main.gm[-1]) - 1
             self.main.gm_NPTS.append(N)
             self.main.gm_duration.append(self.main.gm_NPTS[-1] * dt)
-            if self.ui.radioButton.isChecked():
-                # self.main.gm_t.append(np.arange(0, self.main.gm_duration[-1] + dt, dt))
-                self.main.gm_t.append(np.linspace(0, self.main.gm_NPTS[-1] * dt, N + 1))
-            else:
-                self.main.gm_t.append(t)
+            self.main.gm_t.append(t)
             self.main.gm_N += 1
             self.main.gm_dt.append(dt)
             gm_name_original = os.path.basename(path).split('.')[0]
@@ -1352,8 +1337,33 @@ class Win_importGM(QDialog):
             self.main.gm_name.append(gm_name)
             self.main.gm_unit.append('g')
             self.main.gm_PGA.append(max(abs(th)))
+            n_imported += 1
         self.close_win()
 
+    def read_gm_files(self, paths: list[str], dt: float, skip_rows: int, single_column: bool) -> list | None:
+        """由线程池读取地震动文件（见`core.read_gm_files`）并显示进度，取消时返回None
+
+        Returns:
+            list | None: 与paths对应的`core.read_gm`返回值或读取时的异常
+        """
+        progress = QProgressDialog('正在读取地震动...', '取消', 0, len(paths), self)
+        progress.setWindowTitle('导入地震动')
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(500)  # 读取较快时不显示
+        records = [None] * len(paths)
+        reader = core.read_gm_files(paths, dt, skip_rows, single_column)
+        try:
+            for n, (i, record) in enumerate(reader, 1):
+                records[i] = record
+                progress.setValue(n)
+                QApplication.processEvents()
+                if progress.wasCanceled():
+                    return None
+        finally:
+            reader.close()  # 取消时不再读取其余文件
+            progress.close()
+        return records
+
     def choose_records_file(self):
         """通过.records文件导入"""
         path = Path(QFileDialog.getOpenFileName(self, '选择.records文件')[0])
@@ -1933,12 +1943,15 @@ class Win_setting(QDialog):
         self.ui.lineEdit_2.editingFinished.connect(self.value_changed)
         self.ui.pushButton.clicked.connect(self.ok)
         self.ui.pushButton_2.clicked.connect(self.cancel)
-        self.ui.pushButton_3.clicked.connect(lambda: self.init_values(self.main.setting_default))
+        self.ui.pushButton_3.clicked.connect(lambda: self.init_values(self.main.setting_default, 1))
+        self.ui.spinBox.setMaximum(os.cpu_count() or 1)
         self.init_values()
 
-    def init_values(self, setting=None):
+    def init_values(self, setting=None, worker_num=None):
         if not setting:
             setting = self.main.setting
+        if not worker_num:
+            worker_num = self.main.worker_num
         self.ui.comboBox.setCurrentIndex(setting[0])
         self.ui.comboBox_2.setCurrentIndex(setting[1])
         self.ui.comboBox_3.setCurrentIndex(setting[2])
@@ -1954,6 +1967,7 @@ class Win_setting(QDialog):
         self.ui.lineEdit.setText(setting[12])
         self.ui.lineEdit_2.setText(setting[13])
         self.ui.lineEdit_7.setText(setting[14])
+        self.ui.spinBox.setValue(worker_num)
 
     def get_value(self):
         idx1 = self.ui.comboBox.currentIndex()
@@ -2049,8 +2063,10 @@ class Win_setting(QDialog):
             return
         setting = self.get_value()
         self.main.setting = setting
+        self.main.worker_num = self.ui.spinBox.value()
         self.accept()
         print('【Win_setting, ok】设置：\n', setting)
+        print('【Win_setting, ok】并行进程数：', self.main.worker_num)
 
     def cancel(self):
         value = self.old_values
@@ -2103,6 +2119,7 @@ class Win_run(QDialog):
         self.thread_run.signal_finished.connect(self.run_finished)
         self.thread_run.signal_step.connect(self.updata_progressBar)
         self.thread_run.signal_converge.connect(self.is_converge)
+        self.thread_run.signal_cache.connect(self.show_cache)
         self.thread_run.start()
 
     def run_finished(self, n):
@@ -2119,6 +2136,10 @@ class Win_run(QDialog):
         self.ui.label_2.setText(f'正在计算第{n}条地震动（共{self.main.gm_N}条）')
         
 
+    def show_cache(self, list_):
+        n_cached, gm_N = list_
+        self.ui.label_3.setText(f'复用计算结果：{n_cached}条，需计算：{gm_N - n_cached}条')
+
     def is_converge(self, list_):
         if list_[0] == 0:
             self.accept()
@@ -2129,163 +2150,372 @@ class Win_run(QDialog):
             QMessageBox.warning(self, '警告', f'材料参数不正确！')
             self.signal_converge_fail.emit()
 
-    @staticmethod
-    def add_free_vibration(th: np.ndarray, fv_time: int | float, dt: float) -> np.ndarray:
-        """为时程序列补零"""
-        n = int(fv_time / dt) # 补零个数
-        th_0 = np.zeros(n)
-        th = np.append(th, th_0)
-        return th
+
+def terminate_executor(executor: ProcessPoolExecutor):
+    """取消尚未开始的任务并终止正在计算的子进程（中断计算时使用，不等待计算完成）"""
+    terminate_workers = getattr(executor, 'terminate_workers', None)  # Python 3.14+
+    if terminate_workers is not None:
+        terminate_workers()
+        return
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
 
 
 class WorkerThread(QThread):
     signal_finished = pyqtSignal(int)  # 1: 正常计算完成，0: 计算中断
     signal_step = pyqtSignal(list)
     signal_converge = pyqtSignal(list)  # [n, gm_name], n=1: 收敛，n=0: 不收敛
+    signal_cache = pyqtSignal(list)  # [复用计算结果的地震动数, 地震动总数]
 
     def __init__(self, main: MyWin, script_type: str, parent=None):
         super().__init__(parent)
         self.main = main
         self.script_type = script_type
         self.is_kill = 0
+        self.store: core.ResultStore = None  # 计算结果库，每条地震动计算完成后写入
+        self.cache: core.ResultCache = None  # 计算结果缓存
+        self.model_key: str = None  # 模型的哈希值
+        self.modes_key: str = None  # 模态分析的哈希值（仅与质量、材料与模态数有关）
+        self.has_modes = False  # 结果库中是否已有周期与振型（否则由第1条需计算的地震动输出文件）
+        self.keys: list[str] = []  # 各条地震动的哈希值（输入参数的指纹）
+        self.todo: list[int] = []  # 需计算的地震动序号（输入参数改变或新增的地震动）
+        self.n_cached = 0  # 复用计算结果的地震动数
+        self.status: int = None  # 计算状态，结果库关闭后由signal_finished发出
+
+    @property
+    def recorder(self) -> Literal['file', 'memory', 'binary']:
+        """结果输出方式（见`MyWin.recorder`）"""
+        return MyWin.recorder or core.default_recorder(self.script_type)
+
+    def finish(self, n: int):
+        """n: 1-正常计算完成，0-计算中断"""
+        self.status = n
 
     def run(self):
+        try:
+            os.replace(self.main.result_store_file, self.main.previous_store_file)
+        except OSError:
+            pass  # 首次计算
+        self.store = core.ResultStore(self.main.result_store_file, 'w')
+        try:
+            self.reuse_results()
+            if not self.todo:
+                self.signal_step.emit([self.main.gm_N, 100])
+                self.finish(1)
+            elif self.script_type == 'tcl':
+                self.run_tcl()
+            elif self.script_type == 'np' and len(self.todo) > 1:
+                self.run_batch()
+            elif self.script_type in ['py', 'np'] and self.main.worker_num > 1 and len(self.todo) > 1:
+                self.run_parallel()
+            else:
+                self.run_serial()
+            self.save_modes_to_cache()
+        finally:
+            self.store.close()
+            Path(self.main.previous_store_file).unlink(missing_ok=True)
+        if self.status is not None:
+            self.signal_finished.emit(self.status)  # 结果库关闭后再通知主窗口读取
+
+    def reuse_results(self):
+        """按各条地震动输入参数的指纹（模型与地震动的哈希值）复用计算结果，仅计算改变或新增的地震动
+
+        依次查找上次计算的结果库与缓存（与地震动名及顺序无关），找到的计算结果直接复制至结果库，
+        其余地震动加入`todo`。结果库中的地震动名与当前地震动一致，`all_resutls`的顺序不变。
+        """
         gm_N = self.main.gm_N
-        for i in range(gm_N):
-            print(f'【WorkerThread, run】正在运行...({i+1}/{gm_N})')
+        args = [self.get_py_args(i) for i in range(gm_N)]
+        self.model_key = core.ResultCache.model_key(args[0], self.script_type)
+        self.keys = [core.ResultCache.record_key(self.model_key, arg) for arg in args]
+        self.modes_key = core.ResultCache.modes_key(args[0], self.script_type)
+        self.todo = list(range(gm_N))
+        if os.path.exists(self.main.previous_store_file):
+            try:
+                with core.ResultStore(self.main.previous_store_file, 'r') as previous:
+                    previous_keys = previous.keys
+                    todo = []
+                    for i in self.todo:
+                        if self.keys[i] in previous_keys:
+                            self.store.copy_results(previous, previous_keys[self.keys[i]], self.main.gm_name[i])
+                        else:
+                            todo.append(i)
+                    self.todo = todo
+                    if previous.file.attrs.get('modes_key') == self.modes_key and 'modes' in previous.file:
+                        self.store.write_modes(previous.read_modes())
+                        self.has_modes = True
+            except OSError as e:
+                print(f'【WorkerThread, reuse_results】无法读取上次的计算结果：{e}')
+        if MyWin.use_cache:
+            try:
+                self.cache = core.ResultCache(RESULT_CACHE, MyWin.cache_budget)
+            except OSError as e:
+                print(f'【WorkerThread, reuse_results】无法创建缓存文件夹：{e}')
+        if self.cache is not None:
+            self.todo = [i for i in self.todo if not self.cache.copy_to(self.keys[i], self.store, self.main.gm_name[i])]
+            if not self.has_modes:
+                mode_results = self.cache.get_modes(self.modes_key)
+                if mode_results is not None:
+                    self.store.write_modes(mode_results)
+                    self.has_modes = True
+        if not self.has_modes:
+            # 模态分析只进行一次，各条地震动不再输出周期与振型文件
+            mode_results = self.compute_modes(args[0])
+            if mode_results is not None:
+                self.store.write_modes(mode_results)
+                self.has_modes = True
+                if self.cache is not None:
+                    self.cache.put_modes(self.modes_key, mode_results)
+        if not self.todo and not self.has_modes:
+            self.todo = [0]  # 周期与振型需由第1条地震动重新输出
+        self.store.file.attrs['model_key'] = self.model_key
+        self.store.file.attrs['modes_key'] = self.modes_key
+        self.n_cached = gm_N - len(self.todo)
+        print(f'【WorkerThread, reuse_results】复用计算结果：{self.n_cached}条，需计算：{len(self.todo)}条')
+        self.signal_cache.emit([self.n_cached, gm_N])
+
+    def compute_modes(self, args: tuple) -> core.ModeResults | None:
+        """模态分析（不输出文件），tcl求解器或模态分析出错时返回None，由第1条需计算的地震动输出周期与振型文件"""
+        N, m, mat_lib, story_mat = args[:4]
+        mode_num = args[7]
+        try:
+            if self.script_type == 'py':
+                return core.modes_OS_py(N, m, mat_lib, story_mat, mode_num)
+            if self.script_type == 'np' and core.check_NP_mat(mat_lib):
+                return core.modes_NP(N, m, mat_lib, story_mat, mode_num)
+        except Exception as e:
+            print(f'【WorkerThread, compute_modes】模态分析出错：{e}')
+        return None
+
+    def record_mode(self, i: int) -> bool:
+        """第i条地震动是否输出周期与振型文件"""
+        return not self.has_modes and i == self.todo[0]
+
+    def save_modes_to_cache(self):
+        """缓存本次计算输出的周期与振型（tcl求解器）"""
+        if self.cache is None or self.has_modes or self.modes_key in self.cache:
+            return
+        if (Path(self.main.TEMP_PATH) / 'temp_NLMDOF_results' / 'Periods.txt').exists():
+            self.cache.put_modes(self.modes_key, core.ModeResults.from_file(self.main.mode_num, self.main.TEMP_PATH))
+
+    def store_results(self, i: int, done: int, results: core.Results | None):
+        """将第i条地震动的计算结果写入结果库，results为None时读取结果文件，
+        写入后不再保留于内存中（写入失败时保留于`memory_results`）
+        """
+        if done != 1:
+            return
+        gm_name = self.main.gm_name[i]
+        if results is None:
+            if core.Results.binary_exists(gm_name, self.main.TEMP_PATH):
+                results = core.Results.from_binary(gm_name, self.main.TEMP_PATH, mmap=True)
+            else:
+                results = core.Results.from_file(gm_name, self.main.TEMP_PATH)
+        try:
+            self.store.write_results(gm_name, results, done, self.keys[i])
+        except (OSError, ValueError) as e:
+            print(f'【WorkerThread, store_results】{gm_name}写入结果库失败：{e}')
+            self.main.memory_results[i] = results
+            return
+        if self.cache is not None:
+            self.cache.put_from(self.keys[i], self.store, gm_name)
+
+    def run_serial(self):
+        gm_N = self.main.gm_N
+        for n, i in enumerate(self.todo, self.n_cached + 1):
+            print(f'【WorkerThread, run】正在运行...({n}/{gm_N})')
             if self.script_type == 'py':
                 done = self.solve_py(i)
             else:
-                done = self.solve_tcl(i)
-            pct = int((i + 1) / gm_N * 100)
-            self.signal_step.emit([i + 1, pct])
+                done = self.solve_np(i)
+            pct = int(n / gm_N * 100)
+            self.signal_step.emit([n, pct])
             if self.is_kill == 1:
-                self.signal_finished.emit(0)
+                self.finish(0)
                 break  # 完成计算
             if done in [0, 2]:
                 break  # 不收敛
         else:
-            self.signal_finished.emit(1)
+            self.finish(1)
+
+    def run_parallel(self):
+        """将各条地震动分发至进程池并行计算，每个进程拥有独立的OpenSees模型域"""
+        gm_N = self.main.gm_N
+        worker_num = min(self.main.worker_num, len(self.todo))
+        print(f'【WorkerThread, run_parallel】并行计算，进程数：{worker_num}')
+        run_func = core.run_NP if self.script_type == 'np' else core.run_OS_reuse  # 各进程复用模型域
+        finished = self.n_cached
+        done = 1
+        executor = ProcessPoolExecutor(max_workers=worker_num)
+        futures = {}
+        todo = iter(self.todo)
+
+        def submit():
+            # 限制等待计算的地震动数量（与`core.run_project`相同），以限制内存占用
+            while len(futures) < 2 * worker_num:
+                i = next(todo, None)
+                if i is None:
+                    break
+                future = executor.submit(run_func, *self.get_py_args(i), record_mode=self.record_mode(i), recorder=self.recorder)
+                futures[future] = i
+
+        for i, get_result in self.iter_completed(futures, submit):
+            gm_name = self.main.gm_name[i]
+            try:
+                done, _, _, results = get_result()
+            except Exception as e:
+                print(f'【WorkerThread, run_parallel】{gm_name}计算出错：{e}')
+                done, results = 0, None
+            self.store_results(i, done, results)
+            finished += 1
+            print(f'【WorkerThread, run_parallel】已完成{gm_name}...({finished}/{gm_N})')
+            self.signal_converge.emit([done, gm_name])
+            self.signal_step.emit([finished, int(finished / gm_N * 100)])
+            if self.is_kill == 1 or done in [0, 2]:
+                break
+        if self.is_kill == 1 or done in [0, 2]:
+            terminate_executor(executor)  # 不等待正在计算的地震动
+        else:
+            executor.shutdown(wait=True)
+        if self.is_kill == 1:
+            self.finish(0)  # 计算中断
+        elif done not in [0, 2]:
+            self.finish(1)
+
+    def run_batch(self):
+        """NumPy求解器：将地震动分组同时计算
+
+        地震动按持时排序后依次分组，使同组地震动的持时相近（已完成的地震动仍占用计算量）。
+        每组至多`NP_BATCH_SIZE`条地震动（并行计算时组数不少于进程数），各组计算完成后更新进度并检查是否中断。
+        """
+        gm_N = self.main.gm_N
+        idx = sorted(self.todo, key=lambda i: len(self.main.gm[i]) * self.main.gm_dt[i])
+        n_batch = max(min(self.main.worker_num, len(idx)), -(-len(idx) // NP_BATCH_SIZE))
+        batches: list[list[int]] = [batch.tolist() for batch in np.array_split(idx, n_batch)]
+        worker_num = min(self.main.worker_num, len(batches))
+        print(f'【WorkerThread, run_batch】同时计算，共{len(batches)}组，进程数：{worker_num}')
+        if worker_num > 1:
+            executor = ProcessPoolExecutor(max_workers=worker_num)
+            futures = {}
+            for batch in batches:
+                future = executor.submit(core.run_NP_batch, *self.get_batch_args(batch), record_mode=self.record_mode(batch[0]),
+                                         recorder=self.recorder)
+                futures[future] = batch
+            results = self.iter_completed(futures)
+        else:
+            executor = None
+            results = ((batch, partial(core.run_NP_batch, *self.get_batch_args(batch), record_mode=self.record_mode(batch[0]),
+                                       recorder=self.recorder))
+                       for batch in batches)
+        finished = self.n_cached
+        done = 1
+        for batch, get_result in results:
+            try:
+                done_list, _, _, results_list = get_result()
+            except Exception as e:
+                print(f'【WorkerThread, run_batch】计算出错：{e}')
+                done_list, results_list = [0] * len(batch), None
+            for j, (i, done) in enumerate(zip(batch, done_list)):
+                self.store_results(i, done, results_list[j] if results_list is not None else None)
+                finished += 1
+                self.signal_converge.emit([done, self.main.gm_name[i]])
+                if done in [0, 2]:
+                    break
+            print(f'【WorkerThread, run_batch】已完成{finished}条地震动（共{gm_N}条）')
+            self.signal_step.emit([finished, int(finished / gm_N * 100)])
+            if self.is_kill == 1 or done in [0, 2]:
+                break
+        if executor is not None:
+            if self.is_kill == 1 or done in [0, 2]:
+                terminate_executor(executor)  # 不等待正在计算的组
+            else:
+                executor.shutdown(wait=True)
+        if self.is_kill == 1:
+            self.finish(0)  # 计算中断
+        elif done not in [0, 2]:
+            self.finish(1)
+
+    def iter_completed(self, futures: dict, submit: Callable[[], None] | None=None) -> Iterator[tuple[int | list[int], Callable]]:
+        """按完成顺序返回(futures的值, future.result)，等待期间每隔0.2 s检查是否中断（中断时停止迭代）
+
+        已返回的future从futures中移除；submit不为None时，每次等待前调用以向futures中提交新的任务。
+        """
+        while True:
+            if submit is not None:
+                submit()
+            if not futures:
+                return
+            ready, _ = wait(futures, timeout=0.2, return_when=FIRST_COMPLETED)
+            for future in ready:
+                yield futures.pop(future), future.result
+            if self.is_kill == 1:
+                return
+
+    def get_batch_args(self, batch: list[int]) -> tuple:
+        """生成同时计算多条地震动时调用`core.run_NP_batch`所需的参数"""
+        args = [self.get_py_args(i) for i in batch]
+        N, m, mat_lib, story_mat, _, _, _, mode_num, has_damping, zeta_mode, zeta, setting, path, _, g, print_result = args[0]
+        ths = [arg[4] for arg in args]
+        SFs = [arg[5] for arg in args]
+        dts = [arg[6] for arg in args]
+        gm_names = [arg[13] for arg in args]
+        return N, m, mat_lib, story_mat, ths, SFs, dts, mode_num, has_damping, zeta_mode, zeta, setting, path, gm_names, g, print_result
 
     def solve_py(self, i):
         print(f'【WorkerThread, solve_py】正在计算第{i+1}条地震动...')
-        N = self.main.N
-        m = self.main.m
-        mat_lib = self.main.mat_lib
-        mat_lib = self.check_BW_mat(mat_lib)
-        mat_lib = [i[3:] for i in mat_lib]
-        story_mat = self.main.story_mat
-        th = self.main.gm[i]
-        unit = self.main.gm_unit[i]
-        if unit == 'g':
-            SF = self.main.unit_SF[0]
-        elif unit == 'mm/s^2':
-            SF = self.main.unit_SF[1]
-        elif unit == 'cm/s^2':
-            SF = self.main.unit_SF[2]
-        elif unit == 'm/s^2':
-            SF = self.main.unit_SF[3]
-        dt = self.main.gm_dt[i]
-        th = Win_run.add_free_vibration(th, self.main.fvtime, dt)
-        has_damping = self.main.has_damping
-        mode_num = self.main.mode_num
-        zeta_mode = self.main.zeta_mode
-        zeta = self.main.zeta
-        zeta = [float(i) for i in zeta]
-        setting = self.main.setting.copy()
-        setting[0] = MyWin.setting1[setting[0]]
-        setting[1] = MyWin.setting2[setting[1]]
-        setting[2] = MyWin.setting3[setting[2]]
-        setting[3] = MyWin.setting4[setting[3]]
-        setting[4] = MyWin.setting5[setting[4]]
-        setting[5] = MyWin.setting6[setting[5]]
-        setting[8:] = [eval(i) for i in setting[8:]]
-        path = self.main.TEMP_PATH
-        gm_name = self.main.gm_name[i]
-        done, T, element_tags = core.run_OS_py(
-            N, m, mat_lib, story_mat, th, SF, dt, mode_num, has_damping, zeta_mode, zeta, setting, path, gm_name, MyWin.g, MyWin.print_result
-        )
-        self.signal_converge.emit([done, gm_name])
+        done, T, element_tags, results = core.run_OS_reuse(*self.get_py_args(i), record_mode=self.record_mode(i),
+                                                            recorder=self.recorder)
+        self.store_results(i, done, results)
+        self.signal_converge.emit([done, self.main.gm_name[i]])
         return done
 
-    def solve_tcl(self, i):
-        print(f'【WorkerThread, solve_tcl】正在计算第{i+1}条地震动')
-        N = self.main.N
-        m = self.main.m
-        mat_lib = self.main.mat_lib
-        mat_lib = self.check_BW_mat(mat_lib)
-        story_mat = self.main.story_mat
-        th = self.main.gm[i]
-        unit = self.main.gm_unit[i]
-        if unit == 'g':
-            SF = self.main.unit_SF[0]
-        elif unit == 'mm/s^2':
-            SF = self.main.unit_SF[1]
-        elif unit == 'cm/s^2':
-            SF = self.main.unit_SF[2]
-        elif unit == 'm/s^2':
-            SF = self.main.unit_SF[3]
-        dt = self.main.gm_dt[i]
-        th = Win_run.add_free_vibration(th, self.main.fvtime, dt)
-        mode_num = self.main.mode_num
-        has_damping = self.main.has_damping
-        zeta_mode = self.main.zeta_mode
-        zeta = self.main.zeta
-        setting = self.main.setting
-        path = self.main.TEMP_PATH
-        path_gm = path + '\\temp_NLMDOF_results\\temp_gm'
-        if not os.path.exists(path_gm):
-            os.makedirs(path_gm)
-        th_path = path_gm + '\\th.txt'
-        th_path = th_path.replace('\\', '/')
-        np.savetxt(th_path, th)
-        gm_name = self.main.gm_name[i]
-        NPTS = len(th) - 1
-        tcl_script = MyWin.build_tcl_file(
-            N, m, mat_lib, story_mat, th_path, SF, dt, mode_num, has_damping, zeta_mode, zeta, setting, path, gm_name, NPTS, MyWin.print_result
-        )
-        path_tcl = path + '\\temp_NLMDOF_results\\tcl_file'
-        if not os.path.exists(path_tcl):
-            os.makedirs(path_tcl)
-        with open(path_tcl + '\\main.tcl', 'w') as f:
-            f.write(tcl_script)
-        os.system(f"{self.main.OS_terminal} {path_tcl}\\main.tcl")
-        try:
-            with open(path + '\\temp_NLMDOF_results\\done.txt', 'r') as f:
-                done_file = f.read()
-                if '1' in done_file:
-                    done = 1
-                elif '2' in done_file:
-                    done = 2
-                else:
-                    done = 0
-        except FileNotFoundError:
-            print(f'【WorkerThread, solve_tcl】未找到文件：{path}\\temp_NLMDOF_results\\done.txt')
-            done = 0
-        self.signal_converge.emit([done, gm_name])
+    def solve_np(self, i):
+        print(f'【WorkerThread, solve_np】正在计算第{i+1}条地震动...')
+        done, T, element_tags, results = core.run_NP(*self.get_py_args(i), record_mode=self.record_mode(i),
+                                                     recorder=self.recorder)
+        self.store_results(i, done, results)
+        self.signal_converge.emit([done, self.main.gm_name[i]])
         return done
-    
-    @staticmethod
-    def check_BW_mat(mat_lib):
-        """检查是否有boucwen模型，有则替换模型参数格式"""
-        # 由Fy格式转为k格式
-        new_mat_lib = []
-        for _, mat in enumerate(mat_lib):
-            if mat[1] == 2:
-                # 材料为内置的Wen模型
-                new_mat = mat.copy()[:5]
-                gamma2, beta2 = 0.5, 0.5
-                Fy, uy = eval(mat[5]), eval(mat[6])
-                alpha, n = eval(mat[7]), eval(mat[8])
-                k = Fy / uy
-                beta1 = beta2 / uy ** n
-                gamma1 = gamma2 / uy ** n
-                new_mat.extend([alpha, k, n, gamma1, beta1, 1, 0, 0, 0])
-                print('【Win_run, check_BW_mat】更改BoucWen模型格式：', new_mat)
-            else:
-                new_mat = mat.copy()
-            new_mat_lib.append(new_mat)
-        return new_mat_lib
+
+    def get_py_args(self, i) -> tuple:
+        """生成第i条地震动调用`core.run_OS_py`（或`core.run_NP`）所需的参数"""
+        return core.get_py_args(self.main, i, self.main.TEMP_PATH, MyWin.print_result)
+
+    def run_tcl(self):
+        """tcl求解器：由常驻的OpenSees进程池计算（见`core.TclPool`），进程数大于1时并行计算"""
+        gm_N = self.main.gm_N
+        worker_num = max(1, min(self.main.worker_num, len(self.todo)))
+        print(f'【WorkerThread, run_tcl】OpenSees进程数：{worker_num}')
+        gm_cache = core.GMCache(f'{RESULT_CACHE}/gm')  # 地震动时程文件在多次计算及不同缩放系数间共用
+        recorder = 'file' if self.recorder == 'file' else 'binary'  # tcl求解器不能直接返回计算结果
+        jobs = []
+        for i in self.todo:
+            args = self.get_py_args(i)
+            jobs.append((i, self.record_mode(i), core.run_OS_tcl_args(args, gm_cache.file(args[4]), recorder)))
+        try:
+            pool = core.TclPool(self.main.OS_terminal, worker_num, self.main.TEMP_PATH)
+        except OSError as e:
+            print(f'【WorkerThread, run_tcl】无法启动OpenSees：{e}')
+            self.finish(0)
+            return
+        finished = self.n_cached
+        done = 1
+        try:
+            for i, done in pool.imap_unordered(jobs):
+                gm_name = self.main.gm_name[i]
+                self.store_results(i, done, None)
+                finished += 1
+                print(f'【WorkerThread, run_tcl】已完成{gm_name}...({finished}/{gm_N})')
+                self.signal_converge.emit([done, gm_name])
+                self.signal_step.emit([finished, int(finished / gm_N * 100)])
+                if self.is_kill == 1 or done in [0, 2]:
+                    break
+        finally:
+            pool.close(kill=self.is_kill == 1 or done in [0, 2])  # 中断时不等待正在进行的计算
+        if self.is_kill == 1:
+            self.finish(0)  # 计算中断
+        elif done not in [0, 2]:
+            self.finish(1)
 
 
 class Win_tcl_file(QDialog):
@@ -2391,6 +2621,7 @@ class Win_export(QDialog):
     def init_ui(self):
         self.ui.pushButton.clicked.connect(self.set_txt)
         self.ui.pushButton_2.clicked.connect(self.set_xlsx)
+        self.ui.pushButton_3.clicked.connect(self.set_parquet)
 
     def set_xlsx(self):
         self.main.export_type = 'xlsx'
@@ -2400,6 +2631,10 @@ class Win_export(QDialog):
         self.main.export_type = 'txt'
         self.accept()
 
+    def set_parquet(self):
+        self.main.export_type = 'parquet'
+        self.accept()
+
 class Thread_export_data(QThread):
     signal_finished = pyqtSignal()
     signal_msg = pyqtSignal(list)
@@ -2414,360 +2649,50 @@ class Thread_export_data(QThread):
     def run(self):
         if self.export_type == 'xlsx':
             self.export_data_xlsx(self.path)
+        elif self.export_type == 'parquet':
+            self.export_data_parquet(self.path)
         else:
             self.export_data_txt(self.path)
 
     def export_data_txt(self, output_path):
-        mode_results = self.main.mode_results
-        all_resutls = self.main.all_resutls
-        T, mode = mode_results.T, mode_results.mode
-        np.savetxt(f'{output_path}/周期.txt', T, fmt='%.7f')
-        np.savetxt(f'{output_path}/振型.txt', mode, fmt='%.7f')
-        for i, gm_name in enumerate(self.main.gm_name):
-            print(f'Thread_export_data, export_data_txt】正在导出计算结果 ({i+1}/{self.main.gm_N})\r', end='')
-            results = all_resutls[i]
-            self.signal_info.emit(f'正在导出计算结果 ({i+1}/{self.main.gm_N})...')
-            t, base_a, base_v, base_u, base_V, aa, av, au, ra, rv, ru, resu, mat = results.all_responses
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_时间序列.txt', t, fmt='%.7f')
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_基底加速度(g).txt', base_a / self.main.g, fmt='%.7f')
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_基底速度(mm_s).txt', base_v, fmt='%.7f')
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_基底位移(mm).txt', base_u, fmt='%.7f')
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_底部剪力(kN).txt', base_V / 1000, fmt='%.7f')
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_绝对加速度(g).txt', aa / self.main.g, fmt='%.7f')
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_绝对速度(mm_s).txt', av, fmt='%.7f')
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_绝对位移(mm).txt', au, fmt='%.7f')
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_相对加速度.txt', ra / self.main.g, fmt='%.7f')
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_相对速度.txt', rv, fmt='%.7f')
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_相对位移.txt', rv, fmt='%.7f')
-            interstory_ru = np.diff(ru, axis=1)
-            interstory_ru = np.column_stack((ru[:, 0], interstory_ru))
-            max_IDR = np.amax(abs(interstory_ru), axis=0)
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_最大层间位移(mm).txt', max_IDR, fmt='%.7f')
-            resu = results.resu
-            RIDR = np.diff(resu)
-            RIDR = np.insert(RIDR, 0, resu[0])
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_相对残余位移(mm).txt', RIDR, fmt='%.7f')
-            max_aa = np.max(abs(aa), axis=0)
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_绝对加速度包络(g).txt', max_aa / self.main.g, fmt='%.7f')
-            shear = np.zeros((len(t), self.main.N))
-            mat_idx: list[list[int]] = []
-            n = 0
-            for story_idx, sub_list in enumerate(self.main.story_mat):
-                mat_idx.append([])
-                hys_curve_parallel = np.zeros((len(t), 2))  # 并联材料滞回曲线
-                for tag, _ in enumerate(sub_list):
-                    mat_idx[story_idx].append(n)
-                    col_idx = 2 * n
-                    hys_curve = np.zeros((len(t), 2))  # 滞回曲线
-                    hys_curve[:, 0] = mat[:, col_idx + 1]
-                    hys_curve[:, 1] = mat[:, col_idx] / 1000
-                    hys_curve_parallel[:, 0] = mat[:, col_idx + 1]
-                    hys_curve_parallel[:, 1] += mat[:, col_idx] / 1000
-                    np.savetxt(f'{output_path}/{i+1}_{gm_name}_{story_idx+1}层材料滞回曲线_{self.main.mat_lib[tag-1][0]}.txt', hys_curve, fmt='%.7f')
-                    n += 1
-                    shear[:, story_idx] += mat[:, col_idx] / 1000
-                if len(sub_list) > 1:
-                    np.savetxt(f'{output_path}/{i+1}_{gm_name}_{story_idx+1}层并联材料滞回曲线.txt', hys_curve_parallel, fmt='%.7f')
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_楼层剪力(kN).txt', shear, fmt='%.7f')
-            shear_enve = np.amax(abs(shear), axis=0)
-            np.savetxt(f'{output_path}/{i+1}_{gm_name}_楼层剪力包络(kN).txt', shear_enve, fmt='%.7f')
-        with open(f'{output_path}/单位制.txt', 'w') as f:
-            f.write('单位：\nN，mm，s\n')
-        print(f'Thread_export_data, export_data_txt】已保存计算结果至：{output_path}')
+        def myprint(text: str):
+            print(f'【Thread_export_data, export_data_txt】{text}{space}\r', end='')
+            self.signal_info.emit(text)
+        space = ' ' * 20
+        core.export_txt(output_path, self.main.all_resutls, self.main.gm_name, self.main.mode_results,
+                        self.main.story_index, [mat[0] for mat in self.main.mat_lib], self.main.g, myprint=myprint)
+        print(f'\n【Thread_export_data, export_data_txt】已保存计算结果至：{output_path}')
         self.signal_msg.emit(['information', f'已保存计算结果至：\n{output_path}'])
         self.signal_finished.emit()
 
+    def export_data_parquet(self, output_path):
+        def myprint(text: str):
+            print(f'【Thread_export_data, export_data_parquet】{text}{space}\r', end='')
+            self.signal_info.emit(text)
+        space = ' ' * 20
+        try:
+            core.export_parquet(output_path, self.main.all_resutls, self.main.gm_name,
+                                self.main.story_index, self.main.g, myprint=myprint)
+            print(f'\n【Thread_export_data, export_data_parquet】已保存计算结果至：{output_path}')
+            self.signal_msg.emit(['information', f'已保存计算结果至：\n{output_path}'])
+        except OSError:
+            self.signal_msg.emit(['critical', '无法保存文件，检查文件是否处于打开状态！'])
+        self.signal_finished.emit()
+
     def export_data_xlsx(self, excel_path):
+        def myprint(text: str):
+            print(f'【Thread_export_data, export_data_xlsx】{text}{space}\r', end='')
+            self.signal_info.emit(text)
         space = ' ' * 20
-        print(f'【Thread_export_data, export_data_xlsx】正在导出振型与刚度{space}\r', end='')
-        self.signal_info.emit(f'正在导出振型与刚度...')
-        mode_results = self.main.mode_results
-        all_resutls = self.main.all_resutls
-        T, mode = mode_results.T, mode_results.mode
-        wb = px.Workbook()
-        # 1 振型&周期
-        ws: Worksheet = wb.active
-        ws.title = '振型与周期'
-        ws.cell(1, 1, '振型')
-        ws.cell(1, 2, '周期 (s)')
-        self.main.write_to_excel(ws, [i for i in range(1, 1 + len(T))], 2, 1)
-        self.main.write_to_excel(ws, T, 2, 2)
-        ws.cell(1, 4, '楼层')
-        ws.merge_cells(start_row=1, start_column=4, end_row=2, end_column=4)
-        ws.merge_cells(start_row=1, start_column=5, end_row=1, end_column=4 + len(T))
-        ws.cell(1, 5, '振型位移 (mm)')
-        for i in range(self.main.N):
-            ws.cell(3 + i, 4, i + 1)
-        for i in range(len(mode)):
-            ws.cell(2, 5 + i, f'{i + 1}阶')
-        self.main.write_to_excel(ws, np.array(mode).T, 3, 5)
-        self.set_ws_center(ws)
-        # 2 相对位移
-        ws: Worksheet = wb.create_sheet('相对位移')
-        for i in range(self.main.gm_N):
-            print(f'【Thread_export_data, export_data_xlsx】正在导出相对位移 ({i+1}/{self.main.gm_N}){space}\r', end='')
-            self.signal_info.emit(f'正在导出相对位移 ({i+1}/{self.main.gm_N})...')
-            results = all_resutls[i]
-            t, ru = results.t, results.ru
-            ws.merge_cells(start_row=1, start_column=1+(self.main.N+1)*i, end_row=1, end_column=(self.main.N+1)*(i+1))
-            ws.cell(2, 1+(self.main.N+1)*i, 't')
-            for j in range(self.main.N):
-                ws.cell(2, 2+(self.main.N+1)*i+j, f'{j+1}层')
-            gm_name = self.main.gm_name[i]
-            ws.cell(1, 1+(self.main.N+1)*i, gm_name)
-            self.main.write_to_excel(ws, ru, 3, 2+(self.main.N+1)*i)
-            self.main.write_to_excel(ws, t, 3, 1+(self.main.N+1)*i)
-        self.set_ws_center(ws)
-        # 3 相对速度
-        ws: Worksheet = wb.create_sheet('相对速度')
-        for i in range(self.main.gm_N):
-            print(f'【Thread_export_data, export_data_xlsx】正在导出相对速度 ({i+1}/{self.main.gm_N}){space}\r', end='')
-            self.signal_info.emit(f'正在导出相对速度 ({i+1}/{self.main.gm_N})...')
-            results = all_resutls[i]
-            t, rv = results.t, results.rv
-            ws.merge_cells(start_row=1, start_column=1+(self.main.N+1)*i, end_row=1, end_column=(self.main.N+1)*(i+1))
-            ws.cell(2, 1+(self.main.N+1)*i, 't')
-            for j in range(self.main.N):
-                ws.cell(2, 2+(self.main.N+1)*i+j, f'{j+1}层')
-            gm_name = self.main.gm_name[i]
-            ws.cell(1, 1+(self.main.N+1)*i, gm_name)
-            self.main.write_to_excel(ws, rv, 3, 2+(self.main.N+1)*i)
-            self.main.write_to_excel(ws, t, 3, 1+(self.main.N+1)*i)
-        self.set_ws_center(ws)
-        # 4 相对加速度
-        ws: Worksheet = wb.create_sheet('相对加速度')
-        for i in range(self.main.gm_N):
-            print(f'【Thread_export_data, export_data_xlsx】正在导出相对加速度 ({i+1}/{self.main.gm_N}){space}\r', end='')
-            results = all_resutls[i]
-            t, ra = results.t, results.ra
-            self.signal_info.emit(f'正在导出相对加速度 ({i+1}/{self.main.gm_N})...')
-            ws.merge_cells(start_row=1, start_column=1+(self.main.N+1)*i, end_row=1, end_column=(self.main.N+1)*(i+1))
-            ws.cell(2, 1+(self.main.N+1)*i, 't')
-            for j in range(self.main.N):
-                ws.cell(2, 2+(self.main.N+1)*i+j, f'{j+1}层')
-            gm_name = self.main.gm_name[i]
-            ws.cell(1, 1+(self.main.N+1)*i, gm_name)
-            self.main.write_to_excel(ws, ra, 3, 2+(self.main.N+1)*i)
-            self.main.write_to_excel(ws, t, 3, 1+(self.main.N+1)*i)
-        self.set_ws_center(ws)
-        # 5 最大层间位移
-        ws: Worksheet = wb.create_sheet('最大层间位移')
-        ws.merge_cells(start_row=1, start_column=1, end_row=2, end_column=1)
-        ws.cell(1, 1, '楼层')
-        ws.merge_cells(start_row=1, start_column=2, end_row=1, end_column=1+self.main.gm_N)
-        ws.cell(1, 2, '最大层间位移')
-        for i in range(self.main.N):
-            ws.cell(3+i, 1, i+1)
-        for i in range(self.main.gm_N):
-            print(f'【Thread_export_data, export_data_xlsx】正在导出最大层间位移 ({i+1}/{self.main.gm_N}){space}\r', end='')
-            results = all_resutls[i]
-            ru = results.ru
-            interstory_ru = np.diff(ru, axis=1)
-            interstory_ru = np.column_stack((ru[:, 0], interstory_ru))
-            max_IDR = np.amax(abs(interstory_ru), axis=0)
-            self.signal_info.emit(f'正在导出最大层间位移 ({i+1}/{self.main.gm_N})...')
-            gm_name = self.main.gm_name[i]
-            ws.cell(2, 2+i, gm_name)
-            self.main.write_to_excel(ws, max_IDR, 3, 2+i)
-        self.set_ws_center(ws)
-        # 6 最大层间残余位移
-        ws: Worksheet = wb.create_sheet('最大层间残余位移')
-        ws.merge_cells(start_row=1, start_column=1, end_row=2, end_column=1)
-        ws.cell(1, 1, '楼层')
-        ws.merge_cells(start_row=1, start_column=2, end_row=1, end_column=1+self.main.gm_N)
-        ws.cell(1, 2, '最大层间残余位移')
-        for i in range(self.main.N):
-            ws.cell(3+i, 1, i+1)
-        for i in range(self.main.gm_N):
-            print(f'【Thread_export_data, export_data_xlsx】正在导出最大层间残余位移 ({i+1}/{self.main.gm_N}){space}\r', end='')
-            self.signal_info.emit(f'正在导出最大层间残余位移 ({i+1}/{self.main.gm_N})...')
-            results = all_resutls[i]
-            resu = results.resu
-            RIDR = np.diff(resu)
-            RIDR = np.insert(RIDR, 0, resu[0])
-            RIDR = np.insert(RIDR, 0, 0)
-            gm_name = self.main.gm_name[i]
-            ws.cell(2, 2+i, gm_name)
-            self.main.write_to_excel(ws, resu, 3, 2+i)
-        self.set_ws_center(ws)
-        # 7 绝对位移
-        ws: Worksheet = wb.create_sheet('绝对位移')
-        for i in range(self.main.gm_N):
-            print(f'【Thread_export_data, export_data_xlsx】正在导出绝对位移 ({i+1}/{self.main.gm_N}){space}\r', end='')
-            self.signal_info.emit(f'正在导出绝对位移 ({i+1}/{self.main.gm_N})...')
-            results = all_resutls[i]
-            t, au = results.t, results.au
-            ws.merge_cells(start_row=1, start_column=1+(self.main.N+1)*i, end_row=1, end_column=(self.main.N+1)*(i+1))
-            ws.cell(2, 1+(self.main.N+1)*i, 't')
-            for j in range(self.main.N):
-                ws.cell(2, 2+(self.main.N+1)*i+j, f'{j+1}层')
-            gm_name = self.main.gm_name[i]
-            ws.cell(1, 1+(self.main.N+1)*i, gm_name)
-            self.main.write_to_excel(ws, t, 3, 1+(self.main.N+1)*i)
-            self.main.write_to_excel(ws, au, 3, 2+(self.main.N+1)*i)
-        self.set_ws_center(ws)
-        # 8 绝对速度
-        ws: Worksheet = wb.create_sheet('绝对速度')
-        for i in range(self.main.gm_N):
-            print(f'【Thread_export_data, export_data_xlsx】正在导出绝对速度 ({i+1}/{self.main.gm_N}){space}\r', end='')
-            self.signal_info.emit(f'正在导出绝对速度 ({i+1}/{self.main.gm_N})...')
-            results = all_resutls[i]
-            t, av = results.t, results.av
-            ws.merge_cells(start_row=1, start_column=1+(self.main.N+1)*i, end_row=1, end_column=(self.main.N+1)*(i+1))
-            ws.cell(2, 1+(self.main.N+1)*i, 't')
-            for j in range(self.main.N):
-                ws.cell(2, 2+(self.main.N+1)*i+j, f'{j+1}层')
-            gm_name = self.main.gm_name[i]
-            ws.cell(1, 1+(self.main.N+1)*i, gm_name)
-            self.main.write_to_excel(ws, t, 3, 1+(self.main.N+1)*i)
-            self.main.write_to_excel(ws, av, 3, 2+(self.main.N+1)*i)
-        self.set_ws_center(ws)
-        # 9 绝对加速度
-        ws: Worksheet = wb.create_sheet('绝对加速度')
-        for i in range(self.main.gm_N):
-            print(f'【Thread_export_data, export_data_xlsx】正在导出绝对加速度 ({i+1}/{self.main.gm_N}){space}\r', end='')
-            self.signal_info.emit(f'正在导出绝对加速度 ({i+1}/{self.main.gm_N})...')
-            results = all_resutls[i]
-            t, aa = results.t, results.aa / self.main.g
-            ws.merge_cells(start_row=1, start_column=1+(self.main.N+1)*i, end_row=1, end_column=(self.main.N+1)*(i+1))
-            ws.cell(2, 1+(self.main.N+1)*i, 't')
-            for j in range(self.main.N):
-                ws.cell(2, 2+(self.main.N+1)*i+j, f'{j+1}层')
-            gm_name = self.main.gm_name[i]
-            ws.cell(1, 1+(self.main.N+1)*i, gm_name)
-            self.main.write_to_excel(ws, t, 3, 1+(self.main.N+1)*i)
-            self.main.write_to_excel(ws, aa, 3, 2+(self.main.N+1)*i)
-        self.set_ws_center(ws)
-        # 10 绝对加速度包络
-        ws: Worksheet = wb.create_sheet('绝对加速度包络')
-        ws.merge_cells(start_row=1, start_column=1, end_row=2, end_column=1)
-        ws.cell(1, 1, '楼层')
-        ws.merge_cells(start_row=1, start_column=2, end_row=1, end_column=1+self.main.gm_N)
-        ws.cell(1, 2, '绝对加速度包络')
-        for i in range(self.main.N):
-            ws.cell(3+i, 1, i+1)
-        for i in range(self.main.gm_N):
-            print(f'【Thread_export_data, export_data_xlsx】正在导出绝对加速度包络 ({i+1}/{self.main.gm_N}){space}\r', end='')
-            self.signal_info.emit(f'正在导出绝对加速度包络 ({i+1}/{self.main.gm_N})...')
-            results = all_resutls[i]
-            t, aa = results.t, results.aa / self.main.g
-            max_aa = np.max(abs(aa), axis=0)
-            gm_name = self.main.gm_name[i]
-            ws.cell(2, 2+i, gm_name)
-            self.main.write_to_excel(ws, max_aa, 3, 2+i)
-        self.set_ws_center(ws)
-        # 11 底部剪力
-        ws: Worksheet = wb.create_sheet('底部剪力')
-        for i in range(self.main.gm_N):
-            print(f'【Thread_export_data, export_data_xlsx】正在导出底部剪力 ({i+1}/{self.main.gm_N}){space}\r', end='')
-            self.signal_info.emit(f'正在导出底部剪力 ({i+1}/{self.main.gm_N})...')
-            results = all_resutls[i]
-            t, base_V = results.t, results.base_V / 1000
-            ws.cell(2, 2*i+1, 't')
-            ws.cell(2, 2*i+2, 'Vb')
-            gm_name = self.main.gm_name[i]
-            ws.merge_cells(start_row=1, start_column=2*i+1, end_row=1, end_column=2*i+2)
-            ws.cell(1, 2*i+1, gm_name)
-            self.main.write_to_excel(ws, t, 3, 2*i+1)
-            self.main.write_to_excel(ws, base_V, 3, 2*i+2)
-        self.set_ws_center(ws)
-        # 12-14 楼层剪力、楼层剪力包络、材料滞回曲线
-        ws: Worksheet = wb.create_sheet('材料滞回曲线')
-        ws1 = wb.create_sheet('楼层剪力')
-        ws2 = wb.create_sheet('楼层剪力包络')
-        ws2.merge_cells(start_row=1, start_column=1, end_row=2, end_column=1)
-        ws2.cell(1, 1, '楼层')
-        ws2.merge_cells(start_row=1, start_column=2, end_row=1, end_column=1+self.main.gm_N)
-        ws2.cell(1, 2, '楼层剪力包络')
-        self.main.write_to_excel(ws2, [i+1 for i in range(self.main.N)], 3, 1)
-        current_col = 1  # 当前写入的列序号
-        current_col_gm = current_col  # 当前地震动的列序号
-        for i in range(self.main.gm_N):
-            print(f'【Thread_export_data, export_data_xlsx】正在导出楼层剪力、楼层剪力包络、材料滞回曲线 ({i+1}/{self.main.gm_N}){space}\r', end='')
-            self.signal_info.emit(f'正在导出楼层剪力、楼层剪力包络、材料滞回曲线 ({i+1}/{self.main.gm_N})...')
-            results = all_resutls[i]
-            t = results.t
-            base_V = results.base_V / 1000
-            mat = results.mat
-            mat_idx: list[list[int]] = []  # 各层材料的序号
-            n = 0
-            gm_name = self.main.gm_name[i]
-            shear = np.zeros((len(t), self.main.N))
-            ws1.merge_cells(start_row=1, start_column=(self.main.N+1)*i+1, end_row=1, end_column=(self.main.N+1)*(i+1))
-            ws1.cell(1, (self.main.N+1)*i+1, f'{gm_name}')
-            ws1.cell(2, (self.main.N+1)*i+1, 't')
-            self.main.write_to_excel(ws1, t, 3, (self.main.N+1)*i+1)
-            ws2.cell(2, 2+i, gm_name)
-            for story_idx, sub_list in enumerate(self.main.story_mat):
-                current_col_u = current_col  # 位移数据所在列序号
-                current_col += 1
-                mat_idx.append([])
-                hys_curve_parallel = np.zeros((len(t), 2))  # 并联材料滞回曲线
-                current_col_story = current_col
-                ws1.cell(2, (self.main.N+1)*i+2+story_idx, f'{story_idx+1}层')
-                for tag, _ in enumerate(sub_list):
-                    mat_idx[story_idx].append(n)
-                    col_idx = 2 * n
-                    hys_curve = np.zeros((len(t), 2))  # 滞回曲线
-                    hys_curve[:, 0] = mat[:, col_idx + 1]
-                    hys_curve[:, 1] = mat[:, col_idx] / 1000
-                    hys_curve_parallel[:, 0] = mat[:, col_idx + 1]
-                    hys_curve_parallel[:, 1] += mat[:, col_idx] / 1000
-                    self.main.write_to_excel(ws, hys_curve[:, 1], 4, current_col)
-                    self.main.write_to_excel(ws, hys_curve[:, 0], 4, current_col_u)
-                    ws.cell(3, current_col, self.main.mat_lib[tag-1][0])
-                    current_col += 1
-                    n += 1
-                    shear[:, story_idx] += mat[:, col_idx] / 1000
-                if len(sub_list) > 1:
-                    self.main.write_to_excel(ws, hys_curve_parallel[:, 1], 4, current_col)
-                    ws.cell(3, current_col, '并联材料')
-                    current_col += 1
-                ws.merge_cells(start_row=2, start_column=current_col_story-1, end_row=2, end_column=current_col-1)
-                ws.cell(2, current_col_story-1, f'{story_idx+1}层')
-                ws.cell(3, current_col_story-1, 'u')
-            self.main.write_to_excel(ws1, shear, 3, (self.main.N+1)*i+2)
-            ws.merge_cells(start_row=1, start_column=current_col_gm, end_row=1, end_column=current_col-1)
-            ws.cell(1, current_col_gm, f'{gm_name}')
-            shear_enve = np.amax(abs(shear), axis=0)
-            self.main.write_to_excel(ws2, shear_enve, 3, 2+i)
-            current_col_gm = current_col
-        self.set_ws_center(ws)
-        # 15 单位制
-        ws: Worksheet = wb.create_sheet('单位制')
-        ws.cell(1, 1, '时间')
-        ws.cell(1, 2, 's')
-        ws.cell(2, 1, '位移')
-        ws.cell(2, 2, 'mm')
-        ws.cell(3, 1, '速度')
-        ws.cell(3, 2, 'mm/s')
-        ws.cell(4, 1, '加速度')
-        ws.cell(4, 2, 'g')
-        ws.cell(5, 1, '剪力')
-        ws.cell(5, 2, 'kN')
-        ws.cell(6, 1, f'g = {self.main.g}mm/s^2')
-        ws.merge_cells(start_row=6, start_column=1, end_row=6, end_column=2)
-        self.set_ws_center(ws)
-        self.set_ws_center(ws1)
-        self.set_ws_center(ws2)
-        # 保存文件
         try:
-            print(f'【Thread_export_data, export_data_xlsx】正在保存文件...')
-            self.signal_info.emit('正在保存文件...')
-            wb.save(excel_path)
+            core.export_xlsx(excel_path, self.main.all_resutls, self.main.gm_name, self.main.mode_results,
+                             self.main.story_index, [mat[0] for mat in self.main.mat_lib], self.main.g, myprint)
             print(f'【Thread_export_data, export_data_xlsx】已保存计算结果至：{excel_path}')
             self.signal_msg.emit(['information', f'已保存计算结果至：\n{excel_path}'])
-        except:
+        except OSError:
             self.signal_msg.emit(['critical', '无法保存文件，检查文件是否处于打开状态！'])
         self.signal_finished.emit()
 
-    def set_ws_center(self, ws):
-        if self.main.gm_N * self.main.N > 8:
-            return  # 如果地震动和层数过多，则不进行居中以节省时间
-        for row in ws.iter_rows():
-            for cell in row:
-                cell.alignment = px.styles.Alignment(horizontal='center', vertical='center')
-
 
 class Win_about(QDialog):
     def __init__(self, parent=None):
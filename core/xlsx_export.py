@@ -0,0 +1,219 @@
+from itertools import chain
+from typing import Callable
+
+import numpy as np
+import openpyxl as px
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+
+from core.Results import Results, ModeResults, StoryMatIndex
+
+
+BLOCK_ROWS = 2000  # 每次转换并写入的行数
+DIGITS = 7  # 保留小数位数
+
+
+def _merge(ws: WriteOnlyWorksheet, start_row: int, start_column: int, end_row: int, end_column: int):
+    """合并单元格（行列序号从1开始）"""
+    if (start_row, start_column) != (end_row, end_column):
+        ws.merged_cells.add(f'{px.utils.get_column_letter(start_column)}{start_row}:'
+                            f'{px.utils.get_column_letter(end_column)}{end_row}')
+
+
+def _append_blocks(ws: WriteOnlyWorksheet, groups: list[np.ndarray]):
+    """将多个二维数组左右并列、按行逐块写入工作表，较短的数组以空单元格补齐"""
+    nrow = max(len(data) for data in groups)
+    for row_start in range(0, nrow, BLOCK_ROWS):
+        n = min(BLOCK_ROWS, nrow - row_start)
+        parts = []
+        for data in groups:
+            block = np.round(data[row_start: row_start + n], DIGITS).tolist()
+            block += [[None] * data.shape[1]] * (n - len(block))
+            parts.append(block)
+        for rows in zip(*parts):
+            ws.append(list(chain.from_iterable(rows)))
+
+
+def _write_time_history(ws: WriteOnlyWorksheet, all_results: list[Results], gm_names: list[str],
+                        get_data: Callable[[Results], np.ndarray], col_names: list[str]):
+    """写入时程数据，每条地震动占len(col_names)列：第1行为地震动名，第2行为列名"""
+    width = len(col_names)
+    header1, header2 = [], []
+    for i, gm_name in enumerate(gm_names):
+        header1 += [gm_name] + [None] * (width - 1)
+        header2 += col_names
+        _merge(ws, 1, 1 + width * i, 1, width * (i + 1))
+    ws.append(header1)
+    ws.append(header2)
+    _append_blocks(ws, [get_data(results) for results in all_results])
+
+
+def _write_envelope(ws: WriteOnlyWorksheet, all_results: list[Results], gm_names: list[str],
+                    get_data: Callable[[Results], np.ndarray], title: str, N: int):
+    """写入各层包络值，第1列为楼层，其后每条地震动占1列"""
+    _merge(ws, 1, 1, 2, 1)
+    _merge(ws, 1, 2, 1, 1 + len(gm_names))
+    ws.append(['楼层', title])
+    ws.append([None] + gm_names)
+    data = np.column_stack([np.arange(1, N + 1)] + [get_data(results) for results in all_results])
+    _append_blocks(ws, [data])
+
+
+def export_xlsx(
+        excel_path: str,
+        all_results: list[Results],
+        gm_names: list[str],
+        mode_results: ModeResults,
+        index: StoryMatIndex,
+        mat_names: list[str],
+        g: float,
+        myprint: Callable[[str], None]=print
+    ):
+    """以openpyxl的只写模式导出所有计算结果至xlsx文件
+
+    各工作表的内容与布局与逐单元格写入的导出方式相同，但数据按行从NumPy数组成块写入，
+    不设置单元格样式，内存占用与写入时间均随数据量线性增长。
+
+    Args:
+        excel_path (str): 文件路径
+        all_results (list[Results]): 各条地震动的计算结果
+        gm_names (list[str]): 地震动名
+        mode_results (ModeResults): 模态结果
+        index (StoryMatIndex): 楼层与材料响应列的对应关系
+        mat_names (list[str]): 材料库中各材料的名称（用于滞回曲线的表头）
+        g (float): 重力加速度
+        myprint (Callable[[str], None], optional): 输出导出进度. Defaults to print.
+    """
+    N = index.N
+    wb = px.Workbook(write_only=True)
+    # 1 振型&周期
+    myprint('正在导出振型与周期...')
+    ws = wb.create_sheet('振型与周期')
+    T, mode = list(mode_results.T), np.array(mode_results.mode).reshape(len(mode_results.mode), -1)
+    _merge(ws, 1, 4, 2, 4)
+    _merge(ws, 1, 5, 1, 4 + len(T))
+    rows = [['振型', '周期 (s)', None, '楼层', '振型位移 (mm)'], [None, None, None, None] + [f'{i + 1}阶' for i in range(len(mode))]]
+    for i in range(max(len(T) + 1, N + 2) - 2):
+        rows.append([None] * 4 + (np.round(mode[:, i], DIGITS).tolist() if i < N else []))
+        if i < N:
+            rows[-1][3] = i + 1
+    for i, T_i in enumerate(T):
+        rows[1 + i][:2] = [i + 1, round(T_i, DIGITS)]
+    for row in rows:
+        ws.append(row)
+    # 2-4 相对响应，7-9 绝对响应
+    story_names = [f'{j + 1}层' for j in range(N)]
+    time_history = {
+        '相对位移': lambda results: np.column_stack((results.t, results.ru)),
+        '相对速度': lambda results: np.column_stack((results.t, results.rv)),
+        '相对加速度': lambda results: np.column_stack((results.t, results.ra)),
+    }
+    for name, get_data in time_history.items():
+        myprint(f'正在导出{name}...')
+        _write_time_history(wb.create_sheet(name), all_results, gm_names, get_data, ['t'] + story_names)
+    # 5 最大层间位移，6 最大层间残余位移
+    myprint('正在导出最大层间位移与残余位移...')
+    _write_envelope(wb.create_sheet('最大层间位移'), all_results, gm_names, lambda results: results.max_drift, '最大层间位移', N)
+    _write_envelope(wb.create_sheet('最大层间残余位移'), all_results, gm_names, lambda results: results.res_drift, '最大层间残余位移', N)
+    time_history = {
+        '绝对位移': lambda results: np.column_stack((results.t, results.au)),
+        '绝对速度': lambda results: np.column_stack((results.t, results.av)),
+        '绝对加速度': lambda results: np.column_stack((results.t, results.aa / g)),
+    }
+    for name, get_data in time_history.items():
+        myprint(f'正在导出{name}...')
+        _write_time_history(wb.create_sheet(name), all_results, gm_names, get_data, ['t'] + story_names)
+    # 10 绝对加速度包络
+    myprint('正在导出绝对加速度包络...')
+    _write_envelope(wb.create_sheet('绝对加速度包络'), all_results, gm_names, lambda results: results.max_aa / g, '绝对加速度包络', N)
+    # 11 底部剪力
+    myprint('正在导出底部剪力...')
+    _write_time_history(wb.create_sheet('底部剪力'), all_results, gm_names,
+                        lambda results: np.column_stack((results.t, results.base_V / 1000)), ['t', 'Vb'])
+    # 12 材料滞回曲线：每层依次为楼层变形、各材料的力、并联材料的力（多于一种材料时）
+    myprint('正在导出材料滞回曲线...')
+    ws = wb.create_sheet('材料滞回曲线')
+    header1, header2, header3 = [], [], []
+    col = 1
+    for gm_name in gm_names:
+        col_gm = col
+        for story_idx, ele_idx in enumerate(index.story_ele):
+            names = ['u'] + [mat_names[tag - 1] for tag in index.key[story_idx]]
+            if len(ele_idx) > 1:
+                names.append('并联材料')
+            _merge(ws, 2, col, 2, col + len(names) - 1)
+            header2 += [f'{story_idx + 1}层'] + [None] * (len(names) - 1)
+            header3 += names
+            col += len(names)
+        _merge(ws, 1, col_gm, 1, col - 1)
+        header1 += [gm_name] + [None] * (col - col_gm - 1)
+    ws.append(header1)
+    ws.append(header2)
+    ws.append(header3)
+    groups = []
+    for results in all_results:
+        mat = results.mat
+        shear = results.story_shear(index)
+        deform = results.story_deform(index)
+        columns = []
+        for story_idx, ele_idx in enumerate(index.story_ele):
+            columns.append(deform[:, story_idx])
+            columns += [mat[:, 2 * n] / 1000 for n in ele_idx]
+            if len(ele_idx) > 1:
+                columns.append(shear[:, story_idx] / 1000)
+        groups.append(np.column_stack(columns))
+    _append_blocks(ws, groups)
+    # 13 楼层剪力，14 楼层剪力包络
+    myprint('正在导出楼层剪力与楼层剪力包络...')
+    _write_time_history(wb.create_sheet('楼层剪力'), all_results, gm_names,
+                        lambda results: np.column_stack((results.t, results.story_shear(index) / 1000)), ['t'] + story_names)
+    _write_envelope(wb.create_sheet('楼层剪力包络'), all_results, gm_names,
+                    lambda results: results.max_story_shear(index) / 1000, '楼层剪力包络', N)
+    # 15 单位制
+    ws = wb.create_sheet('单位制')
+    for row in [['时间', 's'], ['位移', 'mm'], ['速度', 'mm/s'], ['加速度', 'g'], ['剪力', 'kN'], [f'g = {g}mm/s^2']]:
+        ws.append(row)
+    _merge(ws, 6, 1, 6, 2)
+    myprint('正在保存文件...')
+    wb.save(excel_path)
+
+
+if __name__ == '__main__':
+    # 对比逐单元格写入（原导出方式）与只写模式的写入速度（用法：python xlsx_export.py [地震动数] [楼层数] [时间步数]）
+    import sys
+    import time
+    import tempfile
+    from pathlib import Path
+    gm_N = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    N = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    NPTS = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+    rng = np.random.default_rng(0)
+    all_results = [Results(np.arange(1, NPTS + 1) * 0.01, *rng.standard_normal((4, NPTS)),
+                           *rng.standard_normal((3, NPTS, N)), rng.standard_normal((NPTS, 2 * N)))
+                   for _ in range(gm_N)]
+    gm_names = [f'gm{i + 1}' for i in range(gm_N)]
+    with tempfile.TemporaryDirectory() as temp_path:
+        # 原导出方式：逐单元格写入单个时程工作表
+        t0 = time.perf_counter()
+        wb = px.Workbook()
+        ws = wb.active
+        for i, results in enumerate(all_results):
+            for row, values in enumerate(results.ru):
+                for j, value in enumerate(values):
+                    ws.cell(row=3 + row, column=2 + (N + 1) * i + j, value=round(value, DIGITS))
+        wb.save(Path(temp_path) / 'cell.xlsx')
+        t1 = time.perf_counter()
+        # 只写模式写入相同的工作表
+        wb = px.Workbook(write_only=True)
+        _write_time_history(wb.create_sheet('相对位移'), all_results, gm_names,
+                            lambda results: np.column_stack((results.t, results.ru)), ['t'] + [f'{j + 1}层' for j in range(N)])
+        wb.save(Path(temp_path) / 'stream.xlsx')
+        t2 = time.perf_counter()
+        # 完整导出
+        export_xlsx(Path(temp_path) / 'all.xlsx', all_results, gm_names, ModeResults([1.0], [np.ones(N)]),
+                    StoryMatIndex([[1]] * N), ['mat'], 9800, myprint=lambda text: None)
+        t3 = time.perf_counter()
+    n_cells = gm_N * N * NPTS
+    print(f'地震动数：{gm_N}，楼层数：{N}，时间步数：{NPTS}')
+    print(f'逐单元格写入单个工作表：{t1 - t0:.2f} s（{n_cells / (t1 - t0) / 1e6:.2f}百万单元格/s）')
+    print(f'只写模式写入单个工作表：{t2 - t1:.2f} s（{n_cells / (t2 - t1) / 1e6:.2f}百万单元格/s）')
+    print(f'只写模式完整导出（15个工作表）：{t3 - t2:.2f} s')
@@ -386,6 +386,9 @@ class Ui_MainWindow(object):
         self.radioButton.setChecked(True)
         self.radioButton.setObjectName("radioButton")
         self.verticalLayout_6.addWidget(self.radioButton)
+        self.radioButton_5 = QtWidgets.QRadioButton(self.groupBox_5)
+        self.radioButton_5.setObjectName("radioButton_5")
+        self.verticalLayout_6.addWidget(self.radioButton_5)
         self.horizontalLayout_10 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_10.setObjectName("horizontalLayout_10")
         self.radioButton_2 = QtWidgets.QRadioButton(self.groupBox_5)
@@ -596,7 +599,10 @@ class Ui_MainWindow(object):
         self.action_5.setObjectName("action_5")
         self.action_6 = QtWidgets.QAction(MainWindow)
         self.action_6.setObjectName("action_6")
+        self.action_7 = QtWidgets.QAction(MainWindow)
+        self.action_7.setObjectName("action_7")
         self.menu.addAction(self.action_4)
+        self.menu.addAction(self.action_7)
         self.menu_2.addAction(self.action)
         self.menu_2.addAction(self.action_6)
         self.menu_3.addAction(self.action_2)
@@ -656,6 +662,7 @@ class Ui_MainWindow(object):
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_2), _translate("MainWindow", "模型定义"))
         self.groupBox_5.setTitle(_translate("MainWindow", "求解器"))
         self.radioButton.setText(_translate("MainWindow", "OpenSeesPy (3.6.0.3)"))
+        self.radioButton_5.setText(_translate("MainWindow", "NumPy (仅内置材料，多条地震动同时计算)"))
         self.radioButton_2.setText(_translate("MainWindow", "OpenSees.exe"))
         self.pushButton_18.setText(_translate("MainWindow", "选择OpenSees.exe"))
         self.groupBox_6.setTitle(_translate("MainWindow", "阻尼参数"))
@@ -701,6 +708,7 @@ class Ui_MainWindow(object):
         self.action_4.setText(_translate("MainWindow", "打开"))
         self.action_5.setText(_translate("MainWindow", "OpenSees文档"))
         self.action_6.setText(_translate("MainWindow", "终端输出"))
+        self.action_7.setText(_translate("MainWindow", "保存"))
 import resource_rc
 
 
@@ -14,7 +14,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_win_export(object):
     def setupUi(self, win_export):
         win_export.setObjectName("win_export")
-        win_export.resize(235, 88)
+        win_export.resize(345, 88)
         font = QtGui.QFont()
         font.setFamily("Times New Roman")
         font.setPointSize(12)
@@ -37,6 +37,10 @@ class Ui_win_export(object):
         self.pushButton_2.setMinimumSize(QtCore.QSize(100, 30))
         self.pushButton_2.setObjectName("pushButton_2")
         self.horizontalLayout.addWidget(self.pushButton_2)
+        self.pushButton_3 = QtWidgets.QPushButton(win_export)
+        self.pushButton_3.setMinimumSize(QtCore.QSize(100, 30))
+        self.pushButton_3.setObjectName("pushButton_3")
+        self.horizontalLayout.addWidget(self.pushButton_3)
         self.verticalLayout.addLayout(self.horizontalLayout)
 
         self.retranslateUi(win_export)
@@ -48,6 +52,7 @@ class Ui_win_export(object):
         self.label.setText(_translate("win_export", "请选择导出格式："))
         self.pushButton.setText(_translate("win_export", ".txt"))
         self.pushButton_2.setText(_translate("win_export", ".xlsx"))
+        self.pushButton_3.setText(_translate("win_export", ".parquet"))
 import resource_rc
 
 
@@ -14,7 +14,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_win_run(object):
     def setupUi(self, win_run):
         win_run.setObjectName("win_run")
-        win_run.resize(400, 187)
+        win_run.resize(400, 210)
         font = QtGui.QFont()
         font.setFamily("Times New Roman")
         font.setPointSize(12)
@@ -32,6 +32,10 @@ class Ui_win_run(object):
         self.label_2 = QtWidgets.QLabel(win_run)
         self.label_2.setObjectName("label_2")
         self.verticalLayout.addWidget(self.label_2)
+        self.label_3 = QtWidgets.QLabel(win_run)
+        self.label_3.setText("")
+        self.label_3.setObjectName("label_3")
+        self.verticalLayout.addWidget(self.label_3)
         spacerItem1 = QtWidgets.QSpacerItem(20, 4, QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Expanding)
         self.verticalLayout.addItem(spacerItem1)
         self.progressBar = QtWidgets.QProgressBar(win_run)
@@ -172,6 +172,16 @@ class Ui_win_solve_setting(object):
         self.horizontalLayout.addWidget(self.lineEdit_7)
         spacerItem5 = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Minimum)
         self.horizontalLayout.addItem(spacerItem5)
+        self.label_10 = QtWidgets.QLabel(win_solve_setting)
+        self.label_10.setMinimumSize(QtCore.QSize(0, 30))
+        self.label_10.setObjectName("label_10")
+        self.horizontalLayout.addWidget(self.label_10)
+        self.spinBox = QtWidgets.QSpinBox(win_solve_setting)
+        self.spinBox.setMinimumSize(QtCore.QSize(80, 30))
+        self.spinBox.setMinimum(1)
+        self.spinBox.setMaximum(256)
+        self.spinBox.setObjectName("spinBox")
+        self.horizontalLayout.addWidget(self.spinBox)
         self.horizontalLayout.setStretch(2, 1)
         self.verticalLayout.addLayout(self.horizontalLayout)
         self.horizontalLayout_2 = QtWidgets.QHBoxLayout()
@@ -257,6 +267,7 @@ class Ui_win_solve_setting(object):
         self.lineEdit_5.setText(_translate("win_solve_setting", "1e-5"))
         self.label_9.setText(_translate("win_solve_setting", "分析步长与地震动步长之比："))
         self.lineEdit_7.setText(_translate("win_solve_setting", "1"))
+        self.label_10.setText(_translate("win_solve_setting", "并行进程数："))
         self.pushButton.setText(_translate("win_solve_setting", "确认"))
         self.pushButton_3.setText(_translate("win_solve_setting", "默认值"))
         self.pushButton_2.setText(_translate("win_solve_setting", "返回"))